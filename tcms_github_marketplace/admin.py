@@ -12,9 +12,45 @@ from django.utils import timezone
 from django.contrib import admin
 from django.http import HttpResponseForbidden, HttpResponseRedirect
 
+from tcms_github_marketplace import export
 from tcms_github_marketplace.models import ManualPurchase, PrivateRepoToken, Purchase
 
 
+class SenderFilter(admin.SimpleListFilter):
+    """
+    Filters by the beginning of the sender's email address which is typed
+    into a text field. Unlike the default list filter it doesn't query the
+    database for all distinct senders!
+    """
+
+    title = "sender"
+    parameter_name = "sender"
+    template = "admin/tcms_github_marketplace/input_filter.html"
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(sender__startswith=self.value().strip())
+
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value() is None,
+            "query_string": changelist.get_query_string(remove=[self.parameter_name]),
+            "query_parts": [
+                (key, value)
+                for key, value in changelist.params.items()
+                if key != self.parameter_name
+            ],
+        }
+
+
 class PurchaseAdmin(admin.ModelAdmin):
     list_display = (
         "pk",
@@ -28,24 +64,39 @@ class PurchaseAdmin(admin.ModelAdmin):
         "should_have_tenant",
         "should_have_support",
     )
-    list_filter = ("action", "vendor", "sender")
+    list_filter = ("action", "vendor", SenderFilter)
     search_fields = ("action", "vendor", "sender", "subscription")
     ordering = ["-pk"]
+    actions = ["export_as_csv", "export_as_ndjson"]
+
+    def get_queryset(self, request):
+        """
+        Values displayed in the changelist are calculated in SQL, the full
+        JSON payload is loaded only when needed!
+        """
+        return super().get_queryset(request).with_price_and_quantity().defer("payload")
 
     def monthly_price(self, purchase):  # pylint: disable=no-self-use
-        return int(
-            purchase.payload["marketplace_purchase"]["plan"].get(
-                "monthly_price_in_cents", 0
-            )
-            / 100
-        )
+        return int(purchase.monthly_price_in_cents / 100)
 
     monthly_price.short_description = "$/mo"
+    monthly_price.admin_order_field = "monthly_price_in_cents"
 
     def purchased_quantity(self, purchase):  # pylint: disable=no-self-use
-        return purchase.unit_count
+        return purchase.quantity
 
     purchased_quantity.short_description = "Qty"
+    purchased_quantity.admin_order_field = "quantity"
+
+    def export_as_csv(self, request, queryset):  # pylint: disable=no-self-use
+        return export.streaming_response(queryset, "csv")
+
+    export_as_csv.short_description = "Export selected purchases as CSV"
+
+    def export_as_ndjson(self, request, queryset):  # pylint: disable=no-self-use
+        return export.streaming_response(queryset, "ndjson")
+
+    export_as_ndjson.short_description = "Export selected purchases as NDJSON"
 
     def add_view(self, request, form_url="", extra_context=None):
         return HttpResponseRedirect(
@@ -5,13 +5,178 @@
 
 # pylint: disable=missing-permission-required, no-self-use
 
-from django.core.cache import cache
+from datetime import timedelta
+
+from django.db.models import Max
 from django.utils import timezone
 
 from tcms.rpc.views import rpc_method
-from tcms_github_marketplace import utils
+from tcms_github_marketplace import gitops_cache, prefix, routers, utils
 from tcms_github_marketplace.models import Purchase
 
+# seconds
+ALLOWLIST_SETTLE = 60
+
+# see routers.stick()
+GITOPS_STICKY_KEY = "gitops"
+
+
+def paid_purchases():
+    """
+    Paid purchases which may still be active
+    """
+    return Purchase.objects.received_since(days=utils.ACTIVE_PURCHASE_DAYS).filter(
+        action="purchased",
+        payload__marketplace_purchase__plan__monthly_price_in_cents__gt=0,
+    )
+
+
+def purchase_paid_until(purchase):
+    return utils.calculate_paid_until(
+        purchase.payload["marketplace_purchase"],
+        purchase.effective_date,
+    )
+
+
+def latest_paid_purchases():
+    """
+    The most recent paid purchase for every ``gitops_prefix``
+    """
+    return (
+        paid_purchases()
+        .exclude(gitops_prefix_normalized=None)
+        .order_by("gitops_prefix_normalized", "-received_on")
+        .distinct("gitops_prefix_normalized")
+        .only("gitops_prefix_normalized", "effective_date", "received_on", "payload")
+    )
+
+
+def allowlist_version():
+    """
+    Version of the allow-list is the largest Purchase ID with a
+    ``gitops_prefix``. Records received during the last ``ALLOWLIST_SETTLE``
+    seconds are ignored b/c transactions which are still in progress may
+    commit records with smaller IDs later!
+    """
+    return (
+        Purchase.objects.received_since(days=utils.ACTIVE_PURCHASE_DAYS)
+        .exclude(gitops_prefix_normalized=None)
+        .filter(received_on__lt=timezone.now() - timedelta(seconds=ALLOWLIST_SETTLE))
+        .aggregate(version=Max("pk"))["version"]
+        or 0
+    )
+
+
+def allowlist(version, since=None):
+    """
+    Snapshot of all prefixes with an active paid subscription and the
+    timestamp when it expires. When ``since`` is specified returns only
+    the prefixes which changed after that version, None means removed or
+    expired. Clients are expected to drop entries once they expire!
+    """
+    purchases = latest_paid_purchases().filter(pk__lte=version)
+
+    if since is not None:
+        changed = set(
+            Purchase.objects.filter(pk__gt=since, pk__lte=version)
+            .exclude(gitops_prefix_normalized=None)
+            .values_list("gitops_prefix_normalized", flat=True)
+        )
+        purchases = purchases.filter(gitops_prefix_normalized__in=changed)
+
+    # the same filter for snapshots and changes so that applying changes
+    # results in the same allow-list as a new snapshot
+    now = timezone.now().timestamp()
+    expires = {}
+    for purchase in purchases:
+        value = int(purchase_paid_until(purchase).timestamp())
+        if value >= now:
+            expires[purchase.gitops_prefix_normalized] = value
+
+    if since is None:
+        return {"version": version, "prefixes": expires}
+
+    return {
+        "version": version,
+        "since": since,
+        "changes": {key: expires.get(key) for key in sorted(changed)},
+    }
+
+
+def latest_paid_until(purchase):
+    return {
+        "received_on": purchase.received_on,
+        "paid_until": purchase_paid_until(purchase),
+    }
+
+
+def warm_cache(chunk_size=500):
+    """
+    Caches ``paid_until`` for the most recent paid purchase of every
+    ``gitops_prefix``. Returns the number of cached prefixes!
+    """
+    count = 0
+    entries = {}
+    for purchase in latest_paid_purchases().iterator(chunk_size=chunk_size):
+        entries[purchase.gitops_prefix_normalized] = latest_paid_until(purchase)
+
+        if len(entries) >= chunk_size:
+            gitops_cache.set_prefixes(entries)
+            count += len(entries)
+            entries = {}
+
+    gitops_cache.set_prefixes(entries, warm=True)
+    return count + len(entries)
+
+
+def gitops_prefix_changed(value):
+    """
+    Executed after a purchase with ``gitops_prefix`` has been committed.
+    Makes cached answers stale and updates the warmed up entry for ``value``
+    """
+    gitops_cache.invalidate()
+
+    if not gitops_cache.is_warm():
+        return
+
+    purchase = (
+        latest_paid_purchases()
+        .filter(gitops_prefix_normalized=prefix.canonical(value))
+        .first()
+    )
+    if purchase:
+        gitops_cache.set_prefixes(
+            {purchase.gitops_prefix_normalized: latest_paid_until(purchase)}
+        )
+
+
+def paid_until_for(repo_url):
+    """
+    Returns when the subscription matching ``repo_url`` expires or
+    None if there isn't a paid subscription for it!
+    """
+    result = gitops_cache.get(repo_url)
+    if result is not None:
+        return result or None
+
+    # warmed up via warm_cache(), only answers for active subscriptions
+    # are trusted b/c entries may be evicted from the cache individually
+    result = gitops_cache.paid_until(repo_url)
+
+    if result is None or result < timezone.now():
+        with routers.use_replica(GITOPS_STICKY_KEY):
+            purchase = (
+                paid_purchases()
+                .filter(gitops_prefix_normalized__in=prefix.candidates(repo_url))
+                .order_by("-received_on")
+                .first()
+            )
+
+        result = purchase_paid_until(purchase) if purchase else False
+
+    gitops_cache.set(repo_url, result)
+    return result or None
+
 
 @rpc_method(
     name="GitOps.allow",
@@ -29,31 +194,5 @@ def gitops_allow(repo_url):  # pylint: disable=missing-api-permissions-required
         :return: ``True`` or ``False``
         :rtype: bool
     """
-    key = f"gitops-allow-{repo_url}"
-
-    result = cache.get(key)
-    if result is not None:
-        return result
-
-    purchase = (
-        Purchase.objects.filter(
-            action="purchased",
-            gitops_prefix__iprefix_for=repo_url,
-            payload__marketplace_purchase__plan__monthly_price_in_cents__gt=0,
-        )
-        .order_by("-received_on")
-        .first()
-    )
-
-    if purchase is None:
-        cache.set(key, False)
-        return False
-
-    paid_until = utils.calculate_paid_until(
-        purchase.payload["marketplace_purchase"],
-        purchase.effective_date,
-    )
-
-    result = timezone.now() <= paid_until
-    cache.set(key, result)
-    return result
+    paid_until = paid_until_for(repo_url)
+    return paid_until is not None and timezone.now() <= paid_until
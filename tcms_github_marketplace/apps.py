@@ -1,4 +1,4 @@
-# Copyright (c) 2022 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2022-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
@@ -6,12 +6,32 @@
 # pylint: disable=import-outside-toplevel
 from django.apps import AppConfig as DjangoAppConfig
 from django.core.checks import register
+from django.db.models.signals import (
+    m2m_changed,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
 
 
 class AppConfig(DjangoAppConfig):
     name = "tcms_github_marketplace"
 
     def ready(self):
-        from tcms_github_marketplace import checks
+        from tcms_tenants.models import Tenant
+        from tcms_github_marketplace import checks, signals
 
         register(checks.quay_io_token)
+
+        post_save.connect(
+            signals.clear_subscription_summary_on_tenant_save, sender=Tenant
+        )
+        # authorized users are not available anymore after deletion
+        pre_delete.connect(
+            signals.clear_subscription_summary_on_tenant_save, sender=Tenant
+        )
+        m2m_changed.connect(
+            signals.clear_subscription_summary_on_access_change,
+            sender=Tenant.authorized_users.through,
+        )
+        post_migrate.connect(signals.warm_gitops_cache_after_migrate, sender=self)
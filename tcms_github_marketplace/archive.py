@@ -0,0 +1,83 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Helpers for moving old ``Purchase.payload`` values into compressed
+``ArchivedPayload`` records. Archived purchases keep only the JSON paths
+used in DB queries inline, the full payload is loaded on first access!
+"""
+
+import gzip
+import json
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+ARCHIVED_KEY = "_archived"
+
+# used by SQL queries, annotations & indexes - see models.py, reports.py
+# NOTE: only the first item of lists is supported
+KEEP_PATHS = (
+    ("action",),
+    ("type",),
+    ("marketplace_purchase", "account"),
+    ("marketplace_purchase", "billing_cycle"),
+    ("marketplace_purchase", "unit_count"),
+    ("marketplace_purchase", "next_billing_date"),
+    ("marketplace_purchase", "plan", "monthly_price_in_cents"),
+    ("marketplace_purchase", "plan", "yearly_price_in_cents"),
+    ("data", "quantity"),
+    ("data", "subscription", "quantity"),
+    ("data", "items", 0, "quantity"),
+)
+
+COMPRESSION = {
+    "gzip": (gzip.compress, gzip.decompress),
+}
+if zstd is not None:
+    COMPRESSION["zstd"] = (zstd.compress, zstd.decompress)
+
+
+def is_archived(payload):
+    return isinstance(payload, dict) and payload.get(ARCHIVED_KEY, False)
+
+
+def compact(payload):
+    """
+    Returns a copy of ``payload`` with only the values from ``KEEP_PATHS``
+    """
+    if is_archived(payload):
+        return payload
+
+    result = {ARCHIVED_KEY: True}
+    for path in KEEP_PATHS:
+        value = payload
+        try:
+            for key in path:
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            continue
+
+        target = result
+        for key, next_key in zip(path, path[1:]):
+            if isinstance(target, list):
+                target = target[key]
+            else:
+                target = target.setdefault(
+                    key, [{}] if isinstance(next_key, int) else {}
+                )
+        target[path[-1]] = value
+
+    return result
+
+
+def compress(payload, method):
+    return COMPRESSION[method][0](json.dumps(payload).encode())
+
+
+def decompress(data, method):
+    return json.loads(COMPRESSION[method][1](bytes(data)))
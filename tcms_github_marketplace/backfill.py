@@ -0,0 +1,203 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Batched data backfills. Rows are selected with keyset pagination on the
+primary key, only the changed columns are written via ``bulk_update()`` and
+every batch is committed separately so that locks are held only briefly.
+
+Progress is recorded in BackfillProgress so that an interrupted backfill
+resumes where it stopped when executed via the ``run_backfill`` command.
+
+Data migrations must not import this module b/c their behavior would change
+together with application code. They use the frozen copy in
+``migrations/_backfill_v1.py`` and define the transformation themselves!
+"""
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.utils import timezone
+
+from tcms_github_marketplace import prefix
+
+BATCH_SIZE = 1000
+
+BACKFILLS = {}
+
+
+def register(cls):
+    BACKFILLS[cls.name] = cls
+    return cls
+
+
+class Backfill:
+    """
+    Subclasses define ``name``, the list of ``fields`` which are updated,
+    ``queryset()`` and ``transform()``. The queryset must select only rows
+    which still need updating, that's what makes a backfill safe to repeat!
+    """
+
+    name = None
+    model = ("tcms_github_marketplace", "Purchase")
+    fields = []
+    # columns loaded from the DB, default is all
+    only = None
+
+    def queryset(self, model):
+        return model.objects.all()
+
+    def transform(self, obj):
+        """
+        Modifies ``obj`` in place. Returns True if it needs to be saved!
+        """
+        raise NotImplementedError
+
+
+def run(
+    name, apps=None, batch_size=BATCH_SIZE, progress=True, restart=False
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Executes the backfill registered as ``name``. Returns a tuple with the
+    number of processed and updated rows!
+    """
+    apps = apps or global_apps
+    backfill = BACKFILLS[name]()
+    model = apps.get_model(*backfill.model)
+
+    state = None
+    last_pk = 0
+    processed = 0
+    updated = 0
+    if progress:
+        state, _ = apps.get_model(
+            "tcms_github_marketplace", "BackfillProgress"
+        ).objects.get_or_create(name=name)
+
+        if restart:
+            state.last_pk = state.processed = state.updated = 0
+            state.finished_at = None
+        elif state.finished_at:
+            return state.processed, state.updated
+
+        last_pk = state.last_pk
+        processed = state.processed
+        updated = state.updated
+
+    queryset = backfill.queryset(model)
+    if backfill.only:
+        queryset = queryset.only(*backfill.only)
+
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not batch:
+                break
+
+            changed = [obj for obj in batch if backfill.transform(obj)]
+            if changed:
+                model.objects.bulk_update(changed, backfill.fields)
+
+            last_pk = batch[-1].pk
+            processed += len(batch)
+            updated += len(changed)
+
+            if state:
+                state.last_pk = last_pk
+                state.processed = processed
+                state.updated = updated
+                state.save()
+
+    if state:
+        state.finished_at = timezone.now()
+        state.save()
+
+    return processed, updated
+
+
+@register
+class GitHubSubscriptionId(Backfill):
+    """
+    The same as migration 0009
+    """
+
+    name = "github-subscription-id"
+    fields = ["subscription"]
+    only = ["subscription", "payload"]
+
+    def queryset(self, model):
+        return model.objects.filter(vendor="github", subscription=None)
+
+    def transform(self, obj):
+        try:
+            sender_id = obj.payload["sender"]["id"]
+            account_id = obj.payload["marketplace_purchase"]["account"]["id"]
+        except (KeyError, TypeError):
+            return False
+
+        obj.subscription = f"gh-{sender_id}-{account_id}"
+        return True
+
+
+@register
+class PrefixFastSpringSubscriptionId(Backfill):
+    """
+    The same as migration 0010
+    """
+
+    name = "prefix-fastspring-subscription-id"
+    fields = ["subscription"]
+    only = ["subscription"]
+
+    def queryset(self, model):
+        return (
+            model.objects.filter(vendor="fastspring")
+            .exclude(subscription=None)
+            .exclude(subscription__startswith="fs-")
+        )
+
+    def transform(self, obj):
+        obj.subscription = f"fs-{obj.subscription}"
+        return True
+
+
+@register
+class UnprefixFastSpringSubscriptionId(Backfill):
+    """
+    Reverts migration 0010
+    """
+
+    name = "unprefix-fastspring-subscription-id"
+    fields = ["subscription"]
+    only = ["subscription"]
+
+    def queryset(self, model):
+        return model.objects.filter(vendor="fastspring", subscription__startswith="fs-")
+
+    def transform(self, obj):
+        obj.subscription = obj.subscription.removeprefix("fs-")
+        return True
+
+
+@register
+class GitOpsPrefixNormalized(Backfill):
+    """
+    Recalculates values after ``prefix.canonical()`` has been changed,
+    migrations 0022 and 0023 contain their own copies
+    """
+
+    name = "gitops-prefix-normalized"
+    fields = ["gitops_prefix_normalized"]
+    only = ["gitops_prefix", "gitops_prefix_normalized"]
+
+    def queryset(self, model):
+        return model.objects.exclude(gitops_prefix=None)
+
+    def transform(self, obj):
+        normalized = prefix.canonical(obj.gitops_prefix)
+        if normalized == obj.gitops_prefix_normalized:
+            return False
+
+        obj.gitops_prefix_normalized = normalized
+        return True
@@ -0,0 +1,173 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Circuit breakers for the Quay.io and Gemfury APIs. State is kept in the
+Django cache so that all worker processes stop calling an upstream which is
+down instead of each one spending its entire retry budget.
+
+After ``failure_threshold`` consecutive failures the circuit opens and
+requests fail immediately with ``CircuitOpen``. Every successful request
+resets the count. Once ``reset_timeout`` passes the circuit becomes half-open
+and a single probe request is allowed. If it succeeds the circuit closes,
+otherwise it opens again!
+
+Requests sent under a circuit breaker have a connect/read timeout and at most
+``retries`` retries so that a failure is recorded within seconds, not after
+minutes of backoff.
+"""
+
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from tcms_github_marketplace import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpen(RequestException):
+    """
+    Raised instead of sending a request while the circuit is open
+    """
+
+    def __init__(self, breaker):
+        super().__init__(f"Circuit for {breaker.name} is open")
+        self.breaker = breaker
+
+
+class CircuitBreaker:
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, name, failure_threshold=5, reset_timeout=60, timeout=(5, 30), retries=1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # (connect, read) in seconds, used when the caller doesn't specify one
+        self.timeout = timeout
+        self.retries = retries
+
+    def _key(self, suffix):
+        return f"circuit-breaker-{self.name}-{suffix}"
+
+    @property
+    def state(self):
+        if cache.get(self._key("open")):
+            return OPEN
+
+        if cache.get(self._key("tripped")):
+            return HALF_OPEN
+
+        return CLOSED
+
+    def before_request(self):
+        state = self.state
+        if state == CLOSED:
+            return
+
+        # only 1 probe request at a time while half-open
+        if state == HALF_OPEN and cache.add(
+            self._key("probe"), True, timeout=self.reset_timeout
+        ):
+            return
+
+        metrics.increment(metrics.CIRCUIT_REJECTED_TOTAL, circuit=self.name)
+        raise CircuitOpen(self)
+
+    def record_success(self):
+        cache.delete_many(
+            [self._key("tripped"), self._key("probe"), self._key("failures")]
+        )
+
+    def _count_failure(self):
+        key = self._key("failures")
+        cache.add(key, 0, timeout=None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # reset by a concurrent success after add() above
+            cache.set(key, 1, timeout=None)
+            return 1
+
+    def record_failure(self):
+        failures = self._count_failure()
+
+        if failures >= self.failure_threshold or cache.get(self._key("tripped")):
+            self.trip()
+
+    def trip(self):
+        cache.set(self._key("open"), True, timeout=self.reset_timeout)
+        # the circuit becomes half-open once the key above expires
+        cache.set(self._key("tripped"), True, timeout=None)
+        cache.delete(self._key("probe"))
+        metrics.increment(metrics.CIRCUIT_OPENED_TOTAL, circuit=self.name)
+
+    def reset(self):
+        cache.delete_many(
+            [
+                self._key("open"),
+                self._key("tripped"),
+                self._key("probe"),
+                self._key("failures"),
+            ]
+        )
+
+
+class CircuitBreakerAdapter(HTTPAdapter):
+    """
+    Guards all requests sent through a ``requests.Session``. Retries configured
+    via ``max_retries`` happen before a failure is recorded, responses with
+    status 5xx and connection errors are failures!
+    """
+
+    def __init__(self, breaker, *args, **kwargs):
+        self.breaker = breaker
+        super().__init__(*args, **kwargs)
+
+    def send(  # pylint: disable=arguments-differ
+        self, request, *args, timeout=None, **kwargs
+    ):
+        self.breaker.before_request()
+
+        if timeout is None:
+            timeout = self.breaker.timeout
+
+        try:
+            response = super().send(request, *args, timeout=timeout, **kwargs)
+        except RequestException:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        return response
+
+    @classmethod
+    def mount(cls, session, breaker):
+        """
+        Replaces the default adapters of ``session`` keeping their retry settings
+        except for the number of retries and the backoff which are reduced
+        """
+        retry = session.get_adapter("https://").max_retries
+        adapter = cls(
+            breaker,
+            max_retries=retry.new(
+                total=breaker.retries,
+                connect=breaker.retries,
+                read=breaker.retries,
+                backoff_factor=min(retry.backoff_factor, 0.5),
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+
+QUAY = CircuitBreaker("quay")
+GEMFURY = CircuitBreaker("gemfury")
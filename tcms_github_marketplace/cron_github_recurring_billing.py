@@ -1,4 +1,4 @@
-# Copyright (c) 2024 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2024-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
@@ -19,6 +19,7 @@ from django.utils import timezone
 
 from django_tenants.utils import get_public_schema_name, schema_context
 from tcms_github_marketplace.models import Purchase
+from tcms_github_marketplace.routers import use_replica
 from tcms_github_marketplace.views import GithubCronProcessor
 
 
@@ -51,12 +52,18 @@ def check_github_for_subscription_renewals(
     with schema_context(get_public_schema_name()):
         # Find purchases made in the last 45-29 days to be inspected.
         # Loop over most-recent records first, skipping over non unique account IDs!
-        for purchase in Purchase.objects.filter(
-            Q(received_on__range=monthly_range) | Q(received_on__range=yearly_range),
-            action="purchased",
-            vendor__startswith="github",
-            payload__marketplace_purchase__plan__monthly_price_in_cents__gt=0,
-        ).order_by("-received_on"):
+        with use_replica():
+            candidates = list(
+                Purchase.objects.filter(
+                    Q(received_on__range=monthly_range)
+                    | Q(received_on__range=yearly_range),
+                    action="purchased",
+                    vendor__startswith="github",
+                    payload__marketplace_purchase__plan__monthly_price_in_cents__gt=0,
+                ).order_by("-received_on")
+            )
+
+        for purchase in candidates:
             # this is the subscriber account
             account_id = purchase.payload["marketplace_purchase"]["account"]["id"]
 
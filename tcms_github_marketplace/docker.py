@@ -4,11 +4,18 @@
 # https://www.gnu.org/licenses/agpl-3.0.html
 
 from django.conf import settings
+
+from tcms_github_marketplace import circuit, metrics
 from .quay import QuayApiClient
 
 
 class QuayIOAccount:
     organization = "kiwitcms"
+    endpoints = (
+        (r"/organization/[^/]+/robots/[^/]+/regenerate", "robot_regenerate"),
+        (r"/organization/[^/]+/robots/[^/]+", "robot"),
+        (r"/repository/[^/]+/[^/]+/permissions/user/[^/]+", "permissions"),
+    )
 
     def __init__(self, subscription_id):
         self._api = None
@@ -29,7 +36,14 @@ class QuayIOAccount:
         Initialize API client only when needed
         """
         if not self._api:
-            self._api = QuayApiClient(token=settings.QUAY_IO_TOKEN)
+            self._api = QuayApiClient(
+                token=settings.QUAY_IO_TOKEN,
+                host=getattr(settings, "QUAY_IO_HOST", None),
+            )
+            circuit.CircuitBreakerAdapter.mount(self._api.session.session, circuit.QUAY)
+            self._api.session.session.hooks["response"].append(
+                metrics.response_hook("quay", self.endpoints)
+            )
 
         return self._api
 
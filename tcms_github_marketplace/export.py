@@ -0,0 +1,170 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Streaming export of Purchase records for accounting purposes.
+Rows are read with a server-side cursor so memory usage stays
+constant regardless of the size of the table!
+"""
+
+import csv
+import itertools
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from tcms_github_marketplace import fastspring
+from tcms_github_marketplace.github import find_sku as github_find_sku
+from tcms_github_marketplace.models import ArchivedPayload, Purchase
+
+CHUNK_SIZE = 2000
+
+COLUMNS = (
+    "id",
+    "vendor",
+    "action",
+    "sender",
+    "subscription",
+    "effective_date",
+    "received_on",
+    "should_have_tenant",
+    "should_have_support",
+    "gitops_prefix",
+    "unit_count",
+    "monthly_price",
+    "sku",
+    "next_billing_date",
+)
+
+
+class Echo:  # pylint: disable=too-few-public-methods
+    """
+    Implements just the write method of the file-like interface
+    so that csv.writer() returns each row instead of buffering it.
+    """
+
+    def write(self, value):  # pylint: disable=no-self-use
+        return value
+
+
+def find_sku(purchase):
+    """
+    SKU is stored in a vendor specific place.
+    Returns an empty string if it can't be found!
+    """
+    try:
+        if purchase.vendor in ("github", "github_cron"):
+            return github_find_sku(purchase)
+
+        if purchase.vendor == "fastspring":
+            return fastspring.find_sku(purchase)
+
+        if purchase.vendor == "manual_purchase":
+            return purchase.payload["data"]["sku"]
+    except (KeyError, TypeError):
+        pass
+
+    return ""
+
+
+def next_billing_date(purchase):
+    try:
+        return purchase.next_billing_date
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def filter_purchases(
+    queryset=None, vendor=None, action=None, since=None, until=None
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Filters by vendor, action and a half-open ``[since, until)`` interval
+    over ``Purchase.received_on``.
+    """
+    if queryset is None:
+        queryset = Purchase.objects.all()
+
+    if vendor:
+        queryset = queryset.filter(vendor=vendor)
+
+    if action:
+        queryset = queryset.filter(action=action)
+
+    for lookup, value in (("received_on__gte", since), ("received_on__lt", until)):
+        if value is not None:
+            if settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            queryset = queryset.filter(**{lookup: value})
+
+    return queryset
+
+
+def iterate(queryset):
+    """
+    Yields a dictionary with all exported columns for each Purchase
+    """
+    queryset = (
+        queryset.defer(None)
+        .with_price_and_quantity()
+        .order_by("pk")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    for batch in itertools.batched(queryset, CHUNK_SIZE):
+        # SKU and billing date are read from the full payload
+        ArchivedPayload.rehydrate(batch)
+        yield from (as_row(purchase) for purchase in batch)
+
+
+def as_row(purchase):
+    billing_date = next_billing_date(purchase)
+
+    return {
+        "id": purchase.pk,
+        "vendor": purchase.vendor,
+        "action": purchase.action,
+        "sender": purchase.sender,
+        "subscription": purchase.subscription,
+        "effective_date": purchase.effective_date.isoformat(),
+        "received_on": purchase.received_on.isoformat(),
+        "should_have_tenant": purchase.should_have_tenant,
+        "should_have_support": purchase.should_have_support,
+        "gitops_prefix": purchase.gitops_prefix,
+        "unit_count": purchase.quantity,
+        "monthly_price": int(purchase.monthly_price_in_cents / 100),
+        "sku": find_sku(purchase),
+        "next_billing_date": billing_date.isoformat() if billing_date else None,
+    }
+
+
+def as_csv(queryset):
+    writer = csv.DictWriter(Echo(), fieldnames=COLUMNS)
+
+    yield writer.writerow(dict(zip(COLUMNS, COLUMNS)))
+    for row in iterate(queryset):
+        yield writer.writerow(row)
+
+
+def as_ndjson(queryset):
+    for row in iterate(queryset):
+        yield json.dumps(row) + "\n"
+
+
+FORMATS = {
+    "csv": (as_csv, "text/csv"),
+    "ndjson": (as_ndjson, "application/x-ndjson"),
+}
+
+
+def streaming_response(queryset, export_format):
+    generator, content_type = FORMATS[export_format]
+
+    response = StreamingHttpResponse(generator(queryset), content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="purchases.{export_format}"'
+    )
+    return response
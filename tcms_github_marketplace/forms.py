@@ -1,4 +1,4 @@
-# Copyright (c) 2024 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2024-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
@@ -11,6 +11,7 @@ from django.conf import settings
 from tcms.utils.github import repo_id as github_repo_id
 from tcms_github_marketplace import fastspring
 from tcms_github_marketplace import models
+from tcms_github_marketplace.prefix import canonical
 
 
 def get_github_user(prefix):
@@ -83,11 +84,10 @@ class UpdateGitopsPrefixForm(forms.ModelForm):
         fields = ("gitops_prefix",)
 
     def clean_gitops_prefix(self):
-        prefix = self.cleaned_data.get("gitops_prefix")
+        prefix = canonical(self.cleaned_data.get("gitops_prefix"))
         if not prefix:
             raise forms.ValidationError("Value cannot be empty")
 
-        prefix = prefix.lower()
         if not prefix.startswith("http"):
             raise forms.ValidationError("Value is not a URL")
 
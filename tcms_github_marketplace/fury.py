@@ -4,9 +4,12 @@
 # https://www.gnu.org/licenses/agpl-3.0.html
 
 import requests
+from django.conf import settings
 from requests.auth import AuthBase
 from httplink import parse_link_header
 
+from tcms_github_marketplace import circuit, metrics
+
 
 class TokenAuth(AuthBase):
     def __init__(self, token):
@@ -25,12 +28,22 @@ class TokenAuth(AuthBase):
 
 class GemfuryAPI:
     base_url = "https://api.fury.io/1"
+    endpoints = (
+        (r"/tokens", "tokens"),
+        (r"/tokens/[^/]+", "token"),
+    )
 
     def __init__(self, password=None):
         """
         WARNING: we must be using the Full Access Token on the organization account!
         """
         self.auth = TokenAuth(password)
+        self.base_url = getattr(settings, "GEMFURY_API_URL", self.base_url)
+        self.session = requests.Session()
+        self.session.hooks["response"].append(
+            metrics.response_hook("gemfury", self.endpoints)
+        )
+        circuit.CircuitBreakerAdapter.mount(self.session, circuit.GEMFURY)
 
     def find_token(self, subscription_id):
         json_data, link = self._request("GET", "/tokens?kind_key=pull")
@@ -82,7 +95,7 @@ class GemfuryAPI:
         """
         https://gemfury.com/guide/api/errors/
         """
-        response = requests.request(
+        response = self.session.request(
             method,
             f"{self.base_url}{path}",
             auth=self.auth,
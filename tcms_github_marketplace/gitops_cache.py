@@ -0,0 +1,231 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Two-tier cache for ``GitOps.allow`` results. A small in-process LRU with a
+short TTL sits in front of the shared Django cache so that the hottest
+repositories are answered without a network round-trip. Cached values are
+``paid_until`` or False if there isn't a paid subscription.
+
+When a ``gitops_prefix`` changes ``invalidate()`` bumps a generation number
+which is part of all shared cache keys and sends a Postgres ``NOTIFY`` on the
+``gitops_allow`` channel. With ``MARKETPLACE_GITOPS_LISTEN = True`` every
+process starts a background thread which ``LISTEN``s on that channel and
+clears its local cache. Otherwise local entries expire after
+``MARKETPLACE_GITOPS_LOCAL_CACHE_TTL`` seconds!
+
+Additionally ``warm_gitops_cache`` stores the most recent paid purchase for
+every prefix, see ``set_prefixes()``. These entries don't expire and are
+updated individually when a purchase is recorded.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+
+from tcms_github_marketplace import prefix
+
+CHANNEL = "gitops_allow"
+GENERATION_KEY = "gitops-allow-generation"
+WARM_KEY = "gitops-prefix-warm"
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    Thread-safe LRU cache where entries expire after ``ttl`` seconds
+    """
+
+    def __init__(self, max_size=1024, ttl=10):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+
+            value, expires_at = self._data[key]
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+LOCAL = LocalCache(
+    getattr(settings, "MARKETPLACE_GITOPS_LOCAL_CACHE_SIZE", 1024),
+    getattr(settings, "MARKETPLACE_GITOPS_LOCAL_CACHE_TTL", 10),
+)
+
+
+def cache_key(repo_url):
+    """
+    Equivalent repository URLs share the same cache entry
+    """
+    return f"gitops-allow-{prefix.canonical(repo_url)}"
+
+
+def generation():
+    value = LOCAL.get(GENERATION_KEY)
+    if value is None:
+        value = cache.get(GENERATION_KEY, 0)
+        LOCAL.set(GENERATION_KEY, value)
+    return value
+
+
+def get(repo_url):
+    start_listener()
+
+    key = cache_key(repo_url)
+    result = LOCAL.get(key)
+    if result is not None:
+        return result
+
+    result = cache.get(f"{key}-{generation()}")
+    if result is not None:
+        LOCAL.set(key, result)
+    return result
+
+
+def set(repo_url, result):  # pylint: disable=redefined-builtin
+    key = cache_key(repo_url)
+    cache.set(f"{key}-{generation()}", result)
+    LOCAL.set(key, result)
+
+
+def prefix_key(value):
+    """
+    Not part of the generation b/c entries are updated one by one after
+    each change, see ``api.gitops_prefix_changed()``
+    """
+    return f"gitops-prefix-{prefix.canonical(value)}"
+
+
+def is_warm():
+    return cache.get(WARM_KEY) is not None
+
+
+def paid_until(repo_url):
+    """
+    Returns ``paid_until`` of the most recent purchase cached via
+    ``set_prefixes()`` for any of the prefixes matching ``repo_url``
+    or None if none of them is cached or the cache hasn't been warmed up
+    """
+    if not is_warm():
+        return None
+
+    keys = [prefix_key(candidate) for candidate in prefix.candidates(repo_url)]
+    found = cache.get_many(keys)
+    if not found:
+        return None
+
+    return max(found.values(), key=lambda entry: entry["received_on"])["paid_until"]
+
+
+def set_prefixes(entries, warm=False):
+    """
+    ``entries`` maps prefixes to dictionaries with the ``received_on`` and
+    ``paid_until`` values of their most recent purchase. Stored without
+    expiration b/c a missing entry for one prefix could make a more general
+    prefix with an older purchase match instead. ``warm=True`` marks the
+    entire set as complete!
+    """
+    cache.set_many(
+        {prefix_key(key): value for key, value in entries.items()}, timeout=None
+    )
+    if warm:
+        cache.set(WARM_KEY, True, timeout=None)
+
+
+def invalidate():
+    """
+    Makes all cached results stale on every node
+    """
+    cache.add(GENERATION_KEY, 0, timeout=None)
+    value = cache.incr(GENERATION_KEY)
+
+    LOCAL.clear()
+    LOCAL.set(GENERATION_KEY, value)
+
+    # delivered to listeners after the current transaction commits
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, str(value)])
+
+
+def on_notify(payload):
+    LOCAL.clear()
+    if payload.isdigit():
+        LOCAL.set(GENERATION_KEY, int(payload))
+
+
+def listen(alias="default"):
+    """
+    Blocks forever, reconnecting after errors. Executed in a daemon thread
+    """
+    while True:
+        db = connections.create_connection(alias)
+        try:
+            db.set_autocommit(True)
+            with db.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+
+            # notifications sent while not connected are lost
+            LOCAL.clear()
+            for notify in db.connection.notifies():
+                on_notify(notify.payload)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Listening for %s notifications failed", CHANNEL)
+        finally:
+            db.close()
+
+        time.sleep(5)
+
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def start_listener():
+    """
+    Started lazily so that each worker process gets its own thread,
+    including processes forked after Django was initialized
+    """
+    global _listener_pid  # pylint: disable=global-statement
+
+    if not getattr(settings, "MARKETPLACE_GITOPS_LISTEN", False):
+        return
+
+    if _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            threading.Thread(target=listen, name="gitops-listen", daemon=True).start()
+            _listener_pid = os.getpid()
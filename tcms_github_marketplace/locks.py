@@ -0,0 +1,80 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Postgres advisory locks used to serialize webhook processing for the same
+subscription across all worker processes and hosts.
+
+These are session level locks, held outside of transactions b/c processing
+calls external APIs. They don't work through a connection pooler in
+transaction pooling mode, e.g. PgBouncer with ``pool_mode = transaction``!
+"""
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeout(Exception):
+    """
+    Raised when a lock can't be acquired within the configured timeout
+    """
+
+
+def lock_key(name):
+    """
+    Advisory locks are identified by a signed 64 bit integer
+    """
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class AdvisoryLock:
+    def __init__(self, name, timeout=None, using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.key = lock_key(name)
+        if timeout is None:
+            timeout = getattr(settings, "MARKETPLACE_SUBSCRIPTION_LOCK_TIMEOUT", 30)
+        self.timeout = timeout
+        self.using = using
+
+    def _execute(self, function):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"SELECT {function}(%s)", [self.key])
+            return cursor.fetchone()[0]
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        delay = 0.01
+        while not self._execute("pg_try_advisory_lock"):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Timed out waiting for lock {self.name}")
+
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def release(self):
+        try:
+            released = self._execute("pg_advisory_unlock")
+        except DatabaseError:
+            # the session is gone and Postgres released its locks together
+            # with it. Don't hide the exception which broke the connection
+            logger.warning("Releasing lock %s failed", self.name, exc_info=True)
+            return
+
+        if not released:
+            logger.warning("Lock %s was not held by this session", self.name)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
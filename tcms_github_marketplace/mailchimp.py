@@ -1,30 +1,157 @@
-# Copyright (c) 2022 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2022-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
 
 # pylint: disable=missing-permission-required
 
+from datetime import timedelta
+
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from mailchimp3 import MailChimp
+from mailchimp3.helpers import check_email
+
+from tcms_github_marketplace.models import NewsletterSubscription
+
+# list "Kiwi TCMS newsletter"
+LIST_ID = "c970a37581"
+
+# maximum allowed by MailChimp
+BATCH_SIZE = 500
+
+# afterwards the address is marked as failed
+MAX_ATTEMPTS = 5
+
+# how long a batch is reserved for the worker which is sending it
+LEASE = timedelta(minutes=15)
 
 
 def subscribe(email_address):
-    try:
-        client = MailChimp(
-            mc_api=settings.MAILCHIMP_SECRET, mc_user=settings.MAILCHIMP_USERNAME
+    """
+    Queues ``email_address`` for the newsletter, see ``flush()``.
+    Addresses which are already known are ignored!
+    """
+    NewsletterSubscription.objects.bulk_create(
+        [NewsletterSubscription(email=email_address.strip().lower())],
+        ignore_conflicts=True,
+    )
+
+
+def client():
+    mailchimp = MailChimp(
+        mc_api=settings.MAILCHIMP_SECRET, mc_user=settings.MAILCHIMP_USERNAME
+    )
+    if getattr(settings, "MAILCHIMP_API_URL", None):
+        mailchimp.base_url = settings.MAILCHIMP_API_URL
+    return mailchimp
+
+
+def _record_failure(subscription, error):
+    subscription.attempts += 1
+    subscription.last_error = error
+    if subscription.attempts >= MAX_ATTEMPTS:
+        subscription.status = "failed"
+
+
+def _save(batch):
+    # bulk_update() doesn't update auto_now fields
+    now = timezone.now()
+    for subscription in batch:
+        subscription.updated_at = now
+        subscription.leased_until = None
+
+    NewsletterSubscription.objects.bulk_update(
+        batch, ["status", "attempts", "last_error", "leased_until", "updated_at"]
+    )
+
+
+def _claim_batch(batch_size, last_pk):
+    """
+    Locks the next batch only for as long as it takes to lease it. Other
+    workers skip it while it is being sent and pick it up again if this
+    worker dies!
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            NewsletterSubscription.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", pk__gt=last_pk)
+            .filter(Q(leased_until=None) | Q(leased_until__lte=now))
+            .order_by("pk")[:batch_size]
         )
+        NewsletterSubscription.objects.filter(
+            pk__in=[subscription.pk for subscription in batch]
+        ).update(leased_until=now + LEASE)
+
+    return batch
+
 
-        # add user to list "Kiwi TCMS newsletter"
+def _flush_batch(mailchimp, batch):
+    members = []
+    for subscription in batch:
+        try:
+            check_email(subscription.email)
+            members.append(subscription)
+        except ValueError as err:
+            subscription.status = "failed"
+            subscription.last_error = str(err)
+
+    if members:
         # status is 'pending', users must opt-in themselves!
-        client.lists.members.create(
-            "c970a37581",
+        response = mailchimp.lists.update_members(
+            LIST_ID,
             {
-                "email_address": email_address,
-                "status": "pending",
+                "members": [
+                    {"email_address": subscription.email, "status": "pending"}
+                    for subscription in members
+                ],
+                "update_existing": False,
             },
         )
-    except:  # noqa:E722, pylint: disable=bare-except
-        # this avoids 500 errors due to invalid email address
-        # or any other exception really
-        pass
+        errors = {
+            error["email_address"].lower(): error
+            for error in response.get("errors", [])
+        }
+
+        for subscription in members:
+            error = errors.get(subscription.email)
+            if error is None or error.get("error_code") == "ERROR_CONTACT_EXISTS":
+                subscription.status = "subscribed"
+                subscription.last_error = ""
+            else:
+                _record_failure(subscription, error.get("error", ""))
+
+    _save(batch)
+
+
+def flush(batch_size=BATCH_SIZE):
+    """
+    Sends all queued addresses to MailChimp using the batch subscribe endpoint,
+    ``batch_size`` addresses per request. Addresses which are already members
+    of the list are considered subscribed. Returns the number of processed
+    addresses!
+
+    MailChimp is called outside of transactions, each batch is leased for
+    ``LEASE`` instead of keeping its rows locked.
+    """
+    mailchimp = client()
+    processed = 0
+    last_pk = 0
+
+    while True:
+        batch = _claim_batch(batch_size, last_pk)
+        if not batch:
+            return processed
+
+        try:
+            _flush_batch(mailchimp, batch)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            for subscription in batch:
+                _record_failure(subscription, str(err))
+            _save(batch)
+
+        processed += len(batch)
+        last_pk = batch[-1].pk
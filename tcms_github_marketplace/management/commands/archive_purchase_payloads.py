@@ -0,0 +1,74 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import archive, utils
+from tcms_github_marketplace.models import ArchivedPayload, Purchase
+
+
+class Command(BaseCommand):
+    help = "Move old Purchase payloads into compressed ArchivedPayload records"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=utils.ACTIVE_PURCHASE_DAYS,
+            help="Archive records received more than this many days ago. "
+            f"Default: {utils.ACTIVE_PURCHASE_DAYS}, older purchases can't be active",
+        )
+        parser.add_argument(
+            "--compression",
+            choices=sorted(archive.COMPRESSION),
+            default="gzip",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        compression = options["compression"]
+        last_pk = 0
+        count = 0
+
+        with schema_context(get_public_schema_name()):
+            while True:
+                batch = list(
+                    Purchase.objects.filter(received_on__lt=cutoff, pk__gt=last_pk)
+                    .exclude(payload__has_key=archive.ARCHIVED_KEY)
+                    .order_by("pk")[: options["batch_size"]]
+                )
+                if not batch:
+                    break
+
+                with transaction.atomic():
+                    ArchivedPayload.objects.bulk_create(
+                        [
+                            ArchivedPayload(
+                                purchase_id=purchase.pk,
+                                compression=compression,
+                                data=archive.compress(purchase.payload, compression),
+                            )
+                            for purchase in batch
+                        ],
+                        update_conflicts=True,
+                        unique_fields=["purchase_id"],
+                        update_fields=["compression", "data", "archived_at"],
+                    )
+                    for purchase in batch:
+                        # received_on selects the partition
+                        Purchase.objects.filter(
+                            pk=purchase.pk, received_on=purchase.received_on
+                        ).update(payload=archive.compact(purchase.payload))
+
+                count += len(batch)
+                last_pk = batch[-1].pk
+
+        self.stdout.write(f"Archived {count} payloads")
@@ -0,0 +1,34 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import partitioning
+
+
+class Command(BaseCommand):
+    help = "Create yearly partitions of the Purchase table ahead of time"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--years-ahead",
+            type=int,
+            default=1,
+            help="Number of future years to create partitions for, default 1",
+        )
+
+    def handle(self, *args, **options):
+        this_year = timezone.now().year
+
+        with schema_context(get_public_schema_name()):
+            for year in range(this_year, this_year + options["years_ahead"] + 1):
+                with transaction.atomic(), connection.cursor() as cursor:
+                    if partitioning.create_partition(cursor, year):
+                        self.stdout.write(
+                            f"Created {partitioning.partition_name(year)}"
+                        )
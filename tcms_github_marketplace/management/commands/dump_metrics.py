@@ -0,0 +1,33 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+
+from tcms_github_marketplace import metrics
+
+
+class Command(BaseCommand):
+    help = "Print all metrics in the Prometheus text format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prefix",
+            default="",
+            help="Only print metrics whose name starts with this prefix, "
+            "e.g. marketplace_outbound_",
+        )
+
+    def handle(self, *args, **options):
+        backend = metrics.backend()
+        if isinstance(backend, metrics.NoopBackend):
+            self.stderr.write(
+                "Metrics are disabled, configure MARKETPLACE_METRICS_BACKEND!"
+            )
+            return
+
+        for line in backend.render().splitlines():
+            name = line.removeprefix("# TYPE ")
+            if name.startswith(options["prefix"]):
+                self.stdout.write(line)
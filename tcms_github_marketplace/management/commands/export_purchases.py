@@ -0,0 +1,44 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import export
+
+
+class Command(BaseCommand):
+    help = "Export Purchase records as CSV or NDJSON, e.g. for accounting"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(export.FORMATS), default="csv")
+        parser.add_argument("--vendor", help="e.g. fastspring")
+        parser.add_argument("--action", help="e.g. purchased")
+        parser.add_argument(
+            "--since",
+            type=datetime.fromisoformat,
+            help="Include records received on or after this date, e.g. 2026-01-01",
+        )
+        parser.add_argument(
+            "--until",
+            type=datetime.fromisoformat,
+            help="Include records received before this date, e.g. 2026-02-01",
+        )
+
+    def handle(self, *args, **options):
+        generator, _content_type = export.FORMATS[options["format"]]
+
+        with schema_context(get_public_schema_name()):
+            queryset = export.filter_purchases(
+                vendor=options["vendor"],
+                action=options["action"],
+                since=options["since"],
+                until=options["until"],
+            )
+
+            for chunk in generator(queryset):
+                self.stdout.write(chunk, ending="")
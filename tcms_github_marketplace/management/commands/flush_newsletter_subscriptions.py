@@ -0,0 +1,27 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import mailchimp
+
+
+class Command(BaseCommand):
+    help = "Subscribe queued addresses to the MailChimp newsletter"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=mailchimp.BATCH_SIZE,
+            help=f"Addresses per request. Default: {mailchimp.BATCH_SIZE}",
+        )
+
+    def handle(self, *args, **options):
+        with schema_context(get_public_schema_name()):
+            processed = mailchimp.flush(options["batch_size"])
+
+        self.stdout.write(f"Processed {processed} addresses")
@@ -0,0 +1,55 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import reports
+
+
+class Command(BaseCommand):
+    help = "Monthly MRR/ARR, new, renewed & cancelled subscriptions and seat counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            required=True,
+            help="First month of the report, e.g. 2026-01-01",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Last month of the report. Defaults to the current month",
+        )
+
+    def handle(self, *args, **options):
+        columns = (
+            "month",
+            "vendor",
+            "mrr",
+            "arr",
+            "new",
+            "renewed",
+            "cancelled",
+            "seats",
+        )
+        self.stdout.write("\t".join(columns))
+
+        with schema_context(get_public_schema_name()):
+            for rollup in reports.report(options["since"], options["until"]):
+                row = (
+                    rollup.month.strftime("%Y-%m"),
+                    rollup.vendor,
+                    rollup.mrr_in_cents // 100,
+                    rollup.arr_in_cents // 100,
+                    rollup.new_subscriptions,
+                    rollup.renewed_subscriptions,
+                    rollup.cancelled_subscriptions,
+                    rollup.unit_count,
+                )
+                self.stdout.write("\t".join(str(value) for value in row))
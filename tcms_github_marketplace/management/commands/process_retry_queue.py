@@ -0,0 +1,29 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import utils
+
+
+class Command(BaseCommand):
+    help = "Retry Quay.io and Gemfury operations deferred during webhook processing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Maximum number of tasks to process. Default: 100",
+        )
+
+    def handle(self, *args, **options):
+        with schema_context(get_public_schema_name()):
+            processed, failed = utils.process_retry_queue(options["limit"])
+            pruned = utils.prune_webhook_deliveries()
+
+        self.stdout.write(f"Processed {processed} tasks, {failed} failed")
+        self.stdout.write(f"Pruned {pruned} webhook deliveries")
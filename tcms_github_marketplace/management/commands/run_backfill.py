@@ -0,0 +1,37 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import backfill
+
+
+class Command(BaseCommand):
+    help = "Run a data backfill in batches, resuming from the last finished batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(backfill.BACKFILLS.keys()))
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=backfill.BATCH_SIZE,
+            help=f"Number of rows per transaction. Default: {backfill.BATCH_SIZE}",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Start from the beginning instead of resuming",
+        )
+
+    def handle(self, *args, **options):
+        with schema_context(get_public_schema_name()):
+            processed, updated = backfill.run(
+                options["name"],
+                batch_size=options["batch_size"],
+                restart=options["restart"],
+            )
+
+        self.stdout.write(f"Processed {processed} rows, updated {updated}")
@@ -0,0 +1,27 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued email messages, e.g. exit polls and fulfillment notices"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=outbox.BATCH_SIZE,
+            help=f"Messages sent per SMTP connection. Default: {outbox.BATCH_SIZE}",
+        )
+
+    def handle(self, *args, **options):
+        with schema_context(get_public_schema_name()):
+            sent, failed = outbox.send_queued(options["batch_size"])
+
+        self.stdout.write(f"Sent {sent} messages, {failed} failed")
@@ -0,0 +1,31 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import locks, spare_schemas
+
+
+class Command(BaseCommand):
+    help = "Create and migrate spare tenant schemas claimed by CreateTenant"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=None,
+            help="Number of spare schemas. Default: MARKETPLACE_SPARE_SCHEMAS",
+        )
+
+    def handle(self, *args, **options):
+        with schema_context(get_public_schema_name()):
+            try:
+                migrated, created = spare_schemas.top_up(options["size"])
+            except locks.LockTimeout:
+                self.stdout.write("Another top up is in progress")
+                return
+
+        self.stdout.write(f"Migrated {migrated}, created {created} spare schemas")
@@ -0,0 +1,27 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from tcms_github_marketplace import api
+
+
+class Command(BaseCommand):
+    help = "Cache GitOps.allow information for all paid gitops prefixes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of prefixes sent to the cache at once. Default: 500",
+        )
+
+    def handle(self, *args, **options):
+        with schema_context(get_public_schema_name()):
+            count = api.warm_cache(options["chunk_size"])
+
+        self.stdout.write(f"Cached {count} prefixes")
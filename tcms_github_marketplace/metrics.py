@@ -0,0 +1,253 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Pluggable metrics. The backend is configured via::
+
+    MARKETPLACE_METRICS_BACKEND = "tcms_github_marketplace.metrics.PrometheusBackend"
+
+and defaults to ``NoopBackend``. ``PrometheusBackend`` keeps its values in the
+Django cache configured via ``MARKETPLACE_METRICS_CACHE`` (default "default")
+so that all worker processes report into the same place. Values are exposed
+in the Prometheus text format, see ``views.Metrics``.
+"""
+
+import hashlib
+import math
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "tcms_github_marketplace.metrics.NoopBackend"
+
+WEBHOOK_REQUESTS_TOTAL = "marketplace_webhook_requests_total"
+WEBHOOK_EVENTS_TOTAL = "marketplace_webhook_events_total"
+WEBHOOK_STAGE_SECONDS = "marketplace_webhook_stage_seconds"
+
+OUTBOUND_REQUESTS_TOTAL = "marketplace_outbound_requests_total"
+OUTBOUND_RETRIES_TOTAL = "marketplace_outbound_retries_total"
+OUTBOUND_BYTES_TOTAL = "marketplace_outbound_bytes_total"
+OUTBOUND_REQUEST_SECONDS = "marketplace_outbound_request_seconds"
+
+CIRCUIT_OPENED_TOTAL = "marketplace_circuit_opened_total"
+CIRCUIT_REJECTED_TOTAL = "marketplace_circuit_rejected_total"
+RETRY_QUEUE_DEFERRED_TOTAL = "marketplace_retry_queue_deferred_total"
+
+# upper bounds in seconds, +Inf is implicit
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class NoopBackend:
+    def increment(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+    def render(self):  # pylint: disable=no-self-use
+        return ""
+
+
+class PrometheusBackend:
+    """
+    Counters and histograms stored in the Django cache. Each histogram
+    observation updates only 2 keys: its own bucket and the sum, cumulative
+    buckets and the count are calculated when rendering!
+
+    WARNING: the list of known series is updated without locking and
+    concurrent creation of brand new series may lose one of them. It will
+    be registered again after the cache is cleared!
+    """
+
+    index_key = "marketplace-metrics-index"
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "MARKETPLACE_METRICS_CACHE", "default")]
+
+    @staticmethod
+    def _key(kind, name, labels):
+        series = f"{kind}:{name}:{sorted(labels.items())}"
+        digest = hashlib.md5(series.encode(), usedforsecurity=False).hexdigest()
+        return f"marketplace-metrics-{digest}"
+
+    def _incr(self, kind, name, labels, value):
+        key = self._key(kind, name, labels)
+        try:
+            self.cache.incr(key, value)
+            return
+        except ValueError:
+            # a new series
+            if not self.cache.add(key, value, timeout=None):
+                self.cache.incr(key, value)
+
+        index = self.cache.get(self.index_key, {})
+        if key not in index:
+            index[key] = (kind, name, labels)
+            self.cache.set(self.index_key, index, timeout=None)
+
+    def increment(self, name, value=1, **labels):
+        self._incr("counter", name, labels, value)
+
+    def observe(self, name, value, **labels):
+        bucket = next((le for le in BUCKETS if value <= le), math.inf)
+        self._incr("bucket", name, dict(labels, le=bucket), 1)
+        # in microseconds b/c cache.incr() works only with integers
+        self._incr("sum", name, labels, round(value * 1_000_000))
+
+    @staticmethod
+    def _format(name, labels):
+        if not labels:
+            return name
+
+        pairs = ",".join(
+            f'{label}="{_format_value(value)}"'
+            for label, value in sorted(labels.items())
+        )
+        return f"{name}{{{pairs}}}"
+
+    def render(self):
+        index = self.cache.get(self.index_key, {})
+        values = self.cache.get_many(list(index))
+
+        counters = {}
+        histograms = {}
+        for key, (kind, name, labels) in index.items():
+            value = values.get(key, 0)
+
+            if kind == "counter":
+                counters.setdefault(name, []).append((labels, value))
+                continue
+
+            labels = dict(labels)
+            bucket = labels.pop("le", None)
+            series = histograms.setdefault(name, {}).setdefault(
+                tuple(sorted(labels.items())), {"buckets": {}, "sum": 0}
+            )
+            if kind == "sum":
+                series["sum"] = value / 1_000_000
+            else:
+                series["buckets"][bucket] = value
+
+        lines = []
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series:
+                lines.append(f"{self._format(name, labels)} {value}")
+
+        for name, all_series in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, series in all_series.items():
+                labels = dict(labels)
+                count = 0
+                for bucket in BUCKETS + (math.inf,):
+                    count += series["buckets"].get(bucket, 0)
+                    lines.append(
+                        f"{self._format(f'{name}_bucket', dict(labels, le=bucket))} {count}"
+                    )
+                lines.append(f"{self._format(f'{name}_sum', labels)} {series['sum']}")
+                lines.append(f"{self._format(f'{name}_count', labels)} {count}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_BACKENDS = {}
+
+
+def backend():
+    path = getattr(settings, "MARKETPLACE_METRICS_BACKEND", DEFAULT_BACKEND)
+    if path not in _BACKENDS:
+        _BACKENDS[path] = import_string(path)()
+    return _BACKENDS[path]
+
+
+def increment(name, value=1, **labels):
+    backend().increment(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    backend().observe(name, value, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    """
+    Observes the duration of the enclosed block in seconds. Exceptions are
+    counted in ``<name without _seconds>_errors_total`` and propagated!
+    """
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+        if failed:
+            increment(f"{name.removesuffix('_seconds')}_errors_total", **labels)
+
+
+def normalize_endpoint(path, endpoints):
+    """
+    Returns the name of the first ``(regex, name)`` pair from ``endpoints``
+    matching the end of ``path``. Keeps label cardinality low b/c URLs
+    contain subscription IDs!
+    """
+    for pattern, name in endpoints:
+        if re.search(f"{pattern}$", path):
+            return name
+    return "other"
+
+
+def response_hook(service, endpoints):
+    """
+    A ``requests`` response hook which records latency, status codes, retries
+    and bytes transferred for outbound API calls. Latency includes retries
+    done by urllib3 and their backoff!
+
+    WARNING: requests which fail without a response, e.g. when retries are
+    exhausted, don't reach the hook!
+    """
+
+    def hook(response, *args, **kwargs):  # pylint: disable=unused-argument
+        labels = {
+            "service": service,
+            "method": response.request.method,
+            "endpoint": normalize_endpoint(
+                urlsplit(response.request.url).path, endpoints
+            ),
+        }
+
+        increment(OUTBOUND_REQUESTS_TOTAL, status=response.status_code, **labels)
+        observe(OUTBOUND_REQUEST_SECONDS, response.elapsed.total_seconds(), **labels)
+
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        if retries:
+            increment(OUTBOUND_RETRIES_TOTAL, len(retries), **labels)
+
+        increment(
+            OUTBOUND_BYTES_TOTAL,
+            len(response.request.body or b""),
+            direction="sent",
+            **labels,
+        )
+        increment(
+            OUTBOUND_BYTES_TOTAL,
+            len(response.content or b""),
+            direction="received",
+            **labels,
+        )
+
+    return hook
@@ -1,22 +1,34 @@
-# Copyright (c) 2024 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2024-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
 
 from django.db import migrations
 
+from tcms_github_marketplace.migrations import _backfill_v1
 
-def forwards(apps, schema_editor):  # pylint: disable=unused-argument
-    purchase_model = apps.get_model("tcms_github_marketplace", "Purchase")
-    for purchase in purchase_model.objects.filter(vendor="github", subscription=None):
+
+class GitHubSubscriptionId(_backfill_v1.Backfill):
+    name = "github-subscription-id"
+    fields = ["subscription"]
+    only = ["subscription", "payload"]
+
+    def queryset(self, model):
+        return model.objects.filter(vendor="github", subscription=None)
+
+    def transform(self, obj):
         try:
-            sender_id = purchase.payload["sender"]["id"]
-            account_id = purchase.payload["marketplace_purchase"]["account"]["id"]
+            sender_id = obj.payload["sender"]["id"]
+            account_id = obj.payload["marketplace_purchase"]["account"]["id"]
+        except (KeyError, TypeError):
+            return False
 
-            purchase.subscription = f"gh-{sender_id}-{account_id}"
-            purchase.save()
-        except:  # noqa, pylint: disable=bare-except
-            pass
+        obj.subscription = f"gh-{sender_id}-{account_id}"
+        return True
+
+
+def forwards(apps, schema_editor):  # pylint: disable=unused-argument
+    _backfill_v1.run(GitHubSubscriptionId(), apps, progress=False)
 
 
 def backwards(apps, schema_editor):  # pylint: disable=unused-argument
@@ -27,6 +39,9 @@ def backwards(apps, schema_editor):  # pylint: disable=unused-argument
 
 
 class Migration(migrations.Migration):
+    # commit after every batch
+    atomic = False
+
     dependencies = [
         ("tcms_github_marketplace", "0008_add_gitops_prefix"),
     ]
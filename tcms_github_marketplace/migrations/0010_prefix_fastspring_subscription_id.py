@@ -1,35 +1,55 @@
-# Copyright (c) 2024 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2024-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
 
 from django.db import migrations
 
+from tcms_github_marketplace.migrations import _backfill_v1
+
+
+class PrefixFastSpringSubscriptionId(_backfill_v1.Backfill):
+    name = "prefix-fastspring-subscription-id"
+    fields = ["subscription"]
+    only = ["subscription"]
+
+    def queryset(self, model):
+        return (
+            model.objects.filter(vendor="fastspring")
+            .exclude(subscription=None)
+            .exclude(subscription__startswith="fs-")
+        )
+
+    def transform(self, obj):
+        obj.subscription = f"fs-{obj.subscription}"
+        return True
+
+
+class UnprefixFastSpringSubscriptionId(_backfill_v1.Backfill):
+    name = "unprefix-fastspring-subscription-id"
+    fields = ["subscription"]
+    only = ["subscription"]
+
+    def queryset(self, model):
+        return model.objects.filter(vendor="fastspring", subscription__startswith="fs-")
+
+    def transform(self, obj):
+        obj.subscription = obj.subscription.removeprefix("fs-")
+        return True
+
 
 def forwards(apps, schema_editor):  # pylint: disable=unused-argument
-    purchase_model = apps.get_model("tcms_github_marketplace", "Purchase")
-    for purchase in purchase_model.objects.filter(vendor="fastspring").exclude(
-        subscription=None
-    ):
-        try:
-            if not purchase.subscription.startswith("fs-"):
-                purchase.subscription = f"fs-{purchase.subscription}"
-                purchase.save()
-        except:  # noqa, pylint: disable=bare-except
-            pass
+    _backfill_v1.run(PrefixFastSpringSubscriptionId(), apps, progress=False)
 
 
 def backwards(apps, schema_editor):  # pylint: disable=unused-argument
-    purchase_model = apps.get_model("tcms_github_marketplace", "Purchase")
-    for purchase in purchase_model.objects.filter(vendor="fastspring"):
-        try:
-            purchase.subscription = purchase.subscription.lstrip("fs-")
-            purchase.save()
-        except:  # noqa, pylint: disable=bare-except
-            pass
+    _backfill_v1.run(UnprefixFastSpringSubscriptionId(), apps, progress=False)
 
 
 class Migration(migrations.Migration):
+    # commit after every batch
+    atomic = False
+
     dependencies = [
         ("tcms_github_marketplace", "0009_github_subscription_id"),
     ]
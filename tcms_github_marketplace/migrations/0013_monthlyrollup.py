@@ -0,0 +1,48 @@
+# pylint: disable=avoid-auto-field
+#
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0012_privaterepotoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("vendor", models.CharField(db_index=True, max_length=16)),
+                ("month", models.DateField(db_index=True)),
+                ("mrr_in_cents", models.BigIntegerField(default=0)),
+                ("new_subscriptions", models.IntegerField(default=0)),
+                ("renewed_subscriptions", models.IntegerField(default=0)),
+                ("cancelled_subscriptions", models.IntegerField(default=0)),
+                ("unit_count", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("vendor", "month"),
+                        name="ghmp_monthlyrollup_vendor_month",
+                    )
+                ],
+            },
+        ),
+    ]
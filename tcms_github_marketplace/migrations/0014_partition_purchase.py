@@ -0,0 +1,32 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations
+from django.utils import timezone
+
+from tcms_github_marketplace import partitioning
+
+
+def forwards(apps, schema_editor):  # pylint: disable=unused-argument
+    with schema_editor.connection.cursor() as cursor:
+        partitioning.rebuild(cursor, partitioned=True, current_year=timezone.now().year)
+
+
+def backwards(apps, schema_editor):  # pylint: disable=unused-argument
+    with schema_editor.connection.cursor() as cursor:
+        partitioning.rebuild(
+            cursor, partitioned=False, current_year=timezone.now().year
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0013_monthlyrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,47 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0014_partition_purchase"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="purchase",
+            name="tcms_github_payload_gin",
+        ),
+        migrations.RemoveIndex(
+            model_name="privaterepotoken",
+            name="ghmp_privaterepotoken_gin",
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(
+                models.F("payload__marketplace_purchase__account__id"),
+                name="ghmp_purchase_account_id",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(
+                models.F("payload__marketplace_purchase__plan__monthly_price_in_cents"),
+                name="ghmp_purchase_plan_price",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["payload"],
+                opclasses=["jsonb_path_ops"],
+                name="ghmp_purchase_payload_path",
+            ),
+        ),
+    ]
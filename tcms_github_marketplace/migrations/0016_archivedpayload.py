@@ -0,0 +1,43 @@
+# pylint: disable=avoid-auto-field
+#
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations, models
+
+import tcms_github_marketplace.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0015_narrow_payload_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedPayload",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("purchase_id", models.IntegerField(unique=True)),
+                ("compression", models.CharField(max_length=8)),
+                ("data", models.BinaryField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="purchase",
+            name="payload",
+            field=tcms_github_marketplace.models.PayloadField(),
+        ),
+    ]
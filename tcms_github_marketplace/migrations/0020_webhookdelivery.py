@@ -0,0 +1,46 @@
+# pylint: disable=avoid-auto-field
+#
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0019_outgoingemail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookDelivery",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("vendor", models.CharField(max_length=16)),
+                ("delivery_id", models.CharField(max_length=128)),
+                (
+                    "received_on",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("vendor", "delivery_id"),
+                        name="ghmp_webhookdelivery_vendor_delivery_id",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations, models
+
+from tcms_github_marketplace.migrations import _backfill_v1
+
+
+class GitOpsPrefixNormalized(_backfill_v1.Backfill):
+    name = "gitops-prefix-normalized"
+    fields = ["gitops_prefix_normalized"]
+    only = ["gitops_prefix", "gitops_prefix_normalized"]
+
+    def queryset(self, model):
+        return model.objects.exclude(gitops_prefix=None)
+
+    def transform(self, obj):
+        normalized = obj.gitops_prefix.strip().lower().rstrip("/") or None
+        if normalized == obj.gitops_prefix_normalized:
+            return False
+
+        obj.gitops_prefix_normalized = normalized
+        return True
+
+
+def forwards(apps, schema_editor):  # pylint: disable=unused-argument
+    _backfill_v1.run(GitOpsPrefixNormalized(), apps)
+
+
+class Migration(migrations.Migration):
+    # commit after every batch
+    atomic = False
+
+    dependencies = [
+        ("tcms_github_marketplace", "0021_backfillprogress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="purchase",
+            name="gitops_prefix_normalized",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=256, null=True
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
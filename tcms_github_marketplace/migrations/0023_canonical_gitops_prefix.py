@@ -0,0 +1,71 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+import re
+
+from django.db import migrations
+
+from tcms_github_marketplace.migrations import _backfill_v1
+
+# frozen copy of prefix.canonical() at the time of this migration
+SCP_LIKE = re.compile(r"^[\w.-]+@(?P<host>[\w.-]+):(?P<path>.+)$")
+SSH_URL = re.compile(
+    r"^(?:ssh|git)://(?:[^@/]+@)?(?P<host>[^:/]+)(?::\d+)?/(?P<path>.*)$"
+)
+
+
+def canonical(url):
+    if not url:
+        return None
+
+    url = url.strip().lower().split("#")[0].split("?")[0]
+
+    if match := SSH_URL.match(url) or SCP_LIKE.match(url):
+        url = f"https://{match['host']}/{match['path']}"
+
+    scheme, separator, path = url.partition("://")
+    if separator:
+        segments = [segment for segment in path.split("/") if segment]
+        if segments:
+            segments[0] = segments[0].rsplit("@", 1)[-1]
+        url = f"{scheme}://{'/'.join(segments).removesuffix('.git')}"
+
+    return url.rstrip("/") or None
+
+
+class CanonicalGitOpsPrefix(_backfill_v1.Backfill):
+    # progress is recorded separately from 0022
+    name = "gitops-prefix-canonical"
+    fields = ["gitops_prefix_normalized"]
+    only = ["gitops_prefix", "gitops_prefix_normalized"]
+
+    def queryset(self, model):
+        return model.objects.exclude(gitops_prefix=None)
+
+    def transform(self, obj):
+        normalized = canonical(obj.gitops_prefix)
+        if normalized == obj.gitops_prefix_normalized:
+            return False
+
+        obj.gitops_prefix_normalized = normalized
+        return True
+
+
+def forwards(apps, schema_editor):  # pylint: disable=unused-argument
+    # values are now stored in canonical form, e.g. without a .git suffix
+    _backfill_v1.run(CanonicalGitOpsPrefix(), apps)
+
+
+class Migration(migrations.Migration):
+    # commit after every batch
+    atomic = False
+
+    dependencies = [
+        ("tcms_github_marketplace", "0022_purchase_gitops_prefix_normalized"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0024_spareschema"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="purchase",
+            name="ghmp_purchase_payload_path",
+        ),
+    ]
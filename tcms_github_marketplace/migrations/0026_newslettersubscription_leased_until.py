@@ -0,0 +1,21 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tcms_github_marketplace", "0025_remove_purchase_payload_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslettersubscription",
+            name="leased_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
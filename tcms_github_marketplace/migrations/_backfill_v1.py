@@ -0,0 +1,108 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Batched backfills for data migrations, a frozen copy of ``backfill.run()``.
+
+WARNING: historical migrations depend on the exact behavior of this module,
+never edit it! Copy it to ``_backfill_v2.py`` if changes are needed. The
+leading underscore hides it from the migration loader.
+
+Migrations define the transformation themselves so that it doesn't change
+together with application code::
+
+    class MyBackfill(_backfill_v1.Backfill):
+        name = "my-backfill"
+        ...
+
+    def forwards(apps, schema_editor):
+        _backfill_v1.run(MyBackfill(), apps)
+
+    class Migration(migrations.Migration):
+        atomic = False  # commit after every batch
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+class Backfill:
+    """
+    Subclasses define ``name``, the list of ``fields`` which are updated,
+    ``queryset()`` and ``transform()``. The queryset must select only rows
+    which still need updating, that's what makes a backfill safe to repeat!
+    """
+
+    name = None
+    model = ("tcms_github_marketplace", "Purchase")
+    fields = []
+    # columns loaded from the DB, default is all
+    only = None
+
+    def queryset(self, model):
+        return model.objects.all()
+
+    def transform(self, obj):
+        """
+        Modifies ``obj`` in place. Returns True if it needs to be saved!
+        """
+        raise NotImplementedError
+
+
+def run(backfill, apps, batch_size=BATCH_SIZE, progress=True):
+    """
+    When ``progress`` is True the position is recorded in BackfillProgress
+    under ``backfill.name`` and an interrupted migration resumes from there.
+    Returns a tuple with the number of processed and updated rows!
+    """
+    model = apps.get_model(*backfill.model)
+
+    state = None
+    last_pk = 0
+    processed = 0
+    updated = 0
+    if progress:
+        state, _ = apps.get_model(
+            "tcms_github_marketplace", "BackfillProgress"
+        ).objects.get_or_create(name=backfill.name)
+
+        if state.finished_at:
+            return state.processed, state.updated
+
+        last_pk = state.last_pk
+        processed = state.processed
+        updated = state.updated
+
+    queryset = backfill.queryset(model)
+    if backfill.only:
+        queryset = queryset.only(*backfill.only)
+
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not batch:
+                break
+
+            changed = [obj for obj in batch if backfill.transform(obj)]
+            if changed:
+                model.objects.bulk_update(changed, backfill.fields)
+
+            last_pk = batch[-1].pk
+            processed += len(batch)
+            updated += len(changed)
+
+            if state:
+                state.last_pk = last_pk
+                state.processed = processed
+                state.updated = updated
+                state.save()
+
+    if state:
+        state.finished_at = timezone.now()
+        state.save()
+
+    return processed, updated
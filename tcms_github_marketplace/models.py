@@ -3,10 +3,15 @@
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.db import models
-from django.contrib.postgres.indexes import GinIndex
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from tcms_github_marketplace import archive, prefix
 
 
 class ManualPurchase(models.Model):  # pylint: disable=remove-empty-class
@@ -50,10 +55,109 @@ class IPrefixFor(models.lookups.StartsWith):  # pylint: disable=abstract-method
         return f"ILIKE {rhs}::text || '%%'"
 
 
+def json_number(path, output_field=None):
+    """
+    Reads a numeric value stored at ``path`` inside a JSONField.
+    Returns NULL if the value is missing!
+    """
+    value = Cast(KT(path), models.FloatField())
+    if output_field is not None:
+        value = Cast(value, output_field)
+    return value
+
+
+def _set_rehydrated_payload(instance, attname, payload):
+    instance.__dict__[attname] = payload
+    instance.__dict__[f"_{attname}_rehydrated"] = True
+
+
+class PayloadDescriptor(DeferredAttribute):
+    """
+    Loads the full payload of archived records on first access
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        value = super().__get__(instance, cls)
+        if archive.is_archived(value):
+            value = ArchivedPayload.objects.get(purchase_id=instance.pk).payload
+            _set_rehydrated_payload(instance, self.field.attname, value)
+
+        return value
+
+
+class PayloadField(models.JSONField):
+    """
+    JSONField which transparently rehydrates payloads moved into
+    ArchivedPayload. Rehydrated payloads are never stored inline again!
+    """
+
+    descriptor_class = PayloadDescriptor
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        if model_instance.__dict__.get(f"_{self.attname}_rehydrated"):
+            return archive.compact(value)
+        return value
+
+
+class PurchaseQuerySet(models.QuerySet):
+    def received_since(self, days):
+        """
+        Records received during the last ``days``. The table is partitioned
+        on ``received_on`` so older partitions are not scanned at all!
+        """
+        return self.filter(received_on__gte=timezone.now() - timedelta(days=days))
+
+    def with_price_and_quantity(self):
+        """
+        Annotates ``monthly_price_in_cents`` and ``quantity`` calculated in SQL.
+        The value of ``quantity`` matches ``Purchase.unit_count``!
+        """
+        fastspring_quantity = Coalesce(
+            NullIf(json_number("payload__data__quantity", models.IntegerField()), 0),
+            NullIf(
+                json_number(
+                    "payload__data__subscription__quantity", models.IntegerField()
+                ),
+                0,
+            ),
+            json_number("payload__data__items__0__quantity", models.IntegerField()),
+        )
+
+        return self.annotate(
+            monthly_price_in_cents=Coalesce(
+                json_number(
+                    "payload__marketplace_purchase__plan__monthly_price_in_cents"
+                ),
+                0.0,
+            ),
+            quantity=Coalesce(
+                models.Case(
+                    models.When(
+                        vendor__in=["github", "github_cron", "manual_purchase"],
+                        then=json_number(
+                            "payload__marketplace_purchase__unit_count",
+                            models.IntegerField(),
+                        ),
+                    ),
+                    models.When(vendor="fastspring", then=fastspring_quantity),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+        )
+
+
 class Purchase(models.Model):
     """
     Holds information about GitHub ``marketplace_purchase`` events:
     https://developer.github.com/marketplace/integrating-with-the-github-marketplace-api/github-marketplace-webhook-events/
+
+    WARNING: the DB table is partitioned by year on ``received_on``,
+    see ``tcms_github_marketplace.partitioning``!
     """
 
     vendor = models.CharField(max_length=16, db_index=True, blank=True, null=True)
@@ -66,22 +170,38 @@ class Purchase(models.Model):
     gitops_prefix = models.CharField(
         null=True, blank=True, db_index=True, max_length=256
     )
+    # see prefix.canonical()
+    gitops_prefix_normalized = models.CharField(
+        null=True, blank=True, db_index=True, max_length=256, editable=False
+    )
 
     # this is for internal purposes
     received_on = models.DateTimeField(db_index=True, auto_now_add=True)
 
-    payload = models.JSONField()
+    payload = PayloadField()
+
+    objects = PurchaseQuerySet.as_manager()
 
     class Meta:
         indexes = [
-            GinIndex(
-                fastupdate=False, fields=["payload"], name="tcms_github_payload_gin"
+            # expression indexes for the JSON paths used in queries
+            models.Index(
+                models.F("payload__marketplace_purchase__account__id"),
+                name="ghmp_purchase_account_id",
+            ),
+            models.Index(
+                models.F("payload__marketplace_purchase__plan__monthly_price_in_cents"),
+                name="ghmp_purchase_plan_price",
             ),
         ]
 
     def __str__(self):
         return f"Purchase {self.action} from {self.sender} on {self.received_on.isoformat()}"
 
+    def save(self, *args, **kwargs):
+        self.gitops_prefix_normalized = prefix.canonical(self.gitops_prefix)
+        super().save(*args, **kwargs)
+
     @staticmethod
     def next_billing_date_from(payload):
         next_billing_date = None
@@ -132,19 +252,189 @@ class Purchase(models.Model):
         return 0
 
 
-class PrivateRepoToken(models.Model):
+class ArchivedPayload(models.Model):
+    """
+    Compressed payload of an old Purchase record, see the
+    ``archive_purchase_payloads`` command.
+    """
+
+    purchase_id = models.IntegerField(unique=True)
+    compression = models.CharField(max_length=8)
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def payload(self):
+        return archive.decompress(self.data, self.compression)
+
+    @classmethod
+    def rehydrate(cls, purchases):
+        """
+        Loads the full payloads for a list of Purchase objects with a single query
+        """
+        archived = {
+            purchase.pk: purchase
+            for purchase in purchases
+            if archive.is_archived(purchase.__dict__.get("payload"))
+        }
+        if not archived:
+            return
+
+        for record in cls.objects.filter(purchase_id__in=archived):
+            _set_rehydrated_payload(
+                archived[record.purchase_id], "payload", record.payload
+            )
+
+
+class WebhookDelivery(models.Model):
+    """
+    IDs of processed webhook deliveries, used to skip duplicates when vendors
+    deliver the same webhook again. Stored outside of the Purchase table b/c
+    unique indexes on a partitioned table must include the partition key!
+    """
+
+    vendor = models.CharField(max_length=16)
+    delivery_id = models.CharField(max_length=128)
+    received_on = models.DateTimeField(db_index=True, auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "delivery_id"],
+                name="ghmp_webhookdelivery_vendor_delivery_id",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Delivery {self.delivery_id} from {self.vendor}"
+
+
+class MonthlyRollup(models.Model):
+    """
+    Revenue and seat counts for a finished month, see ``reports.py``.
+    Records are calculated once and never updated afterwards!
+    """
+
     vendor = models.CharField(max_length=16, db_index=True)
-    subscription = models.CharField(max_length=32, db_index=True, blank=True, null=True)
-    created_at = models.DateTimeField(db_index=True, auto_now_add=True)
-    payload = models.JSONField()
+    month = models.DateField(db_index=True)
+    mrr_in_cents = models.BigIntegerField(default=0)
+    new_subscriptions = models.IntegerField(default=0)
+    renewed_subscriptions = models.IntegerField(default=0)
+    cancelled_subscriptions = models.IntegerField(default=0)
+    unit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        indexes = [
-            GinIndex(
-                fastupdate=False, fields=["payload"], name="ghmp_privaterepotoken_gin"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "month"], name="ghmp_monthlyrollup_vendor_month"
             ),
         ]
 
+    def __str__(self):
+        return f"Rollup for {self.vendor} on {self.month.isoformat()}"
+
+    @property
+    def arr_in_cents(self):
+        return self.mrr_in_cents * 12
+
+
+class RetryTask(models.Model):
+    """
+    Work which couldn't be completed during webhook processing b/c an
+    upstream API was unavailable, see ``utils.call_or_defer()`` and the
+    ``process_retry_queue`` command.
+    """
+
+    action = models.CharField(max_length=64, db_index=True)
+    arguments = models.JSONField(default=dict)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(db_index=True, default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Retry {self.action} with {self.arguments}"
+
+
+class NewsletterSubscription(models.Model):
+    """
+    Addresses queued for the MailChimp newsletter, see ``mailchimp.flush()``
+    """
+
+    email = models.EmailField(unique=True)
+    # queued, subscribed or failed
+    status = models.CharField(max_length=16, db_index=True, default="queued")
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # reserved by the worker which is sending it to MailChimp
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.email} is {self.status}"
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email messages waiting to be sent, see ``outbox.py``
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    recipients = models.JSONField(default=list)
+    # messages with the same key are sent only once
+    dedup_key = models.CharField(max_length=128, unique=True, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # reserved by the worker which is sending it
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)}"
+
+
+class BackfillProgress(models.Model):
+    """
+    Position of data backfills executed via the ``run_backfill`` command,
+    see ``backfill.py``
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    processed = models.BigIntegerField(default=0)
+    updated = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Backfill {self.name} at {self.last_pk}"
+
+
+class PrivateRepoToken(models.Model):
+    vendor = models.CharField(max_length=16, db_index=True)
+    subscription = models.CharField(max_length=32, db_index=True, blank=True, null=True)
+    created_at = models.DateTimeField(db_index=True, auto_now_add=True)
+    payload = models.JSONField()
+
     @property
     def token(self):
         return self.payload["token_value"]
+
+
+class SpareSchema(models.Model):
+    """
+    Pre-created tenant schema waiting to be claimed by ``CreateTenant``,
+    see ``spare_schemas.py``
+    """
+
+    schema_name = models.CharField(max_length=63, unique=True)
+    # empty until migrated for the first time
+    version = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.schema_name
@@ -0,0 +1,117 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Queued outbound email. Messages are rendered when queued and sent by the
+``send_queued_emails`` command so that SMTP latency doesn't affect webhooks
+or admin pages.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from tcms_github_marketplace.models import OutgoingEmail
+
+BATCH_SIZE = 100
+
+# afterwards the message is not retried anymore
+MAX_ATTEMPTS = 5
+
+# how long a batch is reserved for the worker which is sending it
+LEASE = timedelta(minutes=15)
+
+
+def mailto(
+    template_name, subject, recipients, context=None, dedup_key=None
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Same as ``tcms.core.utils.mailto.mailto()`` but the message is queued.
+    If ``dedup_key`` is specified and a message with the same key has already
+    been queued then nothing happens!
+    """
+    OutgoingEmail.objects.bulk_create(
+        [
+            OutgoingEmail(
+                subject=settings.EMAIL_SUBJECT_PREFIX + str(subject),
+                body=render_to_string(template_name, context),
+                # filter out duplicate addresses
+                recipients=sorted(set(recipients)),
+                dedup_key=dedup_key,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _claim_batch(batch_size, last_pk):
+    """
+    Locks the next batch only for as long as it takes to lease it. Other
+    workers skip it while it is being sent and pick it up again if this
+    worker dies!
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(sent_at=None, attempts__lt=MAX_ATTEMPTS, pk__gt=last_pk)
+            .filter(Q(leased_until=None) | Q(leased_until__lte=now))
+            .order_by("pk")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            leased_until=now + LEASE
+        )
+
+    return batch
+
+
+def send_queued(batch_size=BATCH_SIZE):
+    """
+    Sends queued messages reusing a single SMTP connection for each batch.
+    Returns the number of sent and failed messages!
+
+    SMTP is used outside of transactions, each batch is leased for ``LEASE``
+    instead of keeping its rows locked. The result is saved right after each
+    message so that sent messages aren't sent again if the batch fails.
+    """
+    sent = 0
+    failed = 0
+    last_pk = 0
+
+    while True:
+        batch = _claim_batch(batch_size, last_pk)
+        if not batch:
+            return sent, failed
+
+        with get_connection() as connection:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    email.attempts += 1
+                    email.last_error = str(err)
+                    failed += 1
+                else:
+                    email.sent_at = timezone.now()
+                    sent += 1
+
+                email.leased_until = None
+                email.save(
+                    update_fields=["attempts", "last_error", "leased_until", "sent_at"]
+                )
+
+        last_pk = batch[-1].pk
@@ -0,0 +1,141 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+The Purchase table is partitioned by year on the ``received_on`` column.
+
+WARNING: Postgresql specific! Used from migrations so it must not
+import models, work with table names instead!
+"""
+
+TABLE = "tcms_github_marketplace_purchase"
+
+
+def partition_name(year):
+    return f"{TABLE}_y{year}"
+
+
+def existing_partitions(cursor):
+    cursor.execute(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.oid = %s::regclass
+        """,
+        [TABLE],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_partition(cursor, year):
+    """
+    Creates the partition for ``year`` unless it exists. Records which
+    have already been stored into the default partition are moved over!
+    """
+    name = partition_name(year)
+    if name in existing_partitions(cursor):
+        return False
+
+    start = f"{year}-01-01 00:00:00+00"
+    end = f"{year + 1}-01-01 00:00:00+00"
+
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE})")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {TABLE}_default
+            WHERE received_on >= %s AND received_on < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        [start, end],
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    return True
+
+
+def _index_definitions(cursor, table):
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(pg_index.indexrelid) FROM pg_index
+        WHERE pg_index.indrelid = %s::regclass AND NOT pg_index.indisprimary
+        """,
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _is_identity(cursor, table):
+    cursor.execute(
+        """
+        SELECT attidentity FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attname = 'id'
+        """,
+        [table],
+    )
+    return bool(cursor.fetchone()[0])
+
+
+def rebuild(cursor, partitioned, current_year):
+    """
+    Copies the Purchase table into a new table which is either partitioned
+    by year or a regular one. Column definitions, the ID sequence and indexes
+    are preserved. The primary key of a partitioned table must include
+    the partition key, that's why it becomes ``(id, received_on)``!
+    """
+    old_table = f"{TABLE}_old"
+    indexes = _index_definitions(cursor, TABLE)
+    identity = _is_identity(cursor, TABLE)
+
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {old_table}")
+    cursor.execute(f"ALTER INDEX {TABLE}_pkey RENAME TO {old_table}_pkey")
+
+    partition_by = "PARTITION BY RANGE (received_on)" if partitioned else ""
+    cursor.execute(
+        f"CREATE TABLE {TABLE} (LIKE {old_table} "
+        f"INCLUDING DEFAULTS INCLUDING IDENTITY) {partition_by}"
+    )
+
+    if not identity:
+        # a serial column, the sequence must survive when the old table is dropped
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [old_table])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id")
+
+    if partitioned:
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(
+            f"SELECT date_part('year', min(received_on))::integer FROM {old_table}"
+        )
+        first_year = cursor.fetchone()[0] or current_year
+        for year in range(first_year, current_year + 2):
+            create_partition(cursor, year)
+
+    if identity:
+        cursor.execute(
+            f"INSERT INTO {TABLE} OVERRIDING SYSTEM VALUE SELECT * FROM {old_table}"
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), max(id)) FROM {TABLE} "
+            "HAVING max(id) IS NOT NULL",
+            [TABLE],
+        )
+    else:
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {old_table}")
+
+    cursor.execute(f"DROP TABLE {old_table}")
+
+    primary_key = "(id, received_on)" if partitioned else "(id)"
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY {primary_key}"
+    )
+    for definition in indexes:
+        cursor.execute(definition.replace(" ON ONLY ", " ON "))
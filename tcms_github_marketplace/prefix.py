@@ -0,0 +1,73 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Matching repository URLs against ``Purchase.gitops_prefix`` with a btree
+index. Prefixes are stored in canonical form in ``gitops_prefix_normalized``
+and a repository URL is expanded into all of its path-segment prefixes, e.g.
+``git@github.com:kiwitcms/Kiwi.git`` becomes::
+
+    https://github.com
+    https://github.com/kiwitcms
+    https://github.com/kiwitcms/kiwi
+
+which are then searched with a single ``IN (...)`` lookup. Unlike
+``iprefix_for`` a prefix matches only whole path segments!
+"""
+
+import re
+
+# deeper prefixes will never match
+MAX_SEGMENTS = 16
+
+# git@github.com:kiwitcms/Kiwi.git
+SCP_LIKE = re.compile(r"^[\w.-]+@(?P<host>[\w.-]+):(?P<path>.+)$")
+
+# ssh://git@github.com:22/kiwitcms/Kiwi.git
+SSH_URL = re.compile(
+    r"^(?:ssh|git)://(?:[^@/]+@)?(?P<host>[^:/]+)(?::\d+)?/(?P<path>.*)$"
+)
+
+
+def canonical(url):
+    """
+    The same repository may be referenced as ``https://github.com/Org/Repo``,
+    ``https://github.com/org/repo/``, ``https://github.com/org/repo.git`` or
+    ``git@github.com:org/repo``. All of them become ``https://github.com/org/repo``
+    """
+    if not url:
+        return None
+
+    url = url.strip().lower().split("#")[0].split("?")[0]
+
+    if match := SSH_URL.match(url) or SCP_LIKE.match(url):
+        url = f"https://{match['host']}/{match['path']}"
+
+    scheme, separator, path = url.partition("://")
+    if separator:
+        segments = [segment for segment in path.split("/") if segment]
+        if segments:
+            # drop credentials, e.g. https://token@github.com/org/repo
+            segments[0] = segments[0].rsplit("@", 1)[-1]
+        url = f"{scheme}://{'/'.join(segments).removesuffix('.git')}"
+
+    return url.rstrip("/") or None
+
+
+def candidates(url):
+    url = canonical(url)
+    if not url:
+        return []
+
+    scheme, separator, path = url.partition("://")
+    if not separator:
+        return [url]
+
+    segments = path.split("/")[:MAX_SEGMENTS]
+
+    return [
+        f"{scheme}://{'/'.join(segments[:count])}"
+        for count in range(1, len(segments) + 1)
+    ]
@@ -0,0 +1,228 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Monthly revenue and seat-count reporting over the Purchase log.
+
+All figures are calculated with SQL aggregation. Finished months are
+stored as MonthlyRollup records and never recalculated, only the
+current month is calculated on every request!
+"""
+
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import (
+    Case,
+    Count,
+    DateTimeField,
+    DurationField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from tcms_github_marketplace.models import MonthlyRollup, Purchase
+
+# late webhooks may still arrive for events which happened at the end of the month
+GRACE_PERIOD = timedelta(days=3)
+
+# see utils.calculate_paid_until()
+END_OF_DAY = timedelta(hours=23, minutes=59, seconds=59)
+
+# stored for finished months without any data so they aren't calculated again
+NO_DATA_VENDOR = ""
+
+
+def first_day_of(month):
+    return date(month.year, month.month, 1)
+
+
+def next_month(month):
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def as_datetime(day):
+    value = datetime(day.year, day.month, day.day)
+    if settings.USE_TZ:
+        value = timezone.make_aware(value)
+    return value
+
+
+def report_vendor():
+    # renewals for GitHub Marketplace are recorded via cron
+    return Case(
+        When(vendor="github_cron", then=Value("github")),
+        default=F("vendor"),
+    )
+
+
+def paid_purchases():
+    """
+    Paid "purchased" events annotated with the values used by reports
+    """
+    return (
+        Purchase.objects.with_price_and_quantity()
+        .filter(action="purchased", monthly_price_in_cents__gt=0)
+        .annotate(
+            billing_cycle=KT("payload__marketplace_purchase__billing_cycle"),
+            report_vendor=report_vendor(),
+        )
+        .annotate(
+            # same as utils.calculate_paid_until(), including the end of
+            # the day in UTC b/c effective_date is loaded from the DB in UTC
+            paid_until=ExpressionWrapper(
+                Trunc(
+                    F("effective_date")
+                    + Case(
+                        When(billing_cycle="monthly", then=Value(timedelta(days=31))),
+                        When(billing_cycle="yearly", then=Value(timedelta(days=366))),
+                        When(billing_cycle="3-years", then=Value(timedelta(days=1096))),
+                        default=Value(timedelta(days=0)),
+                        output_field=DurationField(),
+                    ),
+                    "day",
+                    output_field=DateTimeField(),
+                    tzinfo=dt_timezone.utc,
+                )
+                + Value(END_OF_DAY),
+                output_field=DateTimeField(),
+            ),
+            # FastSpring sends the price for the entire billing cycle
+            # in the monthly_price_in_cents field
+            monthly_value_in_cents=Case(
+                When(
+                    vendor="fastspring",
+                    billing_cycle="yearly",
+                    then=F("monthly_price_in_cents") / 12,
+                ),
+                When(
+                    billing_cycle="3-years",
+                    then=F("monthly_price_in_cents") / 36,
+                ),
+                default=F("monthly_price_in_cents"),
+                output_field=FloatField(),
+            ),
+        )
+    )
+
+
+def calculate(month):
+    """
+    Returns a dictionary of unsaved MonthlyRollup objects keyed by vendor.
+    MRR and seat counts are for subscriptions active at the end of the month!
+    """
+    month = first_day_of(month)
+    start = as_datetime(month)
+    end = as_datetime(next_month(month))
+    rollups = {}
+
+    def rollup_for(vendor):
+        if vendor not in rollups:
+            rollups[vendor] = MonthlyRollup(vendor=vendor, month=month)
+        return rollups[vendor]
+
+    # the most recent payment for each subscription still active at the end of the month
+    active = (
+        paid_purchases()
+        .filter(effective_date__lt=end, paid_until__gte=end)
+        .exclude(subscription=None)
+        .order_by("subscription", "-effective_date")
+        .distinct("subscription")
+        .values("pk")
+    )
+    for row in (
+        paid_purchases()
+        .filter(pk__in=Subquery(active))
+        .values("report_vendor")
+        .annotate(mrr=Sum("monthly_value_in_cents"), seats=Sum("quantity"))
+        .order_by()
+    ):
+        rollup = rollup_for(row["report_vendor"])
+        rollup.mrr_in_cents = round(row["mrr"] or 0)
+        rollup.unit_count = row["seats"] or 0
+
+    previous_payments = Purchase.objects.filter(
+        subscription=OuterRef("subscription"),
+        action="purchased",
+        effective_date__lt=OuterRef("effective_date"),
+    )
+    for row in (
+        paid_purchases()
+        .filter(effective_date__gte=start, effective_date__lt=end)
+        .annotate(is_renewal=Exists(previous_payments))
+        .values("report_vendor")
+        .annotate(
+            new=Count("pk", filter=Q(is_renewal=False)),
+            renewed=Count("pk", filter=Q(is_renewal=True)),
+        )
+        .order_by()
+    ):
+        rollup = rollup_for(row["report_vendor"])
+        rollup.new_subscriptions = row["new"]
+        rollup.renewed_subscriptions = row["renewed"]
+
+    for row in (
+        Purchase.objects.filter(
+            action="cancelled", effective_date__gte=start, effective_date__lt=end
+        )
+        .annotate(report_vendor=report_vendor())
+        .values("report_vendor")
+        .annotate(cancelled=Count("pk"))
+        .order_by()
+    ):
+        rollup_for(row["report_vendor"]).cancelled_subscriptions = row["cancelled"]
+
+    return rollups
+
+
+def monthly_report(month):
+    """
+    Returns a list of MonthlyRollup objects, one for each vendor.
+
+    Finished months are calculated once and stored in the database.
+    The current month is always calculated on the fly and never stored!
+    """
+    month = first_day_of(month)
+
+    if as_datetime(next_month(month)) + GRACE_PERIOD > timezone.now():
+        return sorted(calculate(month).values(), key=lambda rollup: rollup.vendor)
+
+    query = MonthlyRollup.objects.filter(month=month).order_by("vendor")
+    if not query.exists():
+        rollups = list(calculate(month).values()) or [
+            MonthlyRollup(vendor=NO_DATA_VENDOR, month=month)
+        ]
+        MonthlyRollup.objects.bulk_create(rollups, ignore_conflicts=True)
+
+    return list(query.exclude(vendor=NO_DATA_VENDOR))
+
+
+def report(since, until=None):
+    """
+    MonthlyRollup objects for all months in the ``[since, until]`` interval
+    """
+    month = first_day_of(since)
+    until = first_day_of(until or timezone.now().date())
+    result = []
+
+    while month <= until:
+        result.extend(monthly_report(month))
+        month = next_month(month)
+
+    return result
@@ -0,0 +1,102 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Sends read-only marketplace queries to a database replica. Enable with::
+
+    DATABASES["replica"] = {...}
+    DATABASE_ROUTERS = [
+        "tcms_github_marketplace.routers.ReplicaRouter",
+        "django_tenants.routers.TenantSyncRouter",
+    ]
+    MARKETPLACE_REPLICA_DATABASE = "replica"
+
+Only queries executed inside a ``use_replica()`` block are routed, everything
+else uses the primary database. After ``stick()`` has been called for a key,
+e.g. a customer email, ``use_replica()`` blocks for the same key read from
+the primary for ``MARKETPLACE_REPLICA_STICKY_SECONDS`` so that customers can
+see their own changes despite replication lag!
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_use_replica = ContextVar("marketplace_use_replica", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "MARKETPLACE_REPLICA_DATABASE", None)
+    if alias in settings.DATABASES:
+        return alias
+    return None
+
+
+def sticky_key(key):
+    return f"replica-sticky-{key}"
+
+
+def stick(*keys):
+    """
+    Reads for these keys go to the primary database for a while
+    """
+    timeout = getattr(settings, "MARKETPLACE_REPLICA_STICKY_SECONDS", 10)
+    cache.set_many({sticky_key(key): True for key in keys}, timeout=timeout)
+
+
+@contextmanager
+def use_replica(*keys):
+    """
+    Route reads inside this block to the replica unless any of
+    ``keys`` has been changed recently, see ``stick()``
+    """
+    enabled = replica_alias() is not None
+    if enabled and keys:
+        enabled = not cache.get_many([sticky_key(key) for key in keys])
+
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def reading_from_replica():
+    """
+    True inside a ``use_replica()`` block which is routed to the replica
+    """
+    return _use_replica.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):  # pylint: disable=unused-argument
+        if _use_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):  # pylint: disable=unused-argument
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):  # pylint: disable=unused-argument
+        alias = replica_alias()
+        if alias is None:
+            return None
+
+        # the replica contains the same data as the primary
+        databases = {DEFAULT_DB_ALIAS, alias}
+        # pylint: disable=protected-access
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(
+        self, db, app_label, model_name=None, **hints
+    ):  # pylint: disable=unused-argument
+        if db == replica_alias():
+            return False
+        return None
@@ -0,0 +1,75 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from tcms_github_marketplace import api, routers, utils
+
+
+def clear_subscription_summary_on_tenant_save(
+    sender, instance, **kwargs
+):  # pylint: disable=unused-argument
+    """
+    Tenant information is part of the cached subscription summary
+    for both the owner and all authorized users! Also connected to
+    ``pre_delete``
+    """
+    emails = list(instance.authorized_users.values_list("email", flat=True))
+    if instance.owner_id:
+        emails.append(instance.owner.email)
+
+    # the next page views must not rebuild the summary from a lagging replica
+    routers.stick(*emails)
+    utils.clear_subscription_summary(*emails)
+
+
+def clear_subscription_summary_on_access_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):  # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
+    """
+    Adding or removing authorized users changes the list of tenants
+    they can access!
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    # instance is a User, pk_set contains Tenant IDs
+    if reverse:
+        routers.stick(instance.email)
+        utils.clear_subscription_summary(instance.email)
+        return
+
+    # instance is a Tenant, pk_set contains User IDs or None on clear()
+    if action == "pre_clear":
+        emails = instance.authorized_users.values_list("email", flat=True)
+    else:
+        emails = (
+            get_user_model()
+            .objects.filter(pk__in=pk_set)
+            .values_list("email", flat=True)
+        )
+
+    emails = list(emails)
+    routers.stick(*emails)
+    utils.clear_subscription_summary(*emails)
+
+
+def warm_gitops_cache_after_migrate(
+    sender, **kwargs
+):  # pylint: disable=unused-argument
+    """
+    Enabled via ``MARKETPLACE_GITOPS_WARM_AFTER_MIGRATE``. Executed only
+    once when migrating all tenants b/c purchases live in the public schema!
+    """
+    if not getattr(settings, "MARKETPLACE_GITOPS_WARM_AFTER_MIGRATE", False):
+        return
+
+    if connection.schema_name != get_public_schema_name():
+        return
+
+    api.warm_cache()
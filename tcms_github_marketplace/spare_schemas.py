@@ -0,0 +1,142 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Pool of empty, fully migrated tenant schemas. Creating and migrating a new
+schema takes tens of seconds so ``CreateTenant`` renames one of these instead
+and the customer doesn't have to wait.
+
+``./manage.py top_up_spare_schemas`` creates new spare schemas and migrates
+the existing ones after a deployment. Only spare schemas migrated with the
+same set of migrations as the running code can be claimed, otherwise
+``CreateTenant`` falls back to creating the schema synchronously!
+"""
+
+import hashlib
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import ProgrammingError, connection
+from django.db.migrations.loader import MigrationLoader
+from django_tenants.utils import schema_exists
+
+from tcms_github_marketplace import locks
+from tcms_github_marketplace.models import SpareSchema
+
+# can't collide with tenant names b/c they are used as sub-domains
+PREFIX = "spare_"
+
+# psycopg.errors.DuplicateSchema
+DUPLICATE_SCHEMA = "42P06"
+
+
+class SchemaTaken(Exception):
+    """
+    Raised when another tenant already uses the requested schema name
+    """
+
+
+@lru_cache(maxsize=None)
+def version():
+    """
+    Fingerprint of the latest migrations known to the running code
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    leaves = sorted(f"{app}.{name}" for app, name in loader.graph.leaf_nodes())
+    return hashlib.sha256("\n".join(leaves).encode()).hexdigest()
+
+
+def pool_size():
+    return getattr(settings, "MARKETPLACE_SPARE_SCHEMAS", 0)
+
+
+def migrate(schema_name):
+    """
+    Creates the schema if it doesn't exist and applies all tenant migrations
+    """
+    if not schema_exists(schema_name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {connection.ops.quote_name(schema_name)}")
+
+    call_command(
+        "migrate_schemas",
+        tenant=True,
+        schema_name=schema_name,
+        interactive=False,
+        verbosity=0,
+    )
+
+
+def top_up(size=None):
+    """
+    Migrates stale spare schemas and creates new ones until there are
+    ``size`` of them. Returns the number of migrated and created schemas
+    """
+    if size is None:
+        size = pool_size()
+
+    # don't race with another cron job
+    with locks.AdvisoryLock("spare-schemas", timeout=0):
+        current = version()
+
+        migrated = 0
+        for spare in SpareSchema.objects.exclude(version=current):
+            migrate(spare.schema_name)
+            # could have been deleted in the meantime
+            migrated += SpareSchema.objects.filter(pk=spare.pk).update(version=current)
+
+        created = 0
+        while SpareSchema.objects.count() < size:
+            # recorded before the schema is created so that a failed
+            # attempt is retried by the loop above on the next run
+            spare = SpareSchema.objects.create(
+                schema_name=f"{PREFIX}{uuid.uuid4().hex}"
+            )
+            migrate(spare.schema_name)
+            spare.version = current
+            spare.save(update_fields=["version"])
+            created += 1
+
+    return migrated, created
+
+
+def claim(schema_name):
+    """
+    Renames an up-to-date spare schema to ``schema_name``. When it returns True
+    ``Tenant.save()`` finds the schema already exists and doesn't migrate it.
+    The rename is rolled back together with the surrounding transaction!
+
+    Raises ``SchemaTaken`` if the name was taken after the form was validated,
+    e.g. by a concurrent request. The transaction is broken afterwards and
+    must be rolled back which also returns the spare schema into the pool.
+    """
+    if schema_exists(schema_name):
+        raise SchemaTaken(schema_name)
+
+    spare = (
+        SpareSchema.objects.select_for_update(skip_locked=True)
+        .filter(version=version())
+        .order_by("pk")
+        .first()
+    )
+    if spare is None:
+        return False
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER SCHEMA {connection.ops.quote_name(spare.schema_name)} "
+                f"RENAME TO {connection.ops.quote_name(schema_name)}"
+            )
+    except ProgrammingError as err:
+        # a concurrent transaction renamed another spare schema to the same
+        # name, Postgres waits for it to commit and then fails this rename
+        if getattr(err.__cause__, "sqlstate", None) == DUPLICATE_SCHEMA:
+            raise SchemaTaken(schema_name) from err
+        raise
+    spare.delete()
+    return True
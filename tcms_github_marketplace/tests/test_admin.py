@@ -64,6 +64,64 @@ class PurchaseAdminTestCase(LoggedInTestCase):
         # timestamps are formatted according to localization
         self.assertContains(response, "Received on")
 
+    def test_changelist_shows_values_calculated_in_sql(self):
+        Purchase.objects.create(
+            vendor="fastspring",
+            action="test-admin-annotations",
+            sender="annotated@example.com",
+            effective_date=timezone.now(),
+            payload={
+                "data": {
+                    "quantity": 0,
+                    "subscription": {"quantity": 7},
+                },
+                "marketplace_purchase": {
+                    "plan": {
+                        "monthly_price_in_cents": 4399.999999999999,
+                    }
+                },
+            },
+        )
+
+        purchase = (
+            Purchase.objects.with_price_and_quantity()
+            .filter(action="test-admin-annotations")
+            .first()
+        )
+        self.assertEqual(purchase.quantity, purchase.unit_count)
+        self.assertEqual(purchase.quantity, 7)
+        self.assertEqual(int(purchase.monthly_price_in_cents / 100), 43)
+
+        self.tester.is_superuser = True
+        self.tester.save()
+
+        response = self.client.get(
+            reverse("admin:tcms_github_marketplace_purchase_changelist")
+        )
+        self.assertContains(response, "test-admin-annotations")
+        self.assertContains(response, '<td class="field-monthly_price">43</td>')
+        self.assertContains(response, '<td class="field-purchased_quantity">7</td>')
+
+    def test_changelist_filters_by_sender_prefix(self):
+        for sender in ("alice@example.com", "bob@example.com"):
+            Purchase.objects.create(
+                vendor="test-suite",
+                action=f"test-admin-filter-{sender}",
+                sender=sender,
+                effective_date=timezone.now(),
+                payload={},
+            )
+
+        self.tester.is_superuser = True
+        self.tester.save()
+
+        response = self.client.get(
+            reverse("admin:tcms_github_marketplace_purchase_changelist"),
+            {"sender": "alice@"},
+        )
+        self.assertContains(response, "test-admin-filter-alice@example.com")
+        self.assertNotContains(response, "test-admin-filter-bob@example.com")
+
     def test_add_not_possible(self):
         response = self.client.get(
             reverse("admin:tcms_github_marketplace_purchase_add")
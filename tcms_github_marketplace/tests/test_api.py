@@ -9,16 +9,23 @@
 import json
 from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from unittest.mock import patch
 
 from django import test
 from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
 from django.utils import timezone
 
 from tcms_tenants.tests import LoggedInTestCase
 
-from tcms_github_marketplace import api
+from tcms_github_marketplace import api, gitops_cache
 from tcms_github_marketplace.models import Purchase
 
+AUTH = {"HTTP_AUTHORIZATION": "Bearer secret"}
+
 
 class TestGitOpsAllow(test.TestCase):
     # WARNING: exercising the FUT directly instead of going through the
@@ -27,6 +34,7 @@ class TestGitOpsAllow(test.TestCase):
     def tearDown(self):
         Purchase.objects.all().delete()
         cache.clear()
+        gitops_cache.LOCAL.clear()
         super().tearDown()
 
     def test_when_no_purchase_matching_repo_then_result_is_false(self):
@@ -155,6 +163,130 @@ class TestGitOpsAllow(test.TestCase):
         result = api.gitops_allow("https://github.com/atodorov/testing-with-python")
         self.assertEqual(result, False)
 
+    def test_prefix_matches_whole_path_segments_ignoring_case(self):
+        Purchase.objects.create(
+            vendor="testing",
+            action="purchased",
+            gitops_prefix="https://GitHub.com/KiwiTCMS/",
+            sender="kiwitcms-bot@example.bg",
+            effective_date=timezone.now() - timedelta(days=13),
+            payload={
+                "marketplace_purchase": {
+                    "billing_cycle": "monthly",
+                    "plan": {
+                        "monthly_price_in_cents": 1500,
+                    },
+                }
+            },
+        )
+
+        result = api.gitops_allow("https://github.com/kiwitcms/Kiwi")
+        self.assertEqual(result, True)
+
+        # a different organization which starts with the same characters
+        result = api.gitops_allow("https://github.com/kiwitcms-fork/Kiwi")
+        self.assertEqual(result, False)
+
+    def test_equivalent_urls_share_cache_entry(self):
+        Purchase.objects.create(
+            vendor="testing",
+            action="purchased",
+            gitops_prefix="https://github.com/kiwitcms",
+            sender="kiwitcms-bot@example.bg",
+            effective_date=timezone.now() - timedelta(days=13),
+            payload={
+                "marketplace_purchase": {
+                    "billing_cycle": "monthly",
+                    "plan": {
+                        "monthly_price_in_cents": 1500,
+                    },
+                }
+            },
+        )
+
+        self.assertTrue(api.gitops_allow("https://github.com/KiwiTCMS/Kiwi"))
+
+        with self.assertNumQueries(0):
+            for repo_url in [
+                "https://github.com/kiwitcms/kiwi/",
+                "https://github.com/kiwitcms/kiwi.git",
+                "git@github.com:kiwitcms/Kiwi.git",
+            ]:
+                self.assertTrue(api.gitops_allow(repo_url))
+
+
+class TestWarmCache(test.TestCase):
+    def tearDown(self):
+        cache.clear()
+        gitops_cache.LOCAL.clear()
+        super().tearDown()
+
+    @staticmethod
+    def create_purchase(gitops_prefix, days_ago, price=1500):
+        Purchase.objects.create(
+            vendor="testing",
+            action="purchased",
+            gitops_prefix=gitops_prefix,
+            sender="kiwitcms-bot@example.bg",
+            effective_date=timezone.now() - timedelta(days=days_ago),
+            payload={
+                "marketplace_purchase": {
+                    "billing_cycle": "monthly",
+                    "plan": {
+                        "monthly_price_in_cents": price,
+                    },
+                }
+            },
+        )
+
+    def test_paid_prefixes_are_served_without_queries(self):
+        # expired, then renewed
+        self.create_purchase("https://github.com/kiwitcms", days_ago=40)
+        self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+        self.create_purchase("https://github.com/atodorov", days_ago=40)
+        self.create_purchase("https://github.com/free", days_ago=5, price=0)
+
+        output = StringIO()
+        call_command("warm_gitops_cache", chunk_size=1, stdout=output)
+        self.assertIn("Cached 2 prefixes", output.getvalue())
+
+        with self.assertNumQueries(0):
+            self.assertTrue(api.gitops_allow("https://github.com/kiwitcms/Kiwi"))
+
+        # expired or not cached, verified in the database
+        with self.assertNumQueries(1):
+            self.assertFalse(api.gitops_allow("https://github.com/atodorov/Kiwi"))
+        with self.assertNumQueries(1):
+            self.assertFalse(api.gitops_allow("https://github.com/free/Kiwi"))
+
+    def test_entries_do_not_expire(self):
+        self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+
+        with patch.object(cache, "set_many") as set_many:
+            api.warm_cache()
+
+        self.assertIsNone(set_many.call_args.kwargs["timeout"])
+
+    def test_not_used_unless_warmed_up_completely(self):
+        self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+        api.warm_cache()
+        cache.delete(gitops_cache.WARM_KEY)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(api.gitops_allow("https://github.com/kiwitcms/Kiwi"))
+
+    def test_changed_prefix_is_warmed_up_again(self):
+        self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+        api.warm_cache()
+
+        self.create_purchase("https://github.com/atodorov", days_ago=1)
+        api.gitops_prefix_changed("https://github.com/atodorov")
+
+        # invalidation doesn't discard the warm set
+        with self.assertNumQueries(0):
+            self.assertTrue(api.gitops_allow("https://github.com/kiwitcms/Kiwi"))
+            self.assertTrue(api.gitops_allow("https://github.com/atodorov/Kiwi"))
+
 
 class TestGitOpsAllowViaJsonRpc(LoggedInTestCase):
     # Exercises GitOps.allow through the /json-rpc/ HTTP endpoint,
@@ -165,12 +297,14 @@ class TestGitOpsAllowViaJsonRpc(LoggedInTestCase):
         super().setUpClass()
         Purchase.objects.all().delete()
         cache.clear()
+        gitops_cache.LOCAL.clear()
 
     @classmethod
     def tearDownClass(cls):
         super().tearDownClass()
         Purchase.objects.all().delete()
         cache.clear()
+        gitops_cache.LOCAL.clear()
 
     def _rpc_call(self, repo_url):
         response = self.client.post(
@@ -216,3 +350,180 @@ class TestGitOpsAllowViaJsonRpc(LoggedInTestCase):
         # trying for a different repository which will not match
         result = self._rpc_call("https://github.com/atodorov/testing-with-python")
         self.assertEqual(result, False)
+
+
+class TestGitOpsAllowView(LoggedInTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.url = reverse("github_marketplace_gitops_allow")
+
+    def tearDown(self):
+        Purchase.objects.all().delete()
+        cache.clear()
+        gitops_cache.LOCAL.clear()
+        super().tearDown()
+
+    def test_repo_url_is_required(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_allowed_until_end_of_paid_period(self):
+        Purchase.objects.create(
+            vendor="testing",
+            action="purchased",
+            gitops_prefix="https://github.com/kiwitcms",
+            sender="kiwitcms-bot@example.bg",
+            effective_date=timezone.now() - timedelta(days=23),
+            payload={
+                "marketplace_purchase": {
+                    "billing_cycle": "monthly",
+                    "plan": {
+                        "monthly_price_in_cents": 1500,
+                    },
+                }
+            },
+        )
+
+        response = self.client.get(
+            self.url, {"repo_url": "https://github.com/kiwitcms/Kiwi"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json(),
+            {"repo_url": "https://github.com/kiwitcms/kiwi", "allow": True},
+        )
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=3600", response["Cache-Control"])
+
+        # equivalent URL, same ETag
+        response = self.client.get(
+            self.url,
+            {"repo_url": "git@github.com:kiwitcms/Kiwi.git"},
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertIn("max-age=3600", response["Cache-Control"])
+
+    @override_settings(MARKETPLACE_GITOPS_MAX_AGE=600)
+    def test_denied_is_cached_briefly(self):
+        response = self.client.get(
+            self.url, {"repo_url": "https://github.com/atodorov/testing-with-python"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.json()["allow"])
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+
+@override_settings(MARKETPLACE_GITOPS_ALLOWLIST_TOKEN="secret")
+class TestGitOpsAllowList(LoggedInTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.url = reverse("github_marketplace_gitops_allowlist")
+
+    def tearDown(self):
+        Purchase.objects.all().delete()
+        super().tearDown()
+
+    @staticmethod
+    def create_purchase(gitops_prefix, days_ago, price=1500):
+        purchase = Purchase.objects.create(
+            vendor="testing",
+            action="purchased",
+            gitops_prefix=gitops_prefix,
+            sender="kiwitcms-bot@example.bg",
+            effective_date=timezone.now() - timedelta(days=days_ago),
+            payload={
+                "marketplace_purchase": {
+                    "billing_cycle": "monthly",
+                    "plan": {
+                        "monthly_price_in_cents": price,
+                    },
+                }
+            },
+        )
+        # older than api.ALLOWLIST_SETTLE
+        Purchase.objects.filter(pk=purchase.pk).update(
+            received_on=timezone.now() - timedelta(minutes=5)
+        )
+        return purchase
+
+    def test_snapshot_and_changes(self):
+        active = self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+        self.create_purchase("https://github.com/atodorov", days_ago=40)
+        free = self.create_purchase("https://github.com/free", days_ago=5, price=0)
+
+        response = self.client.get(self.url, **AUTH)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        snapshot = response.json()
+        self.assertEqual(snapshot["version"], free.pk)
+        self.assertEqual(
+            snapshot["prefixes"],
+            {
+                "https://github.com/kiwitcms": int(
+                    api.purchase_paid_until(active).timestamp()
+                )
+            },
+        )
+
+        # nothing changed
+        response = self.client.get(
+            self.url,
+            {"since": snapshot["version"]},
+            HTTP_IF_NONE_MATCH=f'"allowlist-{snapshot["version"]}-{snapshot["version"]}"',
+            **AUTH,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        renewed = self.create_purchase("https://github.com/atodorov", days_ago=1)
+
+        response = self.client.get(self.url, {"since": snapshot["version"]}, **AUTH)
+        self.assertEqual(
+            response.json(),
+            {
+                "version": renewed.pk,
+                "since": snapshot["version"],
+                "changes": {
+                    "https://github.com/atodorov": int(
+                        api.purchase_paid_until(renewed).timestamp()
+                    )
+                },
+            },
+        )
+
+    def test_expired_prefixes_are_removed_by_changes(self):
+        before = self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+        # a monthly subscription which has already expired
+        self.create_purchase("https://github.com/atodorov", days_ago=40)
+
+        response = self.client.get(self.url, {"since": before.pk}, **AUTH)
+        changes = response.json()["changes"]
+        self.assertEqual(changes, {"https://github.com/atodorov": None})
+
+    def test_requires_bearer_token(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(MARKETPLACE_GITOPS_ALLOWLIST_TOKEN=None)
+    def test_disabled_without_token(self):
+        response = self.client.get(self.url, **AUTH)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_not_stored_by_shared_caches(self):
+        response = self.client.get(self.url, **AUTH)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_recent_purchases_are_not_published_yet(self):
+        purchase = self.create_purchase("https://github.com/kiwitcms", days_ago=5)
+        Purchase.objects.filter(pk=purchase.pk).update(received_on=timezone.now())
+
+        response = self.client.get(self.url, **AUTH)
+        self.assertEqual(response.json(), {"version": 0, "prefixes": {}})
+
+    def test_since_must_be_an_integer(self):
+        response = self.client.get(self.url, {"since": "latest"}, **AUTH)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,150 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# -*- coding: utf-8 -*-
+# pylint: disable=too-many-ancestors
+
+from datetime import timedelta
+
+from django import test
+from django.core.management import call_command
+from django.utils import timezone
+
+from tcms_github_marketplace import archive
+from tcms_github_marketplace.models import ArchivedPayload, Purchase
+
+PAYLOAD = {
+    "action": "purchased",
+    "sender": {"login": "kiwitcms-bot", "email": "bot@example.com"},
+    "marketplace_purchase": {
+        "account": {"id": 9999, "type": "Organization", "login": "kiwitcms"},
+        "billing_cycle": "monthly",
+        "unit_count": 5,
+        "next_billing_date": "2024-10-16T00:00:00Z",
+        "plan": {
+            "id": 2,
+            "monthly_price_in_cents": 3200,
+            "bullets": ["Docker repositories: quay.io/kiwitcms/version"],
+        },
+    },
+}
+
+
+class TestCompact(test.SimpleTestCase):
+    def test_keeps_only_paths_used_in_queries(self):
+        result = archive.compact(
+            {
+                "type": "order.completed",
+                "data": {
+                    "quantity": 0,
+                    "sku": "x-tenant",
+                    "items": [{"quantity": 3, "sku": "x-tenant"}, {"quantity": 4}],
+                    "address": {"city": "Sofia"},
+                },
+            }
+        )
+
+        self.assertEqual(
+            result,
+            {
+                archive.ARCHIVED_KEY: True,
+                "type": "order.completed",
+                "data": {"quantity": 0, "items": [{"quantity": 3}]},
+            },
+        )
+        self.assertIs(archive.compact(result), result)
+
+    def test_compress_roundtrip(self):
+        for method in archive.COMPRESSION:
+            with self.subTest(method=method):
+                self.assertEqual(
+                    archive.decompress(archive.compress(PAYLOAD, method), method),
+                    PAYLOAD,
+                )
+
+
+class TestArchivePurchasePayloads(test.TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.old = Purchase.objects.create(
+            vendor="github",
+            action="purchased",
+            sender="bot@example.com",
+            effective_date=timezone.now() - timedelta(days=1500),
+            payload=PAYLOAD,
+        )
+        Purchase.objects.filter(pk=cls.old.pk).update(
+            received_on=timezone.now() - timedelta(days=1500)
+        )
+
+        # a 3-years subscription which is still active
+        cls.active = Purchase.objects.create(
+            vendor="github",
+            action="purchased",
+            sender="bot@example.com",
+            effective_date=timezone.now() - timedelta(days=800),
+            payload=PAYLOAD,
+        )
+        Purchase.objects.filter(pk=cls.active.pk).update(
+            received_on=timezone.now() - timedelta(days=800)
+        )
+
+        cls.recent = Purchase.objects.create(
+            vendor="github",
+            action="purchased",
+            sender="bot@example.com",
+            effective_date=timezone.now(),
+            payload=PAYLOAD,
+        )
+
+        call_command("archive_purchase_payloads")
+
+    def test_only_old_payloads_are_archived(self):
+        stored = dict(Purchase.objects.values_list("pk", "payload"))
+
+        self.assertEqual(stored[self.old.pk], archive.compact(PAYLOAD))
+        self.assertEqual(stored[self.active.pk], PAYLOAD)
+        self.assertEqual(stored[self.recent.pk], PAYLOAD)
+        self.assertEqual(
+            list(ArchivedPayload.objects.values_list("purchase_id", flat=True)),
+            [self.old.pk],
+        )
+
+    def test_payload_is_rehydrated_on_access(self):
+        purchase = Purchase.objects.get(pk=self.old.pk)
+
+        self.assertEqual(purchase.payload, PAYLOAD)
+        self.assertEqual(purchase.unit_count, 5)
+
+    def test_sql_annotations_use_inline_values(self):
+        purchase = Purchase.objects.with_price_and_quantity().get(pk=self.old.pk)
+
+        self.assertEqual(purchase.monthly_price_in_cents, 3200)
+        self.assertEqual(purchase.quantity, 5)
+
+    def test_saving_rehydrated_record_keeps_payload_archived(self):
+        purchase = Purchase.objects.get(pk=self.old.pk)
+        self.assertEqual(purchase.payload, PAYLOAD)
+
+        purchase.should_have_support = True
+        purchase.save()
+
+        self.assertEqual(
+            Purchase.objects.filter(pk=self.old.pk).values_list("payload", flat=True)[
+                0
+            ],
+            archive.compact(PAYLOAD),
+        )
+
+    def test_rehydrate_many(self):
+        purchases = list(Purchase.objects.order_by("pk"))
+
+        with self.assertNumQueries(1):
+            ArchivedPayload.rehydrate(purchases)
+            self.assertEqual(
+                [purchase.payload for purchase in purchases], [PAYLOAD] * 2
+            )
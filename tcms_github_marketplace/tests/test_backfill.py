@@ -0,0 +1,169 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+import importlib
+from io import StringIO
+from unittest.mock import patch
+
+from django import test
+from django.apps import apps
+from django.core.management import call_command
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from tcms_github_marketplace import backfill
+from tcms_github_marketplace.models import BackfillProgress, Purchase
+
+
+def create_purchase(subscription, vendor="fastspring"):
+    return Purchase.objects.create(
+        vendor=vendor,
+        action="order.completed",
+        sender="bot@example.com",
+        effective_date=timezone.now(),
+        subscription=subscription,
+        payload={
+            "sender": {"id": 1},
+            "marketplace_purchase": {"account": {"id": 2}},
+        },
+    )
+
+
+class TestBackfill(test.TestCase):
+    def setUp(self):
+        super().setUp()
+        # recorded by data migrations when the test DB was created
+        BackfillProgress.objects.all().delete()
+
+    def test_updates_in_batches(self):
+        for number in range(5):
+            create_purchase(f"sub-{number}")
+        create_purchase("fs-done")
+        create_purchase("gh-ignored", vendor="github")
+
+        output = StringIO()
+        with patch.object(
+            QuerySet, "bulk_update", autospec=True, wraps=QuerySet.bulk_update
+        ) as bulk_update:
+            call_command(
+                "run_backfill",
+                "prefix-fastspring-subscription-id",
+                batch_size=2,
+                stdout=output,
+            )
+
+        self.assertIn("Processed 5 rows, updated 5", output.getvalue())
+        self.assertEqual(bulk_update.call_count, 3)
+        for call in bulk_update.call_args_list:
+            self.assertEqual(call.args[2], ["subscription"])
+
+        self.assertEqual(
+            set(
+                Purchase.objects.filter(vendor="fastspring").values_list(
+                    "subscription", flat=True
+                )
+            ),
+            {"fs-sub-0", "fs-sub-1", "fs-sub-2", "fs-sub-3", "fs-sub-4", "fs-done"},
+        )
+
+        progress = BackfillProgress.objects.get(
+            name="prefix-fastspring-subscription-id"
+        )
+        self.assertIsNotNone(progress.finished_at)
+        self.assertEqual(progress.processed, 5)
+
+    def test_resumes_after_last_batch(self):
+        first = create_purchase("sub-1")
+        second = create_purchase("sub-2")
+        BackfillProgress.objects.create(
+            name="prefix-fastspring-subscription-id",
+            last_pk=first.pk,
+            processed=1,
+            updated=1,
+        )
+
+        self.assertEqual(
+            backfill.run("prefix-fastspring-subscription-id", batch_size=1), (2, 2)
+        )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        # skipped b/c it was before the recorded position
+        self.assertEqual(first.subscription, "sub-1")
+        self.assertEqual(second.subscription, "fs-sub-2")
+
+        # finished backfills are not executed again
+        create_purchase("sub-3")
+        self.assertEqual(backfill.run("prefix-fastspring-subscription-id"), (2, 2))
+
+        self.assertEqual(
+            backfill.run("prefix-fastspring-subscription-id", restart=True), (2, 2)
+        )
+        first.refresh_from_db()
+        self.assertEqual(first.subscription, "fs-sub-1")
+
+    def test_github_subscription_id(self):
+        purchase = create_purchase(None, vendor="github")
+
+        self.assertEqual(backfill.run("github-subscription-id", progress=False), (1, 1))
+
+        purchase.refresh_from_db()
+        self.assertEqual(purchase.subscription, "gh-1-2")
+        self.assertFalse(BackfillProgress.objects.exists())
+
+    def test_gitops_prefix_normalized(self):
+        purchase = create_purchase("fs-1")
+        Purchase.objects.filter(pk=purchase.pk).update(
+            gitops_prefix="https://GitHub.com/KiwiTCMS/"
+        )
+
+        self.assertEqual(backfill.run("gitops-prefix-normalized"), (1, 1))
+
+        purchase.refresh_from_db()
+        self.assertEqual(
+            purchase.gitops_prefix_normalized, "https://github.com/kiwitcms"
+        )
+
+
+class TestDataMigrations(test.TestCase):
+    migration = importlib.import_module(
+        "tcms_github_marketplace.migrations.0023_canonical_gitops_prefix"
+    )
+
+    def setUp(self):
+        super().setUp()
+        BackfillProgress.objects.all().delete()
+
+    def test_resumes_from_checkpoint(self):
+        first = create_purchase("fs-1")
+        second = create_purchase("fs-2")
+        Purchase.objects.update(
+            gitops_prefix="git@github.com:KiwiTCMS/Kiwi.git",
+            gitops_prefix_normalized=None,
+        )
+        # a previous deployment was interrupted after the first batch
+        BackfillProgress.objects.create(
+            name=self.migration.CanonicalGitOpsPrefix.name,
+            last_pk=first.pk,
+            processed=1,
+            updated=1,
+        )
+
+        self.migration.forwards(apps, None)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertIsNone(first.gitops_prefix_normalized)
+        self.assertEqual(
+            second.gitops_prefix_normalized, "https://github.com/kiwitcms/kiwi"
+        )
+
+        progress = BackfillProgress.objects.get(
+            name=self.migration.CanonicalGitOpsPrefix.name
+        )
+        self.assertEqual(progress.processed, 2)
+        self.assertIsNotNone(progress.finished_at)
@@ -0,0 +1,258 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import requests
+from django import test
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from tcms_github_marketplace import circuit, docker, fury, utils
+from tcms_github_marketplace.models import PrivateRepoToken, RetryTask
+
+from test_project.fake_servers import FakeQuay
+
+
+class TestCircuitBreaker(test.SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.breaker = circuit.CircuitBreaker(
+            "testing", failure_threshold=2, reset_timeout=60
+        )
+        self.breaker.reset()
+
+    def tearDown(self):
+        self.breaker.reset()
+        super().tearDown()
+
+    def test_opens_after_failure_threshold(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.breaker.before_request()
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        with self.assertRaises(circuit.CircuitOpen):
+            self.breaker.before_request()
+
+    def test_half_open_allows_a_single_probe(self):
+        self.breaker.trip()
+        # simulate reset_timeout passing
+        cache.delete("circuit-breaker-testing-open")
+        self.assertEqual(self.breaker.state, circuit.HALF_OPEN)
+
+        self.breaker.before_request()
+        with self.assertRaises(circuit.CircuitOpen):
+            self.breaker.before_request()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.breaker.before_request()
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+    def test_failure_count_reset_concurrently(self):
+        with patch("django.core.cache.cache.incr", side_effect=ValueError):
+            self.breaker.record_failure()
+
+        self.assertEqual(cache.get("circuit-breaker-testing-failures"), 1)
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+    def test_failed_probe_opens_again(self):
+        self.breaker.trip()
+        cache.delete("circuit-breaker-testing-open")
+
+        self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+
+
+class TestCircuitBreakerAdapter(test.SimpleTestCase):
+    def tearDown(self):
+        circuit.QUAY.reset()
+        super().tearDown()
+
+    def test_fails_fast_while_quay_is_down(self):
+        with FakeQuay(failure_rate=1.0) as quay, override_settings(
+            QUAY_IO_HOST=quay.url, QUAY_IO_TOKEN="fake"
+        ):
+            for _ in range(circuit.QUAY.failure_threshold):
+                with docker.QuayIOAccount("fs-subscription") as account:
+                    # don't wait for the real backoff
+                    account.api.session.session.adapters[
+                        "http://"
+                    ].max_retries.backoff_factor = 0
+
+                    with self.assertRaises(requests.exceptions.RetryError):
+                        account.create()
+
+            sent = len(quay.requests)
+            with docker.QuayIOAccount("fs-subscription") as account:
+                with self.assertRaises(circuit.CircuitOpen):
+                    account.create()
+
+            # nothing was sent to the upstream
+            self.assertEqual(len(quay.requests), sent)
+
+    def test_requests_have_timeout_and_few_retries(self):
+        with docker.QuayIOAccount("fs-subscription") as account, override_settings(
+            QUAY_IO_TOKEN="fake"
+        ):
+            adapter = account.api.session.session.get_adapter("https://")
+
+            self.assertEqual(adapter.max_retries.total, circuit.QUAY.retries)
+            self.assertLessEqual(adapter.max_retries.backoff_factor, 0.5)
+
+            with patch.object(
+                requests.adapters.HTTPAdapter, "send"
+            ) as send, patch.object(circuit.QUAY, "record_success"):
+                send.return_value.status_code = 200
+                adapter.send(requests.Request("GET", "https://quay.io").prepare())
+
+            self.assertEqual(send.call_args.kwargs["timeout"], circuit.QUAY.timeout)
+
+
+class TestRetryQueue(test.TestCase):
+    def tearDown(self):
+        circuit.QUAY.reset()
+        super().tearDown()
+
+    def test_work_is_deferred_while_circuit_is_open(self):
+        circuit.QUAY.trip()
+
+        # nothing is sent to Quay.io while the circuit is open
+        self.assertIsNone(
+            utils.call_or_defer("delete_quay_account", subscription_id="fs-123")
+        )
+
+        task = RetryTask.objects.get(action="delete_quay_account")
+        self.assertEqual(task.arguments, {"subscription_id": "fs-123"})
+        self.assertIn("open", task.last_error)
+
+    def test_successful_tasks_are_deleted(self):
+        RetryTask.objects.create(
+            action="delete_quay_account", arguments={"subscription_id": "fs-123"}
+        )
+
+        with patch.object(docker.QuayIOAccount, "delete") as quay_io_delete:
+            self.assertEqual(utils.process_retry_queue(), (1, 0))
+            quay_io_delete.assert_called_once()
+
+        self.assertFalse(RetryTask.objects.exists())
+
+    def test_failed_tasks_are_rescheduled(self):
+        task = RetryTask.objects.create(
+            action="delete_quay_account", arguments={"subscription_id": "fs-123"}
+        )
+
+        with patch.object(
+            docker.QuayIOAccount, "delete", side_effect=RuntimeError("boom")
+        ):
+            self.assertEqual(utils.process_retry_queue(), (0, 1))
+
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(task.last_error, "boom")
+        self.assertGreater(task.run_after, timezone.now())
+
+        # not due yet
+        self.assertEqual(utils.process_retry_queue(), (0, 0))
+
+    def test_open_circuit_is_not_counted_as_attempt(self):
+        task = RetryTask.objects.create(
+            action="delete_quay_account", arguments={"subscription_id": "fs-123"}
+        )
+        circuit.QUAY.trip()
+
+        self.assertEqual(utils.process_retry_queue(), (0, 1))
+
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 0)
+        self.assertGreater(
+            task.run_after,
+            timezone.now() + timedelta(seconds=circuit.QUAY.reset_timeout - 5),
+        )
+
+    def test_gives_up_after_max_attempts(self):
+        task = RetryTask.objects.create(
+            action="delete_quay_account",
+            arguments={"subscription_id": "fs-123"},
+            attempts=utils.RETRY_MAX_ATTEMPTS - 1,
+        )
+
+        with patch.object(
+            docker.QuayIOAccount, "delete", side_effect=RuntimeError("boom")
+        ):
+            self.assertEqual(utils.process_retry_queue(), (0, 1))
+
+            # due again but not retried anymore
+            RetryTask.objects.filter(pk=task.pk).update(run_after=timezone.now())
+            self.assertEqual(utils.process_retry_queue(), (0, 0))
+
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, utils.RETRY_MAX_ATTEMPTS)
+
+    def test_task_is_leased_while_executed(self):
+        task = RetryTask.objects.create(
+            action="delete_quay_account", arguments={"subscription_id": "fs-123"}
+        )
+
+        def delete():
+            # another worker doesn't see the task which is being executed
+            self.assertIsNone(
+                utils._claim_retry_task()
+            )  # pylint: disable=protected-access
+            task.refresh_from_db()
+            self.assertGreater(task.run_after, timezone.now())
+
+        with patch.object(docker.QuayIOAccount, "delete", side_effect=delete):
+            self.assertEqual(utils.process_retry_queue(), (1, 0))
+
+    def test_create_repo_token_is_idempotent(self):
+        token = PrivateRepoToken.objects.create(
+            vendor="gemfury", subscription="fs-123", payload={"token_value": "secret"}
+        )
+
+        with patch.object(fury.GemfuryAPI, "create_token") as create_token:
+            self.assertEqual(utils.create_repo_token(subscription_id="fs-123"), token)
+            create_token.assert_not_called()
+
+    def test_create_repo_token_makes_a_single_request(self):
+        with patch.object(
+            fury.GemfuryAPI, "delete_token"
+        ) as delete_token, patch.object(
+            fury.GemfuryAPI, "create_token", return_value={"token_value": "secret"}
+        ):
+            token = utils.create_repo_token(subscription_id="fs-123")
+
+        delete_token.assert_not_called()
+        self.assertEqual(token.token, "secret")
+
+    def test_retried_create_repo_token_replaces_unrecorded_token(self):
+        RetryTask.objects.create(
+            action="create_repo_token", arguments={"subscription_id": "fs-123"}
+        )
+
+        with patch.object(
+            fury.GemfuryAPI, "delete_token"
+        ) as delete_token, patch.object(
+            fury.GemfuryAPI, "create_token", return_value={"token_value": "secret"}
+        ):
+            self.assertEqual(utils.process_retry_queue(), (1, 0))
+
+        delete_token.assert_called_once_with("fs-123")
+        self.assertEqual(
+            PrivateRepoToken.objects.get(subscription="fs-123").token, "secret"
+        )
@@ -0,0 +1,139 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.admin import helpers
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from tcms_tenants.tests import LoggedInTestCase
+
+from tcms_github_marketplace import export
+from tcms_github_marketplace.models import Purchase
+
+
+class ExportTestCase(LoggedInTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.fastspring = Purchase.objects.create(
+            vendor="fastspring",
+            action="purchased",
+            sender="accounting@example.com",
+            subscription="fs-export",
+            effective_date=timezone.now(),
+            payload={
+                "data": {
+                    "sku": "x-tenant+version",
+                    "quantity": 3,
+                },
+                "marketplace_purchase": {
+                    "billing_cycle": "monthly",
+                    "next_billing_date": "2026-11-05T00:00:00",
+                    "plan": {
+                        "monthly_price_in_cents": 5000,
+                    },
+                },
+            },
+        )
+
+        cls.manual = Purchase.objects.create(
+            vendor="manual_purchase",
+            action="cancelled",
+            sender="accounting@example.com",
+            subscription="man-export",
+            effective_date=timezone.now(),
+            payload={
+                "data": {"sku": "x-tenant+version+enterprise"},
+                "marketplace_purchase": {
+                    "unit_count": 1,
+                    "billing_cycle": "yearly",
+                    "plan": {
+                        "monthly_price_in_cents": 40000,
+                    },
+                },
+            },
+        )
+
+    def test_ndjson_contains_derived_columns(self):
+        queryset = export.filter_purchases(vendor="fastspring").filter(
+            sender="accounting@example.com"
+        )
+        rows = [json.loads(line) for line in export.as_ndjson(queryset)]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.fastspring.pk)
+        self.assertEqual(rows[0]["unit_count"], 3)
+        self.assertEqual(rows[0]["monthly_price"], 50)
+        self.assertEqual(rows[0]["sku"], "x-tenant+version")
+        self.assertEqual(rows[0]["next_billing_date"], "2026-11-05T00:00:00")
+
+    def test_csv_has_header_and_rows(self):
+        queryset = export.filter_purchases(
+            action="cancelled",
+            since=timezone.now() - timedelta(days=1),
+            until=timezone.now() + timedelta(days=1),
+        ).filter(sender="accounting@example.com")
+        rows = list(csv.DictReader(io.StringIO("".join(export.as_csv(queryset)))))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(self.manual.pk))
+        self.assertEqual(rows[0]["unit_count"], "1")
+        self.assertEqual(rows[0]["monthly_price"], "400")
+        self.assertEqual(rows[0]["sku"], "x-tenant+version+enterprise")
+        self.assertEqual(rows[0]["next_billing_date"], "")
+
+    def test_date_range_excludes_records(self):
+        queryset = export.filter_purchases(
+            until=timezone.now() - timedelta(days=1)
+        ).filter(sender="accounting@example.com")
+        self.assertEqual(list(export.as_ndjson(queryset)), [])
+
+    def test_management_command(self):
+        output = io.StringIO()
+        call_command(
+            "export_purchases",
+            "--format",
+            "ndjson",
+            "--vendor",
+            "manual_purchase",
+            stdout=output,
+        )
+
+        ids = [json.loads(line)["id"] for line in output.getvalue().splitlines()]
+        self.assertIn(self.manual.pk, ids)
+        self.assertNotIn(self.fastspring.pk, ids)
+
+    def test_admin_action(self):
+        self.tester.is_superuser = True
+        self.tester.save()
+
+        try:
+            response = self.client.post(
+                reverse("admin:tcms_github_marketplace_purchase_changelist"),
+                {
+                    "action": "export_as_csv",
+                    helpers.ACTION_CHECKBOX_NAME: [self.fastspring.pk, self.manual.pk],
+                },
+            )
+        finally:
+            self.tester.is_superuser = False
+            self.tester.save()
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            sorted(int(row["id"]) for row in rows),
+            sorted([self.fastspring.pk, self.manual.pk]),
+        )
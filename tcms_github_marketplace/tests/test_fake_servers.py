@@ -0,0 +1,86 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+import requests
+from django import test
+from django.test import override_settings
+
+from tcms_github_marketplace import docker, fury, mailchimp
+
+from test_project.fake_servers import FakeGemfury, FakeMailChimp, FakeQuay
+
+
+class TestQuayIOAccountWithFakeServer(test.SimpleTestCase):
+    def test_robot_account_lifecycle(self):
+        with FakeQuay() as quay, override_settings(
+            QUAY_IO_HOST=quay.url, QUAY_IO_TOKEN="fake"
+        ):
+            with docker.QuayIOAccount("fs-subscription") as account:
+                account.create()
+                self.assertEqual(account.username, "kiwitcms+fs_subscription")
+                self.assertNotEqual(account.token, "")
+
+                account.allow_read_access("version")
+                self.assertEqual(
+                    quay.permissions,
+                    {("kiwitcms/version", "kiwitcms+fs_subscription"): "read"},
+                )
+
+                account.delete()
+                self.assertEqual(quay.robots, {})
+
+    def test_injected_failures_are_retried(self):
+        with FakeQuay(failure_rate=1.0) as quay, override_settings(
+            QUAY_IO_HOST=quay.url, QUAY_IO_TOKEN="fake"
+        ):
+            with docker.QuayIOAccount("fs-subscription") as account:
+                # don't wait for the real backoff
+                account.api.session.session.adapters[
+                    "http://"
+                ].max_retries.backoff_factor = 0
+
+                with self.assertRaises(requests.exceptions.RetryError):
+                    account.create()
+
+        # 1 initial request + 3 retries
+        self.assertEqual(len(quay.requests), 4)
+
+
+class TestGemfuryAPIWithFakeServer(test.SimpleTestCase):
+    def test_find_token_follows_pagination(self):
+        with FakeGemfury(page_size=2) as gemfury, override_settings(
+            GEMFURY_API_URL=f"{gemfury.url}/1"
+        ):
+            api = fury.GemfuryAPI("fake")
+            for number in range(5):
+                api.create_token(f"fs-{number}")
+
+            token = api.find_token("fs-4")
+            self.assertEqual(token["description"], "fs-4")
+
+            api.delete_token("fs-4")
+            self.assertIsNone(api.find_token("fs-4"))
+            self.assertEqual(len(gemfury.tokens), 4)
+
+
+class TestMailChimpWithFakeServer(test.TestCase):
+    def test_subscribe(self):
+        with FakeMailChimp() as server, override_settings(
+            MAILCHIMP_API_URL=f"{server.url}/3.0/",
+            MAILCHIMP_SECRET="0" * 32 + "-us1",
+            MAILCHIMP_USERNAME="kiwitcms",
+        ):
+            mailchimp.subscribe("bob@example.com")
+            # duplicates are ignored
+            mailchimp.subscribe("Bob@example.com")
+            # nothing is sent until the queue is flushed
+            self.assertEqual(server.requests, [])
+
+            self.assertEqual(mailchimp.flush(), 1)
+
+        self.assertEqual(list(server.members["c970a37581"]), ["bob@example.com"])
+        self.assertEqual(len(server.requests), 1)
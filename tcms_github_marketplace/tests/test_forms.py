@@ -200,6 +200,15 @@ class TestUpdateGitopsPrefixForm(test.TestCase):
         )
         self.assertTrue(form.is_valid())
 
+        # stored in canonical form
+        form = forms.UpdateGitopsPrefixForm(
+            {"gitops_prefix": "git@Git.Example.bg:Group/"}, instance=purchase
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(
+            form.cleaned_data["gitops_prefix"], "https://git.example.bg/group"
+        )
+
     def test_fastspring_private_tenant_should_accept_only_github_com_urls(self):
         purchase = Purchase.objects.create(
             vendor="fastspring",
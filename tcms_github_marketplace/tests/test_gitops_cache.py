@@ -0,0 +1,80 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from django import test
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tcms_github_marketplace import gitops_cache
+
+
+class TestLocalCache(test.SimpleTestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        local = gitops_cache.LocalCache(max_size=2, ttl=60)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+
+        self.assertEqual(local.get("a"), 1)
+        self.assertIsNone(local.get("b"))
+        self.assertEqual(local.get("c"), 3)
+        self.assertEqual(len(local), 2)
+
+    def test_entries_expire(self):
+        local = gitops_cache.LocalCache(max_size=2, ttl=-1)
+        local.set("a", False)
+
+        self.assertIsNone(local.get("a"))
+        self.assertEqual(len(local), 0)
+
+
+class TestGitOpsCache(test.TestCase):
+    def tearDown(self):
+        cache.clear()
+        gitops_cache.LOCAL.clear()
+        super().tearDown()
+
+    def test_local_hit_skips_shared_cache(self):
+        gitops_cache.set("https://github.com/kiwitcms/Kiwi", True)
+        # simulate another node evicting the shared entry
+        cache.clear()
+
+        self.assertTrue(gitops_cache.get("https://github.com/kiwitcms/kiwi.git"))
+
+    def test_shared_hit_populates_local_cache(self):
+        gitops_cache.set("https://github.com/kiwitcms/Kiwi", False)
+        gitops_cache.LOCAL.clear()
+
+        self.assertFalse(gitops_cache.get("https://github.com/kiwitcms/Kiwi"))
+        self.assertFalse(
+            gitops_cache.LOCAL.get(
+                gitops_cache.cache_key("https://github.com/kiwitcms/Kiwi")
+            )
+        )
+
+    def test_invalidate(self):
+        gitops_cache.set("https://github.com/kiwitcms/Kiwi", True)
+
+        with CaptureQueriesContext(connection) as context:
+            gitops_cache.invalidate()
+
+        self.assertTrue(
+            any("pg_notify" in query["sql"] for query in context.captured_queries)
+        )
+        self.assertEqual(gitops_cache.generation(), 1)
+        self.assertIsNone(gitops_cache.get("https://github.com/kiwitcms/Kiwi"))
+
+    def test_notification_clears_local_cache(self):
+        gitops_cache.set("https://github.com/kiwitcms/Kiwi", True)
+        cache.clear()
+
+        gitops_cache.on_notify("7")
+
+        self.assertIsNone(gitops_cache.get("https://github.com/kiwitcms/Kiwi"))
+        self.assertEqual(gitops_cache.generation(), 7)
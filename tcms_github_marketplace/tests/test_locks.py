@@ -0,0 +1,76 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from unittest.mock import patch
+
+from django import test
+from django.db import OperationalError, connections
+
+from tcms_github_marketplace import locks
+
+
+class TestAdvisoryLock(test.TestCase):
+    def setUp(self):
+        super().setUp()
+        # advisory locks are re-entrant within the same session, other
+        # workers are simulated with a separate connection
+        self.other = connections.create_connection("default")
+
+    def tearDown(self):
+        self.other.close()
+        super().tearDown()
+
+    def hold(self, name):
+        with self.other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [locks.lock_key(name)])
+
+    def test_lock_key_is_stable_and_signed_64bit(self):
+        key = locks.lock_key("subscription-1")
+
+        self.assertEqual(key, locks.lock_key("subscription-1"))
+        self.assertNotEqual(key, locks.lock_key("subscription-2"))
+        self.assertTrue(-(2**63) <= key < 2**63)
+
+    def test_acquire_and_release(self):
+        with locks.AdvisoryLock("subscription-1", timeout=0):
+            pass
+
+        # released, can be acquired again
+        with locks.AdvisoryLock("subscription-1", timeout=0):
+            pass
+
+    def test_raises_timeout_when_held_by_another_session(self):
+        self.hold("subscription-1")
+
+        with self.assertRaises(locks.LockTimeout):
+            locks.AdvisoryLock("subscription-1", timeout=0.05).acquire()
+
+    def test_different_subscriptions_do_not_block(self):
+        self.hold("subscription-1")
+
+        with locks.AdvisoryLock("subscription-2", timeout=0):
+            pass
+
+    def test_release_does_not_raise_when_connection_is_broken(self):
+        lock = locks.AdvisoryLock("subscription-1", timeout=0)
+        lock.acquire()
+
+        with patch.object(
+            lock, "_execute", side_effect=OperationalError("connection lost")
+        ):
+            with self.assertLogs("tcms_github_marketplace.locks", "WARNING"):
+                # called from __exit__ while handling the original exception
+                lock.release()
+
+        # the real lock is still held, clean up
+        lock.release()
+
+    def test_release_when_not_held_logs_warning(self):
+        with self.assertLogs("tcms_github_marketplace.locks", "WARNING") as logs:
+            locks.AdvisoryLock("subscription-1", timeout=0).release()
+
+        self.assertIn("was not held", logs.output[0])
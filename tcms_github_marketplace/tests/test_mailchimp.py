@@ -0,0 +1,125 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from io import StringIO
+from unittest.mock import patch
+
+from django import test
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from tcms_github_marketplace import mailchimp
+from tcms_github_marketplace.models import NewsletterSubscription
+
+from test_project.fake_servers import FakeMailChimp
+
+
+class TestFlush(test.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = FakeMailChimp().start()
+        self.settings = override_settings(
+            MAILCHIMP_API_URL=f"{self.server.url}/3.0/",
+            MAILCHIMP_SECRET="0" * 32 + "-us1",
+            MAILCHIMP_USERNAME="kiwitcms",
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.server.stop()
+        super().tearDown()
+
+    def status_of(self, email):
+        return NewsletterSubscription.objects.get(email=email).status
+
+    def test_addresses_are_sent_in_batches(self):
+        for number in range(5):
+            mailchimp.subscribe(f"user-{number}@example.com")
+
+        output = StringIO()
+        call_command("flush_newsletter_subscriptions", batch_size=2, stdout=output)
+
+        self.assertIn("Processed 5 addresses", output.getvalue())
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.server.members[mailchimp.LIST_ID]), 5)
+        self.assertFalse(
+            NewsletterSubscription.objects.exclude(status="subscribed").exists()
+        )
+
+        # nothing left to do
+        self.assertEqual(mailchimp.flush(), 0)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_existing_members_are_considered_subscribed(self):
+        self.server.members[mailchimp.LIST_ID] = {
+            "bob@example.com": {"email_address": "bob@example.com"}
+        }
+        mailchimp.subscribe("bob@example.com")
+
+        mailchimp.flush()
+        self.assertEqual(self.status_of("bob@example.com"), "subscribed")
+
+    def test_invalid_addresses_fail_without_breaking_the_batch(self):
+        mailchimp.subscribe("not-an-email")
+        mailchimp.subscribe("bob@example.com")
+
+        mailchimp.flush()
+        self.assertEqual(self.status_of("not-an-email"), "failed")
+        self.assertEqual(self.status_of("bob@example.com"), "subscribed")
+
+    def test_upstream_errors_are_retried(self):
+        mailchimp.subscribe("bob@example.com")
+        self.server.failure_rate = 1.0
+
+        for attempt in range(1, mailchimp.MAX_ATTEMPTS):
+            mailchimp.flush()
+            subscription = NewsletterSubscription.objects.get()
+            self.assertEqual(subscription.status, "queued")
+            self.assertEqual(subscription.attempts, attempt)
+            self.assertNotEqual(subscription.last_error, "")
+
+        mailchimp.flush()
+        self.assertEqual(self.status_of("bob@example.com"), "failed")
+
+    def test_leased_addresses_are_skipped(self):
+        mailchimp.subscribe("bob@example.com")
+        NewsletterSubscription.objects.update(
+            leased_until=timezone.now() + mailchimp.LEASE
+        )
+
+        # another worker is sending it
+        self.assertEqual(mailchimp.flush(), 0)
+        self.assertEqual(len(self.server.requests), 0)
+
+        # the other worker died
+        NewsletterSubscription.objects.update(leased_until=timezone.now())
+        self.assertEqual(mailchimp.flush(), 1)
+        self.assertEqual(self.status_of("bob@example.com"), "subscribed")
+        self.assertIsNone(NewsletterSubscription.objects.get().leased_until)
+
+    def test_batch_is_leased_while_sent(self):
+        mailchimp.subscribe("bob@example.com")
+
+        def update_members(*args, **kwargs):  # pylint: disable=unused-argument
+            # other workers don't see the leased batch
+            self.assertEqual(
+                mailchimp._claim_batch(  # pylint: disable=protected-access
+                    mailchimp.BATCH_SIZE, 0
+                ),
+                [],
+            )
+            return {}
+
+        with patch(
+            "mailchimp3.entities.lists.Lists.update_members",
+            side_effect=update_members,
+        ):
+            self.assertEqual(mailchimp.flush(), 1)
+
+        self.assertEqual(self.status_of("bob@example.com"), "subscribed")
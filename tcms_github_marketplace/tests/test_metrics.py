@@ -0,0 +1,209 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from http import HTTPStatus
+from io import StringIO
+
+from django import test
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+import tcms_tenants
+
+from tcms_github_marketplace import docker, fury, metrics, views
+
+from test_project.fake_servers import FakeGemfury, FakeQuay
+
+PROMETHEUS = override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "metrics": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "marketplace-metrics-tests",
+        },
+    },
+    MARKETPLACE_METRICS_BACKEND="tcms_github_marketplace.metrics.PrometheusBackend",
+    MARKETPLACE_METRICS_CACHE="metrics",
+)
+
+
+@PROMETHEUS
+class TestPrometheusBackend(test.SimpleTestCase):
+    def tearDown(self):
+        metrics.backend().cache.clear()
+        super().tearDown()
+
+    def test_default_backend_is_noop(self):
+        with override_settings(MARKETPLACE_METRICS_BACKEND=metrics.DEFAULT_BACKEND):
+            metrics.increment("ignored_total")
+            self.assertEqual(metrics.backend().render(), "")
+
+    def test_counters(self):
+        metrics.increment("requests_total", vendor="github")
+        metrics.increment("requests_total", 2, vendor="github")
+        metrics.increment("requests_total", vendor="fastspring")
+
+        output = metrics.backend().render()
+        self.assertIn("# TYPE requests_total counter", output)
+        self.assertIn('requests_total{vendor="github"} 3', output)
+        self.assertIn('requests_total{vendor="fastspring"} 1', output)
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.observe("stage_seconds", 0.003, stage="quay")
+        metrics.observe("stage_seconds", 0.2, stage="quay")
+        metrics.observe("stage_seconds", 60, stage="quay")
+
+        output = metrics.backend().render()
+        self.assertIn("# TYPE stage_seconds histogram", output)
+        self.assertIn('stage_seconds_bucket{le="0.005",stage="quay"} 1', output)
+        self.assertIn('stage_seconds_bucket{le="0.1",stage="quay"} 1', output)
+        self.assertIn('stage_seconds_bucket{le="0.25",stage="quay"} 2', output)
+        self.assertIn('stage_seconds_bucket{le="+Inf",stage="quay"} 3', output)
+        self.assertIn('stage_seconds_sum{stage="quay"} 60.203', output)
+        self.assertIn('stage_seconds_count{stage="quay"} 3', output)
+
+    def test_label_values_are_escaped(self):
+        metrics.increment("requests_total", vendor='say "hi"')
+
+        self.assertIn(
+            'requests_total{vendor="say \\"hi\\""} 1', metrics.backend().render()
+        )
+
+    def test_series_are_registered_again_after_cache_clear(self):
+        metrics.increment("requests_total", vendor="github")
+        metrics.backend().cache.clear()
+        metrics.increment("requests_total", vendor="github")
+
+        self.assertIn('requests_total{vendor="github"} 1', metrics.backend().render())
+
+    def test_timer_counts_errors(self):
+        with self.assertRaises(RuntimeError):
+            with metrics.timer("stage_seconds", stage="quay"):
+                raise RuntimeError("boom")
+
+        output = metrics.backend().render()
+        self.assertIn('stage_errors_total{stage="quay"} 1', output)
+        self.assertIn('stage_seconds_count{stage="quay"} 1', output)
+
+
+@PROMETHEUS
+class TestOutboundMetrics(test.SimpleTestCase):
+    def tearDown(self):
+        metrics.backend().cache.clear()
+        super().tearDown()
+
+    def dump_metrics(self):
+        output = StringIO()
+        call_command("dump_metrics", prefix="marketplace_outbound_", stdout=output)
+        return output.getvalue()
+
+    def test_gemfury_endpoints_are_normalized(self):
+        with FakeGemfury() as gemfury, override_settings(
+            GEMFURY_API_URL=f"{gemfury.url}/1"
+        ):
+            api = fury.GemfuryAPI("fake")
+            api.create_token("fs-subscription")
+            api.delete_token("fs-subscription")
+
+        output = self.dump_metrics()
+        self.assertIn(
+            f"{metrics.OUTBOUND_REQUESTS_TOTAL}"
+            '{endpoint="tokens",method="POST",service="gemfury",status="200"} 1',
+            output,
+        )
+        self.assertIn(
+            f"{metrics.OUTBOUND_REQUESTS_TOTAL}"
+            '{endpoint="token",method="DELETE",service="gemfury",status="204"} 1',
+            output,
+        )
+        self.assertIn(
+            f"{metrics.OUTBOUND_REQUEST_SECONDS}_count"
+            '{endpoint="tokens",method="GET",service="gemfury"} 1',
+            output,
+        )
+        self.assertNotIn("fs-subscription", output)
+        self.assertNotIn(metrics.WEBHOOK_REQUESTS_TOTAL, output)
+
+    def test_quay_retries_are_counted(self):
+        # with this seed the first request fails and is retried
+        with FakeQuay(failure_rate=0.5, seed=9) as quay, override_settings(
+            QUAY_IO_HOST=quay.url, QUAY_IO_TOKEN="fake"
+        ):
+            with docker.QuayIOAccount("fs-subscription") as account:
+                # don't wait for the real backoff
+                account.api.session.session.adapters[
+                    "http://"
+                ].max_retries.backoff_factor = 0
+                account.create()
+
+        self.assertEqual(len(quay.requests), 2)
+
+        output = self.dump_metrics()
+        self.assertIn(
+            f"{metrics.OUTBOUND_REQUESTS_TOTAL}"
+            '{endpoint="robot",method="PUT",service="quay",status="201"} 1',
+            output,
+        )
+        self.assertIn(
+            f"{metrics.OUTBOUND_RETRIES_TOTAL}"
+            '{endpoint="robot",method="PUT",service="quay"} 1',
+            output,
+        )
+
+    def test_dump_metrics_when_disabled(self):
+        output = StringIO()
+        with override_settings(MARKETPLACE_METRICS_BACKEND=metrics.DEFAULT_BACKEND):
+            call_command("dump_metrics", stdout=output, stderr=output)
+
+        self.assertIn("Metrics are disabled", output.getvalue())
+
+
+@PROMETHEUS
+class TestMetricsView(tcms_tenants.tests.LoggedInTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.url = reverse("github_marketplace_metrics")
+
+    def tearDown(self):
+        metrics.backend().cache.clear()
+        super().tearDown()
+
+    def test_disabled_without_token(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_is_csrf_exempt(self):
+        self.assertTrue(views.Metrics.as_view().csrf_exempt)
+
+    @override_settings(MARKETPLACE_METRICS_TOKEN="secret")
+    def test_requires_bearer_token(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(MARKETPLACE_METRICS_TOKEN="secret")
+    def test_rejected_webhook_is_reported(self):
+        # missing signature
+        self.client.post(
+            reverse("github_marketplace_purchase_hook"),
+            "{}",
+            content_type="application/json",
+        )
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        self.assertContains(
+            response,
+            f'{metrics.WEBHOOK_REQUESTS_TOTAL}{{outcome="rejected",vendor="github"}} 1',
+        )
+        self.assertContains(
+            response,
+            f"{metrics.WEBHOOK_STAGE_SECONDS}_count"
+            '{event_type="",stage="verify_signature",vendor="github"} 1',
+        )
@@ -0,0 +1,125 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from io import StringIO
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django import test
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from tcms_github_marketplace import outbox, utils
+from tcms_github_marketplace.models import OutgoingEmail, Purchase
+
+TEMPLATE = "tcms_github_marketplace/email/exit_poll.txt"
+
+
+class TestOutbox(test.TestCase):
+    def test_messages_are_queued(self):
+        outbox.mailto(
+            TEMPLATE,
+            "Exit poll",
+            ["bob@example.com", "bob@example.com", "alice@example.com"],
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, ["alice@example.com", "bob@example.com"])
+        self.assertIsNone(email.sent_at)
+
+    def test_duplicates_are_queued_once(self):
+        for _ in range(3):
+            outbox.mailto(
+                TEMPLATE, "Exit poll", ["bob@example.com"], dedup_key="exit-poll-fs-1"
+            )
+
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    @patch("tcms_github_marketplace.utils.call_or_defer")
+    def test_exit_poll_is_sent_for_every_cancellation(self, _call_or_defer):
+        # the customer cancels, subscribes again and cancels again
+        for _ in range(2):
+            purchase = Purchase.objects.create(
+                vendor="fastspring",
+                action="subscription.deactivated",
+                sender="bob@example.com",
+                effective_date=timezone.now(),
+                subscription="fs-1",
+                payload={},
+            )
+            utils.cancel_plan(purchase)
+
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+    def test_send_queued_emails(self):
+        for number in range(5):
+            outbox.mailto(TEMPLATE, "Exit poll", [f"user-{number}@example.com"])
+
+        output = StringIO()
+        with patch.object(
+            outbox, "get_connection", wraps=outbox.get_connection
+        ) as get_connection:
+            call_command("send_queued_emails", batch_size=2, stdout=output)
+
+        self.assertIn("Sent 5 messages, 0 failed", output.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
+        # 1 connection per batch
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertFalse(OutgoingEmail.objects.filter(sent_at=None).exists())
+
+        # already sent
+        self.assertEqual(outbox.send_queued(), (0, 0))
+
+    def test_failed_messages_are_retried(self):
+        outbox.mailto(TEMPLATE, "Exit poll", ["bob@example.com"])
+
+        with patch(
+            "django.core.mail.EmailMessage.send", side_effect=SMTPException("boom")
+        ):
+            self.assertEqual(outbox.send_queued(), (0, 1))
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, "boom")
+
+        self.assertEqual(outbox.send_queued(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_leased_messages_are_skipped(self):
+        outbox.mailto(TEMPLATE, "Exit poll", ["bob@example.com"])
+        OutgoingEmail.objects.update(leased_until=timezone.now() + outbox.LEASE)
+
+        # another worker is sending it
+        self.assertEqual(outbox.send_queued(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+        # the other worker died
+        OutgoingEmail.objects.update(leased_until=timezone.now())
+        self.assertEqual(outbox.send_queued(), (1, 0))
+        self.assertIsNone(OutgoingEmail.objects.get().leased_until)
+
+    def test_sent_messages_are_recorded_when_batch_fails(self):
+        for number in range(2):
+            outbox.mailto(TEMPLATE, "Exit poll", [f"user-{number}@example.com"])
+
+        def close(self):  # pylint: disable=unused-argument
+            raise SMTPException("connection lost")
+
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.close",
+            close,
+        ), self.assertRaises(SMTPException):
+            outbox.send_queued()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(OutgoingEmail.objects.filter(sent_at=None).exists())
+
+        # not sent again
+        self.assertEqual(outbox.send_queued(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
@@ -0,0 +1,91 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# -*- coding: utf-8 -*-
+# pylint: disable=too-many-ancestors
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django import test
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from tcms_github_marketplace import partitioning
+from tcms_github_marketplace.models import Purchase
+
+
+def create_purchase(sender):
+    return Purchase.objects.create(
+        vendor="testing",
+        action="purchased",
+        sender=sender,
+        effective_date=timezone.now(),
+        payload={},
+    )
+
+
+def count_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")  # nosec:B608
+        return cursor.fetchone()[0]
+
+
+class TestPartitionedPurchaseTable(test.TestCase):
+    def test_table_is_partitioned(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = %s::regclass",
+                [partitioning.TABLE],
+            )
+            self.assertEqual(cursor.fetchone()[0], "p")
+
+            partitions = partitioning.existing_partitions(cursor)
+
+        this_year = timezone.now().year
+        self.assertIn(f"{partitioning.TABLE}_default", partitions)
+        self.assertIn(partitioning.partition_name(this_year), partitions)
+        self.assertIn(partitioning.partition_name(this_year + 1), partitions)
+
+    def test_new_records_are_stored_in_partition_for_current_year(self):
+        purchase = create_purchase("current@example.com")
+
+        self.assertEqual(
+            count_rows(partitioning.partition_name(purchase.received_on.year)), 1
+        )
+        self.assertEqual(count_rows(f"{partitioning.TABLE}_default"), 0)
+
+    def test_command_moves_records_out_of_default_partition(self):
+        year = timezone.now().year + 5
+        purchase = create_purchase("future@example.com")
+        Purchase.objects.filter(pk=purchase.pk).update(
+            received_on=datetime(year, 6, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(count_rows(f"{partitioning.TABLE}_default"), 1)
+
+        call_command("create_purchase_partitions", years_ahead=5)
+
+        self.assertEqual(count_rows(f"{partitioning.TABLE}_default"), 0)
+        self.assertEqual(count_rows(partitioning.partition_name(year)), 1)
+        self.assertEqual(
+            Purchase.objects.get(pk=purchase.pk).sender, "future@example.com"
+        )
+
+        # running again is a no-op
+        call_command("create_purchase_partitions", years_ahead=5)
+        self.assertEqual(count_rows(partitioning.partition_name(year)), 1)
+
+
+class TestReceivedSince(test.TestCase):
+    def test_older_records_are_excluded(self):
+        recent = create_purchase("recent@example.com")
+        old = create_purchase("old@example.com")
+        Purchase.objects.filter(pk=old.pk).update(
+            received_on=timezone.now() - timedelta(days=400)
+        )
+
+        result = list(Purchase.objects.received_since(days=365))
+
+        self.assertEqual(result, [recent])
@@ -0,0 +1,190 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+import io
+from datetime import date, datetime
+from unittest.mock import patch
+
+from django import test
+from django.core.management import call_command
+from django.utils import timezone
+
+from tcms_github_marketplace import reports, utils
+from tcms_github_marketplace.models import MonthlyRollup, Purchase
+
+
+def create_purchase(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    vendor, action, subscription, effective_date, billing_cycle, price, quantity=1
+):
+    return Purchase.objects.create(
+        vendor=vendor,
+        action=action,
+        sender=f"{subscription}@example.com",
+        subscription=subscription,
+        effective_date=timezone.make_aware(effective_date),
+        payload={
+            "data": {
+                "quantity": quantity,
+            },
+            "marketplace_purchase": {
+                "billing_cycle": billing_cycle,
+                "unit_count": quantity,
+                "plan": {
+                    "monthly_price_in_cents": price,
+                },
+            },
+        },
+    )
+
+
+class MonthlyReportTestCase(test.TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        # new monthly subscription, renewed in February, cancelled in March
+        create_purchase(
+            "fastspring", "purchased", "fs-1", datetime(2025, 1, 10), "monthly", 5000, 3
+        )
+        create_purchase(
+            "fastspring", "purchased", "fs-1", datetime(2025, 2, 10), "monthly", 5000, 3
+        )
+        create_purchase(
+            "fastspring", "cancelled", "fs-1", datetime(2025, 3, 5), "monthly", 5000, 3
+        )
+
+        # yearly subscription, the price is for the whole year
+        create_purchase(
+            "fastspring",
+            "purchased",
+            "fs-2",
+            datetime(2025, 1, 20),
+            "yearly",
+            120000,
+            2,
+        )
+
+        # GitHub renewals are recorded by cron
+        create_purchase(
+            "github", "purchased", "gh-1-1", datetime(2025, 1, 5), "monthly", 3200
+        )
+        create_purchase(
+            "github_cron", "purchased", "gh-1-1", datetime(2025, 2, 4), "monthly", 3200
+        )
+
+        # free plans are ignored
+        create_purchase(
+            "github", "purchased", "gh-2-2", datetime(2025, 1, 5), "monthly", 0
+        )
+
+    def test_january(self):
+        rollups = {
+            rollup.vendor: rollup for rollup in reports.monthly_report(date(2025, 1, 1))
+        }
+
+        self.assertEqual(sorted(rollups), ["fastspring", "github"])
+
+        self.assertEqual(rollups["fastspring"].mrr_in_cents, 5000 + 10000)
+        self.assertEqual(rollups["fastspring"].arr_in_cents, 12 * 15000)
+        self.assertEqual(rollups["fastspring"].new_subscriptions, 2)
+        self.assertEqual(rollups["fastspring"].renewed_subscriptions, 0)
+        self.assertEqual(rollups["fastspring"].unit_count, 5)
+
+        self.assertEqual(rollups["github"].mrr_in_cents, 3200)
+        self.assertEqual(rollups["github"].new_subscriptions, 1)
+        self.assertEqual(rollups["github"].unit_count, 1)
+
+    def test_february_counts_renewals_once(self):
+        rollups = {
+            rollup.vendor: rollup for rollup in reports.monthly_report(date(2025, 2, 1))
+        }
+
+        self.assertEqual(rollups["fastspring"].mrr_in_cents, 15000)
+        self.assertEqual(rollups["fastspring"].new_subscriptions, 0)
+        self.assertEqual(rollups["fastspring"].renewed_subscriptions, 1)
+
+        self.assertEqual(rollups["github"].mrr_in_cents, 3200)
+        self.assertEqual(rollups["github"].renewed_subscriptions, 1)
+
+    def test_march_counts_cancellations(self):
+        rollups = {
+            rollup.vendor: rollup for rollup in reports.monthly_report(date(2025, 3, 1))
+        }
+
+        self.assertEqual(rollups["fastspring"].cancelled_subscriptions, 1)
+        # only the yearly subscription is still active at the end of March
+        self.assertEqual(rollups["fastspring"].mrr_in_cents, 10000)
+        self.assertEqual(rollups["fastspring"].unit_count, 2)
+        self.assertNotIn("github", rollups)
+
+    def test_finished_months_are_stored(self):
+        self.assertFalse(MonthlyRollup.objects.filter(month=date(2025, 1, 1)).exists())
+
+        reports.monthly_report(date(2025, 1, 1))
+        self.assertEqual(
+            MonthlyRollup.objects.filter(month=date(2025, 1, 1)).count(), 2
+        )
+
+        # new records don't change stored values
+        create_purchase(
+            "fastspring", "purchased", "fs-3", datetime(2025, 1, 25), "monthly", 9900
+        )
+        rollups = {
+            rollup.vendor: rollup for rollup in reports.monthly_report(date(2025, 1, 1))
+        }
+        self.assertEqual(rollups["fastspring"].new_subscriptions, 2)
+
+    def test_months_without_data_are_stored(self):
+        self.assertEqual(reports.monthly_report(date(2024, 6, 1)), [])
+        self.assertTrue(MonthlyRollup.objects.filter(month=date(2024, 6, 1)).exists())
+
+        with patch.object(reports, "calculate") as calculate:
+            self.assertEqual(reports.monthly_report(date(2024, 6, 1)), [])
+            calculate.assert_not_called()
+
+    def test_paid_until_is_the_same_as_in_utils(self):
+        for billing_cycle in ("monthly", "yearly", "3-years"):
+            with self.subTest(billing_cycle=billing_cycle):
+                purchase = create_purchase(
+                    "fastspring",
+                    "purchased",
+                    f"fs-{billing_cycle}",
+                    datetime(2025, 4, 30, 1, 30),
+                    billing_cycle,
+                    5000,
+                )
+                self.assertEqual(
+                    reports.paid_purchases().get(pk=purchase.pk).paid_until,
+                    utils.calculate_paid_until(
+                        purchase.payload["marketplace_purchase"],
+                        Purchase.objects.get(pk=purchase.pk).effective_date,
+                    ),
+                )
+
+    def test_current_month_is_not_stored(self):
+        reports.monthly_report(timezone.now().date())
+        self.assertFalse(
+            MonthlyRollup.objects.filter(
+                month=reports.first_day_of(timezone.now().date())
+            ).exists()
+        )
+
+    def test_management_command(self):
+        output = io.StringIO()
+        call_command(
+            "marketplace_report",
+            "--since",
+            "2025-01-01",
+            "--until",
+            "2025-01-31",
+            stdout=output,
+        )
+        lines = output.getvalue().splitlines()
+
+        self.assertEqual(lines[0].split("\t")[0], "month")
+        self.assertIn("2025-01\tfastspring\t150\t1800\t2\t0\t0\t5", lines)
+        self.assertIn("2025-01\tgithub\t32\t384\t1\t0\t0\t1", lines)
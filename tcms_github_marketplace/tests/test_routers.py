@@ -0,0 +1,109 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from unittest.mock import patch
+
+from django import test
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from tcms_tenants.models import Tenant
+
+from tcms_github_marketplace import routers, utils
+from tcms_github_marketplace.models import Purchase
+
+REPLICA = override_settings(
+    DATABASES={**settings.DATABASES, "replica": settings.DATABASES["default"]},
+    MARKETPLACE_REPLICA_DATABASE="replica",
+)
+
+
+class TestReplicaRouter(test.SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.router = routers.ReplicaRouter()
+
+    def tearDown(self):
+        cache.delete_many(
+            [routers.sticky_key("bot@example.com"), routers.sticky_key("gitops")]
+        )
+        super().tearDown()
+
+    def test_disabled_without_replica(self):
+        with routers.use_replica():
+            self.assertIsNone(self.router.db_for_read(Purchase))
+
+    @REPLICA
+    def test_reads_inside_block_go_to_replica(self):
+        self.assertIsNone(self.router.db_for_read(Purchase))
+
+        with routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Purchase), "replica")
+            self.assertIsNone(self.router.db_for_write(Purchase))
+
+        self.assertIsNone(self.router.db_for_read(Purchase))
+
+    @REPLICA
+    def test_reads_your_own_writes(self):
+        routers.stick("bot@example.com")
+
+        with routers.use_replica("bot@example.com"):
+            self.assertIsNone(self.router.db_for_read(Purchase))
+
+        with routers.use_replica("gitops"):
+            self.assertEqual(self.router.db_for_read(Purchase), "replica")
+
+    @REPLICA
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(
+            self.router.allow_migrate("replica", "tcms_github_marketplace")
+        )
+        self.assertIsNone(
+            self.router.allow_migrate("default", "tcms_github_marketplace")
+        )
+
+
+class TestSubscriptionSummary(test.TestCase):
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def test_summary_from_replica_expires_quickly(self):
+        user = get_user_model().objects.create(
+            username="replica-reader", email="replica@example.com"
+        )
+
+        with patch.object(cache, "set") as cache_set, patch.object(
+            routers, "reading_from_replica", return_value=True
+        ):
+            utils.subscription_summary(user)
+        self.assertEqual(cache_set.call_args.kwargs["timeout"], 10)
+
+        with patch.object(cache, "set") as cache_set:
+            utils.subscription_summary(user)
+        self.assertNotEqual(cache_set.call_args.kwargs["timeout"], 10)
+
+    def test_access_changes_stick_to_primary(self):
+        owner = get_user_model().objects.create(
+            username="owner", email="owner@example.com"
+        )
+        tenant = Tenant.objects.bulk_create(
+            [
+                Tenant(
+                    name="Sticky",
+                    schema_name="sticky",
+                    owner=owner,
+                    paid_until=timezone.now(),
+                )
+            ]
+        )[0]
+
+        tenant.save()
+        self.assertTrue(cache.get(routers.sticky_key(owner.email)))
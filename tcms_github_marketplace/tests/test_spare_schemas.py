@@ -0,0 +1,108 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+from io import StringIO
+from unittest.mock import patch
+
+from django import test
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+from django_tenants.utils import schema_exists
+
+from tcms_github_marketplace import spare_schemas
+from tcms_github_marketplace.models import SpareSchema
+
+
+class TestClaim(test.TestCase):
+    def test_version_is_stable(self):
+        self.assertEqual(len(spare_schemas.version()), 64)
+        self.assertEqual(spare_schemas.version(), spare_schemas.version())
+
+    def test_returns_false_when_pool_is_empty(self):
+        self.assertFalse(spare_schemas.claim("acme"))
+
+    def test_stale_schemas_are_not_claimed(self):
+        SpareSchema.objects.create(schema_name="spare_stale", version="")
+
+        self.assertFalse(spare_schemas.claim("acme"))
+        self.assertTrue(SpareSchema.objects.filter(schema_name="spare_stale").exists())
+
+    def test_renames_spare_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE SCHEMA spare_fresh")
+        SpareSchema.objects.create(
+            schema_name="spare_fresh", version=spare_schemas.version()
+        )
+
+        self.assertTrue(spare_schemas.claim("acme"))
+
+        self.assertTrue(schema_exists("acme"))
+        self.assertFalse(schema_exists("spare_fresh"))
+        self.assertFalse(SpareSchema.objects.exists())
+
+    def test_raises_when_name_is_taken(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE SCHEMA acme")
+        SpareSchema.objects.create(
+            schema_name="spare_fresh", version=spare_schemas.version()
+        )
+
+        with self.assertRaises(spare_schemas.SchemaTaken):
+            spare_schemas.claim("acme")
+
+        self.assertTrue(SpareSchema.objects.filter(schema_name="spare_fresh").exists())
+
+    def test_raises_when_name_is_taken_concurrently(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE SCHEMA acme")
+            cursor.execute("CREATE SCHEMA spare_fresh")
+        SpareSchema.objects.create(
+            schema_name="spare_fresh", version=spare_schemas.version()
+        )
+
+        # the other request wasn't committed when this one checked the name
+        with patch.object(spare_schemas, "schema_exists", return_value=False):
+            with self.assertRaises(spare_schemas.SchemaTaken):
+                with transaction.atomic():
+                    spare_schemas.claim("acme")
+
+        # rolled back
+        self.assertTrue(schema_exists("spare_fresh"))
+        self.assertTrue(SpareSchema.objects.filter(schema_name="spare_fresh").exists())
+
+
+@patch("tcms_github_marketplace.spare_schemas.migrate")
+class TestTopUp(test.TestCase):
+    def test_creates_missing_schemas(self, migrate):
+        migrated, created = spare_schemas.top_up(2)
+
+        self.assertEqual((migrated, created), (0, 2))
+        self.assertEqual(migrate.call_count, 2)
+        for spare in SpareSchema.objects.all():
+            self.assertTrue(spare.schema_name.startswith(spare_schemas.PREFIX))
+            self.assertEqual(spare.version, spare_schemas.version())
+
+    def test_migrates_stale_schemas(self, migrate):
+        SpareSchema.objects.create(schema_name="spare_stale", version="")
+        SpareSchema.objects.create(
+            schema_name="spare_fresh", version=spare_schemas.version()
+        )
+
+        migrated, created = spare_schemas.top_up(2)
+
+        self.assertEqual((migrated, created), (1, 0))
+        migrate.assert_called_once_with("spare_stale")
+        self.assertFalse(SpareSchema.objects.exclude(version=spare_schemas.version()))
+
+    @override_settings(MARKETPLACE_SPARE_SCHEMAS=1)
+    def test_command_uses_setting_by_default(self, migrate):
+        out = StringIO()
+        call_command("top_up_spare_schemas", stdout=out)
+
+        self.assertEqual(migrate.call_count, 1)
+        self.assertIn("Migrated 0, created 1 spare schemas", out.getvalue())
@@ -15,8 +15,11 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 import tcms_tenants
-from tcms_github_marketplace import docker
+from tcms_tenants.models import Tenant
+
+from tcms_github_marketplace import docker, gitops_cache, utils
 from tcms_github_marketplace.models import Purchase
+from tcms_github_marketplace.views import GenericPurchaseNotificationView
 
 
 class MockUser:  # pylint: disable=too-few-public-methods
@@ -31,6 +34,7 @@ class ViewSubscriptionTestCase(tcms_tenants.tests.LoggedInTestCase):
 
     def tearDown(self):
         Purchase.objects.all().delete()
+        cache.clear()
         super().tearDown()
 
     def assert_on_page(self, response):
@@ -122,6 +126,73 @@ class ViewSubscriptionTestCase(tcms_tenants.tests.LoggedInTestCase):
         self.assertContains(response, "test-purchase")
         self.assertContains(response, "fastspring")
 
+    def test_summary_is_cached_until_purchase_is_recorded(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, _("Subscribe via FastSpring"))
+        self.assertIsNotNone(
+            cache.get(utils.subscription_summary_key(self.tester.email))
+        )
+
+        # simulate ownership, which also clears the summary
+        self.tenant.owner = self.tester
+        self.tenant.save()
+        self.assertIsNone(cache.get(utils.subscription_summary_key(self.tester.email)))
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "- / -")
+
+        # recording a purchase clears the summary for the sender
+        GenericPurchaseNotificationView().record_purchase(
+            vendor="fastspring",
+            action="test-purchase",
+            sender=self.tester.email,
+            subscription="fs-summary",
+            effective_date=timezone.now(),
+            payload={
+                "data": {
+                    "account": {"url": "https://example.com/cancel-summary"},
+                    "subscription": "summary",
+                },
+                "marketplace_purchase": {
+                    "billing_cycle": "yearly",
+                    "plan": {
+                        "monthly_price_in_cents": 36000,
+                    },
+                },
+            },
+        )
+        self.assertIsNone(cache.get(utils.subscription_summary_key(self.tester.email)))
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "https://example.com/cancel-summary")
+        self.assertContains(response, "360 / yr")
+
+    def test_summary_does_not_show_deleted_tenants(self):
+        # bulk_create() doesn't create a schema
+        tenant = Tenant.objects.bulk_create(
+            [
+                Tenant(
+                    name="Deleted",
+                    schema_name="deleted",
+                    owner=self.tester,
+                    paid_until=timezone.now(),
+                )
+            ]
+        )[0]
+        summary = utils.subscription_summary(self.tester)
+        self.assertEqual(summary["own_tenants"], [utils.tenant_summary(tenant)])
+
+        # doesn't drop the schema but sends the same signals
+        Tenant.objects.filter(pk=tenant.pk).delete()
+        self.assertIsNone(cache.get(utils.subscription_summary_key(self.tester.email)))
+        self.assertEqual(utils.subscription_summary(self.tester)["own_tenants"], [])
+
+    def test_cached_summary_does_not_query_the_database(self):
+        summary = utils.subscription_summary(self.tester)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(utils.subscription_summary(self.tester), summary)
+
     @unittest.skip("feature currently disabled")
     def test_saving_gitops_prefix_clears_cache(self):
         # simulate ownership
@@ -152,19 +223,20 @@ class ViewSubscriptionTestCase(tcms_tenants.tests.LoggedInTestCase):
             },
         )
 
-        # simulate a full cache
-        cache.set("testing-key", True)
+        # simulate a cached result
+        gitops_cache.set("https://github.com/kiwitcms/Kiwi", False)
 
         with unittest.mock.patch("github.Github.get_user") as github_get_user:
             mock_user = MockUser()
             mock_user.type = "Organization"
             github_get_user.return_value = mock_user
 
-            response = self.client.post(
-                self.url,
-                data={"gitops_prefix": "https://github.com/kiwitcms"},
-                follow=True,
-            )
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url,
+                    data={"gitops_prefix": "https://github.com/kiwitcms"},
+                    follow=True,
+                )
 
             self.assert_on_page(response)
             self.assertContains(response, "https://github.com/kiwitcms")
@@ -172,5 +244,5 @@ class ViewSubscriptionTestCase(tcms_tenants.tests.LoggedInTestCase):
             purchase.refresh_from_db()
             self.assertEqual(purchase.gitops_prefix, "https://github.com/kiwitcms")
 
-            # cache has been cleared when the form was saved
-            self.assertIsNone(cache.get("testing-key"))
+            # cache has been invalidated after the form was saved
+            self.assertIsNone(gitops_cache.get("https://github.com/kiwitcms/Kiwi"))
@@ -25,6 +25,7 @@ from tcms.utils import github
 import tcms_tenants
 
 from tcms_github_marketplace import docker
+from tcms_github_marketplace import gitops_cache
 from tcms_github_marketplace import mailchimp
 from tcms_github_marketplace.models import Purchase
 from tcms_github_marketplace.cron_github_recurring_billing import (
@@ -159,6 +160,8 @@ class PurchaseHookTestCase(tcms_tenants.tests.LoggedInTestCase):
         )
 
         initial_purchase_count = Purchase.objects.count()
+        # simulate a cached result
+        gitops_cache.set("https://github.com/example-org/repo", False)
 
         # tmp_account calculates the actual robot name for mocking - currently not in use
         with docker.QuayIOAccount("username@email.com") as tmp_account:
@@ -175,12 +178,13 @@ class PurchaseHookTestCase(tcms_tenants.tests.LoggedInTestCase):
                 "subscribe",
                 return_value="success",
             ) as mailchimp_subscribe:
-                response = self.client.post(
-                    self.url,
-                    json.loads(payload),
-                    content_type="application/json",
-                    HTTP_X_HUB_SIGNATURE=signature,
-                )
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        self.url,
+                        json.loads(payload),
+                        content_type="application/json",
+                        HTTP_X_HUB_SIGNATURE=signature,
+                    )
                 self.assertContains(response, "ok")
                 quay_io_create.assert_called_once()
                 quay_io_allow_read_access.assert_has_calls(
@@ -196,6 +200,9 @@ class PurchaseHookTestCase(tcms_tenants.tests.LoggedInTestCase):
         self.assertEqual(purchase.gitops_prefix, "https://github.com/example-org")
         self.assertEqual(purchase.unit_count, 3)
 
+        # cached results were invalidated after the purchase was committed
+        self.assertIsNone(gitops_cache.get("https://github.com/example-org/repo"))
+
     def test_hook_ping(self):
         payload = """
 {
@@ -1,4 +1,4 @@
-# Copyright (c) 2020-2024 Alexander Todorov <atodorov@otb.bg>
+# Copyright (c) 2020-2026 Alexander Todorov <atodorov@otb.bg>
 #
 # Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
 # https://www.gnu.org/licenses/agpl-3.0.html
@@ -6,6 +6,7 @@
 # pylint: disable=too-many-ancestors
 import json
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 from django.urls import reverse
 from django.utils import timezone
@@ -17,6 +18,9 @@ from tcms.utils import github
 
 import tcms_tenants.tests
 
+from tcms_github_marketplace import spare_schemas
+from tcms_github_marketplace.models import Purchase
+
 
 class CreateTenantTestCase(tcms_tenants.tests.TenantGroupsTestCase):
     @classmethod
@@ -665,3 +669,41 @@ class CreateTenantTestCase(tcms_tenants.tests.TenantGroupsTestCase):
 
         tenant = tcms_tenants.models.Tenant.objects.filter(schema_name="t2").first()
         self.assertIsNone(tenant)
+
+    @patch(
+        "tcms_github_marketplace.spare_schemas.claim",
+        side_effect=spare_schemas.SchemaTaken("taken"),
+    )
+    def test_name_taken_by_concurrent_request_shows_error(self, _claim):
+        Purchase.objects.create(
+            vendor="github",
+            action="purchased",
+            sender=self.tester.email,
+            effective_date=timezone.now(),
+            should_have_tenant=True,
+            payload={
+                "marketplace_purchase": {
+                    "account": {"type": "User", "login": self.tester.username},
+                    "billing_cycle": "monthly",
+                    "unit_count": 1,
+                    "plan": {"monthly_price_in_cents": 3200},
+                },
+            },
+        )
+
+        response = self.client.post(
+            self.create_tenant_url,
+            {
+                "name": "Taken, Inc.",
+                "schema_name": "taken",
+                "owner": self.tester.pk,
+                "organization": "",
+                "publicly_readable": False,
+                "paid_until": timezone.now() + timedelta(days=30),
+            },
+        )
+
+        self.assertContains(response, "This name is already taken")
+        self.assertFalse(
+            tcms_tenants.models.Tenant.objects.filter(schema_name="taken").exists()
+        )
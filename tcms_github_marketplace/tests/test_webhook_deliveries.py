@@ -0,0 +1,149 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+import hashlib
+import hmac
+import json
+from base64 import b64encode
+from datetime import timedelta
+from unittest.mock import patch
+
+from django import test
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tcms.utils import github
+
+import tcms_tenants
+
+from tcms_github_marketplace import utils, views
+from tcms_github_marketplace.models import Purchase, WebhookDelivery
+
+from test_project.benchmarks.payloads import fastspring_event, github_event
+
+
+class GitHubDeliveryTestCase(tcms_tenants.tests.LoggedInTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.url = reverse("github_marketplace_purchase_hook")
+
+    def post(self, payload, delivery_id):
+        body = json.dumps(payload)
+        return self.client.post(
+            self.url,
+            body,
+            content_type="application/json",
+            HTTP_X_HUB_SIGNATURE=github.calculate_signature(
+                settings.KIWI_GITHUB_MARKETPLACE_SECRET, body.encode()
+            ),
+            HTTP_X_GITHUB_DELIVERY=delivery_id,
+        )
+
+    def test_redelivery_is_acknowledged_without_processing(self):
+        # free plan, nothing to provision
+        payload = github_event(1, monthly_price_in_cents=0)
+        initial_count = Purchase.objects.count()
+
+        self.assertContains(self.post(payload, "guid-1"), "ok")
+        self.assertEqual(Purchase.objects.count(), initial_count + 1)
+
+        self.assertContains(self.post(payload, "guid-1"), "duplicate")
+        self.assertEqual(Purchase.objects.count(), initial_count + 1)
+
+        # the same payload with a different delivery ID is processed
+        self.assertContains(self.post(payload, "guid-2"), "ok")
+        self.assertEqual(Purchase.objects.count(), initial_count + 2)
+
+    def test_failed_delivery_can_be_retried(self):
+        payload = github_event(2, monthly_price_in_cents=0)
+
+        with patch.object(
+            views.PurchaseHook, "purchase_action", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post(payload, "guid-3")
+
+        self.assertFalse(WebhookDelivery.objects.filter(delivery_id="guid-3").exists())
+        self.assertContains(self.post(payload, "guid-3"), "ok")
+
+
+class FastSpringDeliveryTestCase(tcms_tenants.tests.LoggedInTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.url = reverse("fastspring")
+
+    def post(self, payload):
+        body = json.dumps(payload)
+        signature = hmac.new(
+            settings.KIWI_FASTSPRING_SECRET, msg=body.encode(), digestmod=hashlib.sha256
+        ).digest()
+        return self.client.post(
+            self.url,
+            body,
+            content_type="application/json",
+            HTTP_X_FS_SIGNATURE=b64encode(signature).decode(),
+        )
+
+    def test_duplicate_events_are_skipped(self):
+        first = fastspring_event(1, "subscription.charge.completed")
+        second = fastspring_event(2, "subscription.charge.completed")
+        initial_count = Purchase.objects.count()
+
+        # duplicate inside the same batch
+        self.assertContains(self.post({"events": [first, first, second]}), "ok")
+        self.assertEqual(Purchase.objects.count(), initial_count + 2)
+
+        # the entire batch delivered again
+        self.assertContains(self.post({"events": [first, second]}), "ok")
+        self.assertEqual(Purchase.objects.count(), initial_count + 2)
+        self.assertEqual(WebhookDelivery.objects.filter(vendor="fastspring").count(), 2)
+
+    def test_processed_events_are_kept_when_batch_fails(self):
+        first = fastspring_event(3, "subscription.charge.completed")
+        second = fastspring_event(4, "subscription.charge.completed")
+        initial_count = Purchase.objects.count()
+
+        original = views.FastSpringHook.purchase_action
+
+        def fail_second(view, event):
+            if event["id"] == second["id"]:
+                raise RuntimeError("boom")
+            return original(view, event)
+
+        with patch.object(views.FastSpringHook, "purchase_action", fail_second):
+            with self.assertRaises(RuntimeError):
+                self.post({"events": [first, second]})
+
+        self.assertEqual(Purchase.objects.count(), initial_count + 1)
+        self.assertTrue(
+            WebhookDelivery.objects.filter(delivery_id=first["id"]).exists()
+        )
+        self.assertFalse(
+            WebhookDelivery.objects.filter(delivery_id=second["id"]).exists()
+        )
+
+        # redelivery processes only the event which failed
+        self.assertContains(self.post({"events": [first, second]}), "ok")
+        self.assertEqual(Purchase.objects.count(), initial_count + 2)
+
+
+class PruneWebhookDeliveriesTestCase(test.TestCase):
+    def test_deletes_old_deliveries(self):
+        old = WebhookDelivery.objects.create(vendor="github", delivery_id="old")
+        WebhookDelivery.objects.filter(pk=old.pk).update(
+            received_on=timezone.now() - timedelta(days=31)
+        )
+        WebhookDelivery.objects.create(vendor="github", delivery_id="new")
+
+        self.assertEqual(utils.prune_webhook_deliveries(), 1)
+        self.assertEqual(
+            list(WebhookDelivery.objects.values_list("delivery_id", flat=True)),
+            ["new"],
+        )
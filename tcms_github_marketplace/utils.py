@@ -6,15 +6,28 @@
 import hmac
 import hashlib
 from base64 import b64encode
+from collections import namedtuple
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.db.models import Q
 from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from requests.exceptions import RequestException
 
-from tcms.core.utils.mailto import mailto
-from tcms_github_marketplace import docker, fury
-from tcms_github_marketplace.models import PrivateRepoToken
+from tcms_tenants.models import Tenant
+from tcms_github_marketplace import circuit, docker, fury, metrics, routers
+from tcms_github_marketplace.models import (
+    PrivateRepoToken,
+    Purchase,
+    RetryTask,
+    WebhookDelivery,
+)
+from tcms_github_marketplace.outbox import mailto
 
 
 def verify_hmac(request):
@@ -47,21 +60,22 @@ def cancel_plan(purchase):
     https://developer.github.com/marketplace/integrating-with-the-github-marketplace-api/cancelling-plans/
     """
     try:
-        with docker.QuayIOAccount(purchase.subscription) as account:
-            account.delete()
+        call_or_defer("delete_quay_account", subscription_id=purchase.subscription)
     except:  # noqa:E722, pylint: disable=bare-except
         pass
 
     try:
-        remove_repo_token(purchase.subscription)
+        call_or_defer("remove_repo_token", subscription_id=purchase.subscription)
     except:  # noqa:E722, pylint: disable=bare-except
         pass
 
-    # send exit poll email
+    # send exit poll email once per cancellation, re-delivered webhooks
+    # are skipped before we get here
     mailto(
         template_name="tcms_github_marketplace/email/exit_poll.txt",
         recipients=[purchase.sender],
         subject=str(_("Kiwi TCMS Subscription Exit Poll")),
+        dedup_key=f"exit-poll-{purchase.pk}",
     )
 
     # Note: deliberately not removing users from DB b/c this removes
@@ -71,6 +85,11 @@ def cancel_plan(purchase):
     return HttpResponse("cancelled", content_type="text/plain")
 
 
+# purchases received earlier can't be active anymore:
+# 3-years billing cycle + 1 year for changes effective in the future
+ACTIVE_PURCHASE_DAYS = 1096 + 366
+
+
 def calculate_paid_until(mp_purchase, effective_date, next_billing_date=None):
     """
     Calculates when access to paid services must be disabled.
@@ -108,8 +127,33 @@ def configure_product_access(quay_account, sku):
             quay_account.allow_read_access(repo_name)
 
 
-def create_repo_token(subscription_id):
+def provision_quay_account(subscription_id, sku):
+    # safe to retry b/c robot names are derived from subscription_id and
+    # create() doesn't fail if the robot account already exists
+    with docker.QuayIOAccount(subscription_id) as account:
+        account.create()
+        configure_product_access(account, sku)
+
+
+def delete_quay_account(subscription_id):
+    with docker.QuayIOAccount(subscription_id) as account:
+        account.delete()
+
+
+def create_repo_token(subscription_id, delete_orphan=False):
+    """
+    Safe to retry, e.g. after a timeout when the token was actually created.
+    Retries pass ``delete_orphan=True``, see ``process_retry_queue()``
+    """
+    existing = PrivateRepoToken.objects.filter(subscription=subscription_id).first()
+    if existing:
+        return existing
+
     api = fury.GemfuryAPI(settings.GEMFURY_API_TOKEN)
+    if delete_orphan:
+        # created by a previous attempt which failed before recording it,
+        # its value can't be retrieved again so create a new one
+        api.delete_token(subscription_id)
 
     return PrivateRepoToken.objects.create(
         vendor="gemfury",
@@ -123,3 +167,238 @@ def remove_repo_token(subscription_id):
 
     api = fury.GemfuryAPI(settings.GEMFURY_API_TOKEN)
     api.delete_token(subscription_id)
+
+
+# afterwards the task is not retried anymore, about 5 days
+RETRY_MAX_ATTEMPTS = 15
+
+# how long a task is reserved for the worker which executes it
+RETRY_LEASE = timedelta(minutes=15)
+
+RETRY_ACTIONS = {
+    "provision_quay_account": provision_quay_account,
+    "delete_quay_account": delete_quay_account,
+    "create_repo_token": create_repo_token,
+    "remove_repo_token": remove_repo_token,
+}
+
+
+def call_or_defer(action, **kwargs):
+    """
+    Calls one of ``RETRY_ACTIONS``. If the upstream API is unavailable, or the
+    circuit breaker for it is open, the work is stored as a RetryTask instead
+    of failing the webhook!
+    """
+    try:
+        return RETRY_ACTIONS[action](**kwargs)
+    except RequestException as err:
+        RetryTask.objects.create(action=action, arguments=kwargs, last_error=str(err))
+        metrics.increment(metrics.RETRY_QUEUE_DEFERRED_TOTAL, action=action)
+        return None
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff: 1, 2, 4 ... minutes, up to 1 day
+    """
+    return timedelta(minutes=min(2 ** (attempts - 1), 24 * 60))
+
+
+def _claim_retry_task():
+    """
+    Locks the next task which is due only for as long as it takes to
+    postpone it by ``RETRY_LEASE``. Other workers will skip it while it is
+    being executed and pick it up again if this worker dies!
+    """
+    with transaction.atomic():
+        task = (
+            RetryTask.objects.select_for_update(skip_locked=True)
+            .filter(run_after__lte=timezone.now(), attempts__lt=RETRY_MAX_ATTEMPTS)
+            .order_by("run_after")
+            .first()
+        )
+        if task:
+            task.run_after = timezone.now() + RETRY_LEASE
+            task.save(update_fields=["run_after"])
+
+    return task
+
+
+def process_retry_queue(limit=100):
+    """
+    Executes RetryTask records which are due and deletes the successful ones.
+    External APIs are called outside of transactions b/c of their timeouts
+    and retries. Tasks which fail ``RETRY_MAX_ATTEMPTS`` times are kept
+    for inspection but not retried anymore!
+    """
+    processed = 0
+    failed = 0
+
+    while processed + failed < limit:
+        task = _claim_retry_task()
+        if task is None:
+            break
+
+        arguments = dict(task.arguments)
+        if task.action == "create_repo_token":
+            # the failed attempt may have created a token upstream. Looking it
+            # up pages through all tokens so it isn't done on the webhook path
+            arguments["delete_orphan"] = True
+
+        try:
+            RETRY_ACTIONS[task.action](**arguments)
+        except circuit.CircuitOpen as err:
+            # the upstream is still down, doesn't count as an attempt
+            task.run_after = timezone.now() + timedelta(
+                seconds=err.breaker.reset_timeout
+            )
+            task.last_error = str(err)
+            task.save(update_fields=["run_after", "last_error"])
+            failed += 1
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            task.attempts += 1
+            task.run_after = timezone.now() + retry_delay(task.attempts)
+            task.last_error = str(err)
+            task.save(update_fields=["attempts", "run_after", "last_error"])
+            failed += 1
+        else:
+            task.delete()
+            processed += 1
+
+    return processed, failed
+
+
+def prune_webhook_deliveries(days=None):
+    """
+    Deletes delivery IDs older than ``MARKETPLACE_WEBHOOK_DELIVERY_RETENTION_DAYS``,
+    vendors don't deliver the same webhook again after that.
+    Returns the number of deleted records!
+    """
+    if days is None:
+        days = getattr(settings, "MARKETPLACE_WEBHOOK_DELIVERY_RETENTION_DAYS", 30)
+
+    deleted, _ = WebhookDelivery.objects.filter(
+        received_on__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
+
+
+def subscription_summary_key(sender):
+    return f"subscription-summary-{sender}"
+
+
+def clear_subscription_summary(*senders):
+    """
+    Invalidate cached subscription summaries for the given email addresses.
+    """
+    cache.delete_many(
+        [subscription_summary_key(sender) for sender in senders if sender]
+    )
+
+
+class TenantOwner(namedtuple("TenantOwner", "pk username")):
+    def __str__(self):
+        return self.username
+
+
+# the Tenant fields displayed on the Subscriptions page
+TenantSummary = namedtuple("TenantSummary", "schema_name organization paid_until owner")
+
+
+def tenant_summary(tenant):
+    return TenantSummary(
+        schema_name=tenant.schema_name,
+        organization=tenant.organization,
+        paid_until=tenant.paid_until,
+        owner=TenantOwner(pk=tenant.owner.pk, username=tenant.owner.username),
+    )
+
+
+def is_subscription(purchase):
+    """
+    Some events, e.g. order.canceled may have the subscription field set to None
+    """
+    return purchase.subscription is not None and "None" not in purchase.subscription
+
+
+def latest_subscription(purchases):
+    """
+    The latest purchase which has the subscription field set,
+    ``purchases`` are ordered by ``-received_on``!
+    """
+    return next(filter(is_subscription, purchases), None)
+
+
+def _subscription_summary(user):
+    # the latest purchase for this user which has the subscription field set!
+    subscription = (
+        Purchase.objects.filter(sender=user.email)
+        .exclude(Q(subscription=None) | Q(subscription__contains="None"))
+        .order_by("-received_on")
+        .first()
+    )
+
+    summary = {
+        "subscription_price": "-",
+        "subscription_period": "-",
+        "cancel_url": None,
+        "access_tenants": [
+            tenant_summary(tenant) for tenant in user.tenant_set.select_related("owner")
+        ],
+        "own_tenants": [
+            tenant_summary(tenant)
+            for tenant in Tenant.objects.filter(owner=user).select_related("owner")
+        ],
+    }
+
+    if subscription is not None:
+        if subscription.vendor.lower() == "github":
+            summary["cancel_url"] = "https://github.com/settings/billing"
+
+        if subscription.vendor.lower() == "fastspring":
+            summary["cancel_url"] = subscription.payload["data"]["account"]["url"]
+
+        purchase_data = subscription.payload["marketplace_purchase"]
+
+        # try yearly billing first
+        subscription_price = (
+            purchase_data["plan"].get("yearly_price_in_cents", 0) // 100
+        )
+        # default to monthly price next. FastSpring yearly billing subscriptions
+        # also send the price in this field
+        if subscription_price == 0:
+            subscription_price = (
+                purchase_data["plan"].get("monthly_price_in_cents", 0) // 100
+            )
+        if purchase_data["billing_cycle"] == "monthly":
+            summary["subscription_period"] = _("mo")
+        elif purchase_data["billing_cycle"] == "yearly":
+            summary["subscription_period"] = _("yr")
+
+        summary["subscription_price"] = int(subscription_price)
+
+    return summary
+
+
+def subscription_summary(user):
+    """
+    Price, period, cancel URL and tenants of ``user`` as displayed on the
+    Subscriptions page. The result is cached until a new Purchase is
+    recorded for this user or one of their tenants is changed!
+
+    Tenants are returned as ``TenantSummary`` tuples, not model instances.
+    """
+    key = subscription_summary_key(user.email)
+    summary = cache.get(key)
+
+    if summary is None:
+        summary = _subscription_summary(user)
+        # may be missing recent changes b/c of replication lag
+        timeout = (
+            getattr(settings, "MARKETPLACE_REPLICA_STICKY_SECONDS", 10)
+            if routers.reading_from_replica()
+            else DEFAULT_TIMEOUT
+        )
+        cache.set(key, summary, timeout=timeout)
+
+    return summary
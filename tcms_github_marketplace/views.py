@@ -5,17 +5,28 @@
 
 # pylint: disable=missing-permission-required, no-self-use
 
+import hashlib
+import hmac
 import json
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic.base import View
 from django.views.generic.edit import UpdateView
@@ -23,7 +34,6 @@ from django.utils.decorators import method_decorator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.decorators import login_required
 
-from tcms.core.utils.mailto import mailto
 from tcms.utils import github
 
 from django_tenants.utils import get_public_schema_name
@@ -31,13 +41,24 @@ from tcms_tenants.models import Tenant
 from tcms_tenants.views import NewTenantView
 from tcms_tenants import utils as tcms_tenants_utils
 
+from tcms_github_marketplace import api
 from tcms_github_marketplace import docker
 from tcms_github_marketplace import fastspring
 from tcms_github_marketplace import forms
+from tcms_github_marketplace import locks
 from tcms_github_marketplace.github import find_sku as github_find_sku
 from tcms_github_marketplace import mailchimp
+from tcms_github_marketplace import prefix
+from tcms_github_marketplace import routers
+from tcms_github_marketplace import spare_schemas
+from tcms_github_marketplace import metrics
 from tcms_github_marketplace import utils
-from tcms_github_marketplace.models import PrivateRepoToken, Purchase
+from tcms_github_marketplace.models import (
+    PrivateRepoToken,
+    Purchase,
+    WebhookDelivery,
+)
+from tcms_github_marketplace.outbox import mailto
 
 UserModel = get_user_model()
 
@@ -93,6 +114,25 @@ class GenericPurchaseNotificationView(View):
     def purchase_effective_date(self, event):
         raise NotImplementedError
 
+    def purchase_event_type(self, event):
+        """
+        Used to tag metrics. Defaults to the recorded action!
+        """
+        return self.purchase_action(event)
+
+    def event_delivery_id(self, event):  # pylint: disable=unused-argument
+        """
+        Unique ID of an event inside a batch, used to skip duplicates
+        """
+        return None
+
+    def request_delivery_id(self, request):  # pylint: disable=unused-argument
+        """
+        Unique ID of a webhook delivery, used to skip duplicates
+        without parsing the request body
+        """
+        return None
+
     def purchase_gitops_prefix(self, event):  # pylint: disable=unused-argument
         return None
 
@@ -109,8 +149,14 @@ class GenericPurchaseNotificationView(View):
         purchase = Purchase.objects.create(**kwargs)
 
         # remove possible stale state
+        utils.clear_subscription_summary(purchase.sender)
+        routers.stick(purchase.sender)
         if purchase.gitops_prefix:
-            cache.clear()
+            routers.stick(api.GITOPS_STICKY_KEY)
+            # other processes must not cache the previous state again
+            transaction.on_commit(
+                lambda: api.gitops_prefix_changed(purchase.gitops_prefix)
+            )
 
         return purchase
 
@@ -142,70 +188,199 @@ class GenericPurchaseNotificationView(View):
         """
         return HttpResponse("ok", content_type="text/plain")
 
+    def stage(self, name, event_type=""):
+        """
+        Times a processing stage, see ``tcms_github_marketplace.metrics``
+        """
+        return metrics.timer(
+            metrics.WEBHOOK_STAGE_SECONDS,
+            stage=name,
+            vendor=self.purchase_vendor,
+            event_type=event_type,
+        )
+
+    @contextmanager
+    def subscription_lock(self, event, event_type):
+        """
+        Serializes processing of events for the same subscription
+        across all workers, see ``tcms_github_marketplace.locks``
+        """
+        subscription = self.purchase_subscription(event)
+        if not subscription:
+            yield
+            return
+
+        lock = locks.AdvisoryLock(f"subscription-{subscription}")
+        with self.stage("lock", event_type):
+            lock.acquire()
+
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def count_request(self, outcome):
+        metrics.increment(
+            metrics.WEBHOOK_REQUESTS_TOTAL, vendor=self.purchase_vendor, outcome=outcome
+        )
+
+    def count_event(self, outcome, event_type):
+        metrics.increment(
+            metrics.WEBHOOK_EVENTS_TOTAL,
+            vendor=self.purchase_vendor,
+            event_type=event_type,
+            outcome=outcome,
+        )
+
+    def claim_delivery(self, delivery_id):
+        """
+        Records ``delivery_id`` as processed. Returns False if it has already
+        been processed, e.g. the vendor re-delivered the same webhook!
+        """
+        if not delivery_id:
+            return True
+
+        query = WebhookDelivery.objects.filter(
+            vendor=self.purchase_vendor, delivery_id=delivery_id
+        )
+        if query.exists():
+            return False
+
+        try:
+            with transaction.atomic():
+                delivery = WebhookDelivery.objects.create(
+                    vendor=self.purchase_vendor, delivery_id=delivery_id
+                )
+        except IntegrityError:
+            # a concurrent request claimed it first
+            return False
+
+        self.claimed_deliveries.append(delivery.pk)
+        return True
+
     def post(self, request, *args, **kwargs):  # pylint: disable=unused-argument
-        result = self.request_verify_signature(request)
+        with self.stage("verify_signature"):
+            result = self.request_verify_signature(request)
         if result is not True:
+            self.count_request("rejected")
             return result  # must be an HttpResponse then
 
-        json_payload = json.loads(request.body.decode("utf-8"))
+        # pylint: disable=attribute-defined-outside-init
+        # claims which are released if processing fails
+        self.claimed_deliveries = []
+        with self.stage("deduplicate"):
+            claimed = self.claim_delivery(self.request_delivery_id(request))
+        if not claimed:
+            self.count_request("duplicate")
+            return HttpResponse("duplicate", content_type="text/plain")
+
+        try:
+            return self.process(request)
+        except Exception:
+            # allow the vendor to deliver again, events which have
+            # already been processed will be skipped
+            WebhookDelivery.objects.filter(pk__in=self.claimed_deliveries).delete()
+            raise
+
+    def process(self, request):  # pylint: disable=too-many-statements
+        with self.stage("json_decode"):
+            json_payload = json.loads(request.body.decode("utf-8"))
 
         response = (  # pylint: disable=assignment-from-none
             self.vendor_pre_process_request(request, json_payload)
         )
         if response:
+            self.count_request("ignored")
             return response
 
+        self.count_request("accepted")
+
         # NOTE: for vendors which don't support event batching the RAW data
         # should be transformed into a list!
-        for event in self.vendor_pre_process_payload(json_payload):
-            # first order of business is to record this into the database
-            purchase = self.record_purchase(
-                action=self.purchase_action(event),
-                effective_date=self.purchase_effective_date(event),
-                payload=event,
-                sender=self.purchase_sender(event),
-                should_have_tenant=self.purchase_should_have_tenant(event),
-                subscription=self.purchase_subscription(event),
-                vendor=self.purchase_vendor,
-                gitops_prefix=self.purchase_gitops_prefix(event),
-            )
-
-            if self.action_is_cancelled(purchase):
-                return utils.cancel_plan(purchase)
-
-            if self.action_is_activated(purchase) and not os.environ.get(
-                "SKIP_QUAY_IO", False
-            ):
-                # create an account for first time users
-                self.create_user_account(purchase.sender)
-
-                sku = self.find_sku(purchase)
-                # create Robot account for Quay.io
-                with docker.QuayIOAccount(purchase.subscription) as account:
-                    account.create()
-                    utils.configure_product_access(account, sku)
-
-                # create private repository token
-                utils.create_repo_token(purchase.subscription)
-
-                # ask them to subscribe to newsletter
-                mailchimp.subscribe(purchase.sender)
-
-            if self.action_is_recurring_billing(purchase):
-                # create an account in case it has expired or details have changed
-                self.create_user_account(purchase.sender)
-
-                # WARNING: this relies on the fact that vendor specific
-                # classes will override this method in order to find the exact
-                # tenant for each customer
-                tenant = self.find_paid_tenant(purchase).first()
-                if tenant:
-                    tenant.paid_until = utils.calculate_paid_until(
-                        purchase.payload["marketplace_purchase"],
-                        purchase.effective_date,
-                        purchase.next_billing_date,
+        with self.stage("pre_process"):
+            events = self.vendor_pre_process_payload(json_payload)
+
+        purchase = None
+        for event in events:
+            event_type = self.purchase_event_type(event)
+
+            claimed = len(self.claimed_deliveries)
+            if not self.claim_delivery(self.event_delivery_id(event)):
+                self.count_event("duplicate", event_type)
+                continue
+
+            # deliveries for the same subscription may arrive together
+            with self.subscription_lock(event, event_type):
+                # first order of business is to record this into the database
+                with self.stage("record_purchase", event_type):
+                    purchase = self.record_purchase(
+                        action=self.purchase_action(event),
+                        effective_date=self.purchase_effective_date(event),
+                        payload=event,
+                        sender=self.purchase_sender(event),
+                        should_have_tenant=self.purchase_should_have_tenant(event),
+                        subscription=self.purchase_subscription(event),
+                        vendor=self.purchase_vendor,
+                        gitops_prefix=self.purchase_gitops_prefix(event),
                     )
-                    tenant.save()
+
+                if self.action_is_cancelled(purchase):
+                    self.count_event("cancelled", event_type)
+                    with self.stage("cancel_plan", event_type):
+                        return utils.cancel_plan(purchase)
+
+                outcome = "recorded"
+                if self.action_is_activated(purchase) and not os.environ.get(
+                    "SKIP_QUAY_IO", False
+                ):
+                    outcome = "activated"
+
+                    # create an account for first time users
+                    with self.stage("create_user_account", event_type):
+                        self.create_user_account(purchase.sender)
+
+                    sku = self.find_sku(purchase)
+                    # create Robot account for Quay.io
+                    with self.stage("quay", event_type):
+                        utils.call_or_defer(
+                            "provision_quay_account",
+                            subscription_id=purchase.subscription,
+                            sku=sku,
+                        )
+
+                    # create private repository token
+                    with self.stage("gemfury", event_type):
+                        utils.call_or_defer(
+                            "create_repo_token", subscription_id=purchase.subscription
+                        )
+
+                    # ask them to subscribe to newsletter
+                    with self.stage("mailchimp", event_type):
+                        mailchimp.subscribe(purchase.sender)
+
+                if self.action_is_recurring_billing(purchase):
+                    outcome = "renewed"
+
+                    with self.stage("recurring_billing", event_type):
+                        # create an account in case it has expired or details have changed
+                        self.create_user_account(purchase.sender)
+
+                        # WARNING: this relies on the fact that vendor specific
+                        # classes will override this method in order to find the exact
+                        # tenant for each customer
+                        tenant = self.find_paid_tenant(purchase).first()
+                        if tenant:
+                            tenant.paid_until = utils.calculate_paid_until(
+                                purchase.payload["marketplace_purchase"],
+                                purchase.effective_date,
+                                purchase.next_billing_date,
+                            )
+                            tenant.save()
+
+                self.count_event(outcome, event_type)
+
+            # keep the claim even if another event in the same batch fails
+            del self.claimed_deliveries[claimed:]
 
         return self.vendor_response(purchase)
 
@@ -313,6 +488,9 @@ class PurchaseHook(GenericPurchaseNotificationView):
         account_id = event["marketplace_purchase"]["account"]["id"]
         return f"gh-{sender_id}-{account_id}"
 
+    def request_delivery_id(self, request):
+        return request.headers.get("X-GitHub-Delivery")
+
     def request_verify_signature(self, request):
         return github.verify_signature(request, settings.KIWI_GITHUB_MARKETPLACE_SECRET)
 
@@ -427,6 +605,12 @@ class FastSpringHook(GenericPurchaseNotificationView):
 
         return event["type"]
 
+    def event_delivery_id(self, event):
+        return event.get("id")
+
+    def purchase_event_type(self, event):
+        return event["type"]
+
     def purchase_effective_date(self, event):
         # timestamp is in milliseconds
         return datetime.fromtimestamp(event["created"] / 1000)
@@ -703,11 +887,14 @@ class Install(View):
         user and figure out how to provision resources.
         """
         # we take the most recent purchase event for this user
-        purchase = (
-            Purchase.objects.filter(sender=request.user.email, should_have_tenant=True)
-            .order_by("-received_on")
-            .first()
-        )
+        with routers.use_replica(request.user.email):
+            purchase = (
+                Purchase.objects.filter(
+                    sender=request.user.email, should_have_tenant=True
+                )
+                .order_by("-received_on")
+                .first()
+            )
 
         # if user somehow visits this URL without having purchased the app
         if not purchase:
@@ -804,6 +991,20 @@ class CreateTenant(NewTenantView):
         kwargs["initial"]["organization"] = self.organization
         return kwargs
 
+    def form_valid(self, form):
+        # rename a pre-migrated schema instead of creating a new one, see
+        # spare_schemas.py. Rolled back if creating the tenant fails
+        try:
+            with transaction.atomic():
+                if spare_schemas.claim(form.cleaned_data["schema_name"].lower()):
+                    return super().form_valid(form)
+        except spare_schemas.SchemaTaken:
+            form.add_error("schema_name", _("This name is already taken"))
+            return self.form_invalid(form)
+
+        # the pool is empty, schema is created and migrated while waiting
+        return super().form_valid(form)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form_action_url"] = reverse("github_marketplace_create_tenant")
@@ -823,10 +1024,20 @@ class ViewSubscriptionPlan(UpdateView):
     template_name = "tcms_github_marketplace/subscription.html"
 
     def form_valid(self, form):
-        # clear gitops_prefix cache!
-        cache.clear()
+        routers.stick(self.request.user.email, api.GITOPS_STICKY_KEY)
+        response = super().form_valid(form)
 
-        return super().form_valid(form)
+        # clear gitops_prefix cache once the new value is visible to others!
+        transaction.on_commit(
+            lambda: api.gitops_prefix_changed(self.object.gitops_prefix)
+        )
+        return response
+
+    def get(self, request, *args, **kwargs):
+        with routers.use_replica(request.user.email):
+            response = super().get(request, *args, **kwargs)
+            # evaluate the context while reading from the replica
+            return response.render()
 
     def get_queryset(self):
         """
@@ -839,27 +1050,21 @@ class ViewSubscriptionPlan(UpdateView):
     def get_object(self, queryset=None):
         """
         Always returns the latest purchase for the current user
-        which has the subscription field set! Note that some events,
-        e.g. order.canceled may have this field set to None
+        which has the subscription field set!
         """
-        return (
-            self.get_queryset()
-            .exclude(Q(subscription=None) | Q(subscription__contains="None"))
-            .first()
-        )
+        # pylint: disable=attribute-defined-outside-init
+        # the history is displayed too, query the database only once
+        self.purchases = list(self.get_queryset())
+        return utils.latest_subscription(self.purchases)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        summary = utils.subscription_summary(self.request.user)
 
-        cancel_url = None
         quay_io_account = None
         private_repo_token = None
 
-        subscription_price = "-"
-        subscription_period = "-"
-
         if self.object is not None:
-            subscription_price = "0"
             quay_io_account = docker.QuayIOAccount(self.object.subscription)
             private_repo_token = (
                 PrivateRepoToken.objects.filter(subscription=self.object.subscription)
@@ -867,42 +1072,130 @@ class ViewSubscriptionPlan(UpdateView):
                 .last()
             )
 
-            if self.object.vendor.lower() == "github":
-                cancel_url = "https://github.com/settings/billing"
-
-            if self.object.vendor.lower() == "fastspring":
-                cancel_url = self.object.payload["data"]["account"]["url"]
-
-            purchase_data = self.object.payload["marketplace_purchase"]
-
-            # try yearly billing first
-            subscription_price = (
-                purchase_data["plan"].get("yearly_price_in_cents", 0) // 100
-            )
-            # default to monthly price next. FastSpring yearly billing subscriptions
-            # also send the price in this field
-            if subscription_price == 0:
-                subscription_price = (
-                    purchase_data["plan"].get("monthly_price_in_cents", 0) // 100
-                )
-            if purchase_data["billing_cycle"] == "monthly":
-                subscription_period = _("mo")
-            elif purchase_data["billing_cycle"] == "yearly":
-                subscription_period = _("yr")
-
-            subscription_price = int(subscription_price)
-
         context.update(
             {
-                "access_tenants": self.request.user.tenant_set.all(),
-                "own_tenants": Tenant.objects.filter(owner=self.request.user),
-                "purchases": self.get_queryset(),
-                "subscription_price": subscription_price,
-                "subscription_period": subscription_period,
-                "cancel_url": cancel_url,
+                "access_tenants": summary["access_tenants"],
+                "own_tenants": summary["own_tenants"],
+                "purchases": self.purchases,
+                "subscription_price": summary["subscription_price"],
+                "subscription_period": summary["subscription_period"],
+                "cancel_url": summary["cancel_url"],
                 "quay_io_account": quay_io_account,
                 "private_repo_token": private_repo_token,
             }
         )
 
         return context
+
+
+def check_bearer_token(request, setting):
+    """
+    Returns an error response unless the request is authorized with
+    ``Authorization: Bearer <token>`` where token is configured via ``setting``.
+    Raises 404 if the setting is missing so the URL isn't discoverable!
+    """
+    token = getattr(settings, setting, None)
+    if not token:
+        raise Http404()
+
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        return HttpResponseForbidden()
+
+    return None
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class Metrics(View):
+    """
+    Exposes metrics in the Prometheus text format. Disabled unless
+    ``MARKETPLACE_METRICS_TOKEN`` is configured, scrapers must send
+    ``Authorization: Bearer <token>``!
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        response = check_bearer_token(request, "MARKETPLACE_METRICS_TOKEN")
+        if response:
+            return response
+
+        return HttpResponse(
+            metrics.backend().render(), content_type="text/plain; version=0.0.4"
+        )
+
+
+class GitOpsAllow(View):
+    """
+    The same answer as the ``GitOps.allow`` RPC method via GET so that it
+    can be cached by reverse proxies and CDNs, e.g.
+    ``/gitops/allow/?repo_url=https://github.com/kiwitcms/Kiwi``
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        repo_url = prefix.canonical(request.GET.get("repo_url"))
+        if not repo_url:
+            return HttpResponseBadRequest("repo_url is required")
+
+        now = timezone.now()
+        paid_until = api.paid_until_for(repo_url)
+        allow = paid_until is not None and now <= paid_until
+
+        max_age = getattr(settings, "MARKETPLACE_GITOPS_MAX_AGE", 3600)
+        if allow:
+            # don't cache past the end of the paid period
+            max_age = min(max_age, int((paid_until - now).total_seconds()))
+        else:
+            # a new purchase should be visible soon
+            max_age = min(max_age, 300)
+
+        data = {"repo_url": repo_url, "allow": allow}
+        etag = f'"{hashlib.sha256(json.dumps(data).encode()).hexdigest()}"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(data)
+
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+
+class GitOpsAllowList(View):
+    """
+    All prefixes with an active paid subscription so that gitops runners
+    can make allow decisions locally. Returns a snapshot when called without
+    parameters, afterwards clients poll for changes with ``?since=<version>``.
+
+    Contains customer information, disabled unless
+    ``MARKETPLACE_GITOPS_ALLOWLIST_TOKEN`` is configured and clients must
+    send ``Authorization: Bearer <token>``!
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        response = check_bearer_token(request, "MARKETPLACE_GITOPS_ALLOWLIST_TOKEN")
+        if response:
+            return response
+
+        since = request.GET.get("since")
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return HttpResponseBadRequest("since must be an integer")
+
+        version = api.allowlist_version()
+        etag = f'"allowlist-{version}-{since}"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(api.allowlist(version, since))
+
+        response["ETag"] = etag
+        # must not be stored by shared caches b/c it requires authorization
+        patch_cache_control(response, private=True, max_age=api.ALLOWLIST_SETTLE)
+        return response
@@ -0,0 +1,75 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Benchmarks, not executed as part of the regular test suite. Execute with:
+
+    ./manage.py test -p "bench*.py" test_project.benchmarks
+
+Results are printed on stdout! When the ``BENCHMARK_OUTPUT`` environment
+variable points to a directory they are also saved there as JSON files
+which can be compared across releases.
+"""
+
+import json
+import os
+import statistics
+import time
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def timed(func, *args, **kwargs):
+    """
+    Returns the duration of a single call in milliseconds
+    """
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def latency(durations):
+    return {
+        "mean_ms": round(statistics.fmean(durations), 3),
+        "p50_ms": round(percentile(durations, 50), 3),
+        "p99_ms": round(percentile(durations, 99), 3),
+    }
+
+
+def print_table(title, rows):
+    """
+    ``rows`` is a list of dictionaries with the same keys
+    """
+    print()
+    print(f"=== {title} ===")
+    if not rows:
+        return
+
+    columns = list(rows[0].keys())
+    widths = {
+        column: max(len(str(column)), *(len(str(row[column])) for row in rows))
+        for column in columns
+    }
+    print("  ".join(str(column).ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def save_results(name, rows):
+    output_dir = os.environ.get("BENCHMARK_OUTPUT")
+    if not output_dir:
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, f"{name}.json"), "w", encoding="utf-8") as file:
+        json.dump(rows, file, indent=2)
@@ -0,0 +1,218 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+"""
+Compares the legacy GIN index over the entire ``Purchase.payload`` against
+the narrow expression indexes:
+
+    BENCHMARK_ROWS=1000000 ./manage.py test -p "bench*.py" \\
+        test_project.benchmarks.bench_gin_indexes
+"""
+
+import random
+
+from django import test
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from tcms_github_marketplace import api, gitops_cache, partitioning
+from tcms_github_marketplace.models import Purchase
+
+from test_project.benchmarks import (
+    env_int,
+    latency,
+    print_table,
+    save_results,
+    timed,
+)
+
+NARROW_INDEXES = [
+    "ghmp_purchase_account_id",
+    "ghmp_purchase_plan_price",
+]
+
+LEGACY_INDEXES = {
+    "tcms_github_payload_gin": f"CREATE INDEX tcms_github_payload_gin "
+    f"ON {partitioning.TABLE} USING gin (payload) WITH (fastupdate = off)",
+}
+
+GENERATE_PURCHASES = f"""
+INSERT INTO {partitioning.TABLE} (
+    vendor, action, sender, subscription, effective_date,
+    should_have_tenant, should_have_support, gitops_prefix, received_on, payload
+)
+SELECT
+    'github', 'purchased', 'user' || i || '@example.com', i::text,
+    now() - (i % 1095) * interval '1 day', true, false,
+    CASE WHEN i % 100 = 0 THEN 'https://github.com/org-' || i END,
+    now() - (i % 1095) * interval '1 day',
+    jsonb_build_object(
+        'action', 'purchased',
+        'sender', jsonb_build_object(
+            'login', 'user' || i, 'email', 'user' || i || '@example.com'
+        ),
+        'marketplace_purchase', jsonb_build_object(
+            'account', jsonb_build_object('id', i, 'type', 'User', 'login', 'user' || i),
+            'billing_cycle', 'monthly',
+            'unit_count', 1 + i % 10,
+            'next_billing_date', NULL,
+            'plan', jsonb_build_object(
+                'id', 1 + i % 3,
+                'name', 'Plan ' || (1 + i % 3),
+                'monthly_price_in_cents', (i % 3) * 3200,
+                'bullets', jsonb_build_array('Private tenant', 'Priority support')
+            )
+        )
+    )
+FROM generate_series(1, %s) AS i
+"""
+
+
+def create_purchase(account_id):
+    Purchase.objects.create(
+        vendor="github",
+        action="purchased",
+        sender=f"new-{account_id}@example.com",
+        subscription=str(account_id),
+        effective_date=timezone.now(),
+        payload={
+            "action": "purchased",
+            "sender": {"login": f"new-{account_id}"},
+            "marketplace_purchase": {
+                "account": {"id": account_id, "type": "User"},
+                "billing_cycle": "monthly",
+                "unit_count": 1,
+                "next_billing_date": None,
+                "plan": {"id": 2, "monthly_price_in_cents": 3200},
+            },
+        },
+    )
+
+
+def gitops_allow(account_id):
+    cache.clear()
+    gitops_cache.LOCAL.clear()
+    api.gitops_allow(f"https://github.com/org-{account_id}/repository")
+
+
+def account_lookup(account_id):
+    # the query executed by cron_github_recurring_billing
+    Purchase.objects.filter(
+        payload__marketplace_purchase__account__id=account_id
+    ).exists()
+
+
+def containment_lookup(account_id):
+    Purchase.objects.filter(
+        payload__contains={"marketplace_purchase": {"account": {"id": account_id}}}
+    ).exists()
+
+
+QUERIES = {
+    "GitOps.allow": gitops_allow,
+    "account id": account_lookup,
+    "containment": containment_lookup,
+}
+
+
+class GinIndexBenchmark(test.TestCase):
+    rows = env_int("BENCHMARK_ROWS", 1_000_000)
+    samples = env_int("BENCHMARK_SAMPLES", 200)
+
+    @staticmethod
+    def index_definitions(names):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = %s AND indexname = ANY(%s)",
+                [partitioning.TABLE, names],
+            )
+            return {
+                name: definition.replace(" ON ONLY ", " ON ")
+                for name, definition in cursor.fetchall()
+            }
+
+    @staticmethod
+    def index_size(names):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sum(pg_relation_size(tree.relid)) FROM unnest(%s::text[]) AS name, "
+                "LATERAL pg_partition_tree(name::regclass) AS tree",
+                [names],
+            )
+            return cursor.fetchone()[0] or 0
+
+    @staticmethod
+    def execute(*statements):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def load_data(self):
+        this_year = timezone.now().year
+        with connection.cursor() as cursor:
+            for year in range(this_year - 3, this_year):
+                partitioning.create_partition(cursor, year)
+            cursor.execute(GENERATE_PURCHASES, [self.rows])
+
+    def test_compare_index_strategies(self):
+        strategies = {
+            "legacy": LEGACY_INDEXES,
+            "narrow": self.index_definitions(NARROW_INDEXES),
+        }
+        self.execute(*(f"DROP INDEX {name}" for name in strategies["narrow"]))
+        self.load_data()
+
+        results = []
+        next_account_id = self.rows
+        for strategy, indexes in strategies.items():
+            build_ms = timed(self.execute, *indexes.values())
+            self.execute(f"ANALYZE {partitioning.TABLE}")
+
+            inserts = []
+            for _ in range(self.samples):
+                next_account_id += 1
+                inserts.append(timed(create_purchase, next_account_id))
+
+            results.append(
+                {
+                    "strategy": strategy,
+                    "operation": "CREATE INDEX",
+                    "mean_ms": round(build_ms, 3),
+                    "p50_ms": "",
+                    "p99_ms": "",
+                    "size_mb": round(self.index_size(list(indexes)) / 2**20, 1),
+                }
+            )
+            results.append(
+                {
+                    "strategy": strategy,
+                    "operation": "INSERT",
+                    **latency(inserts),
+                    "size_mb": "",
+                }
+            )
+
+            for operation, query in QUERIES.items():
+                durations = [
+                    timed(query, random.randint(1, self.rows))  # nosec:B311
+                    for _ in range(self.samples)
+                ]
+                results.append(
+                    {
+                        "strategy": strategy,
+                        "operation": operation,
+                        **latency(durations),
+                        "size_mb": "",
+                    }
+                )
+
+            self.execute(*(f"DROP INDEX {name}" for name in indexes))
+
+        print_table(f"Purchase.payload indexes, {self.rows} rows", results)
+        save_results("gin_indexes", results)
@@ -0,0 +1,128 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+"""
+Compares matching repository URLs against ``Purchase.gitops_prefix`` via the
+``iprefix_for`` lookup (ILIKE) and via candidate prefixes in a btree index:
+
+    BENCHMARK_ROWS=100000 ./manage.py test -p "bench*.py" \\
+        test_project.benchmarks.bench_gitops_prefix
+"""
+
+import random
+
+from django import test
+from django.db import connection
+from django.utils import timezone
+
+from tcms_github_marketplace import partitioning, prefix
+from tcms_github_marketplace.models import Purchase
+
+from test_project.benchmarks import (
+    env_int,
+    latency,
+    print_table,
+    save_results,
+    timed,
+)
+
+GENERATE_PURCHASES = f"""
+INSERT INTO {partitioning.TABLE} (
+    vendor, action, sender, subscription, effective_date, should_have_tenant,
+    should_have_support, gitops_prefix, gitops_prefix_normalized, received_on, payload
+)
+SELECT
+    'fastspring', 'purchased', 'user' || i || '@example.com', 'fs-' || i,
+    now() - (i % 1095) * interval '1 day', true, false,
+    'https://github.com/Org-' || i, 'https://github.com/org-' || i,
+    now() - (i % 1095) * interval '1 day',
+    '{{}}'::jsonb
+FROM generate_series(1, %s) AS i
+"""
+
+
+def ilike(repo_url):
+    return Purchase.objects.filter(gitops_prefix__iprefix_for=repo_url)
+
+
+def candidates(repo_url):
+    return Purchase.objects.filter(
+        gitops_prefix_normalized__in=prefix.candidates(repo_url)
+    )
+
+
+def lookup(queryset_for, repo_url):
+    queryset_for(repo_url).exists()
+
+
+STRATEGIES = {
+    "ILIKE": ilike,
+    "IN (candidates)": candidates,
+}
+
+
+class GitOpsPrefixBenchmark(test.TestCase):
+    rows = env_int("BENCHMARK_ROWS", 100_000)
+    samples = env_int("BENCHMARK_SAMPLES", 200)
+
+    def load_data(self):
+        this_year = timezone.now().year
+        with connection.cursor() as cursor:
+            for year in range(this_year - 3, this_year):
+                partitioning.create_partition(cursor, year)
+            cursor.execute(GENERATE_PURCHASES, [self.rows])
+            cursor.execute(f"ANALYZE {partitioning.TABLE}")
+
+    @staticmethod
+    def plan(queryset):
+        """
+        Returns the scan types used by the query plan
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            nodes = [cursor.fetchone()[0][0]["Plan"]]
+
+        scans = set()
+        while nodes:
+            node = nodes.pop()
+            if "Scan" in node["Node Type"]:
+                scans.add(node["Node Type"])
+            nodes.extend(node.get("Plans", []))
+
+        return ", ".join(sorted(scans))
+
+    def test_compare_prefix_strategies(self):
+        self.load_data()
+
+        results = []
+        for strategy, queryset_for in STRATEGIES.items():
+            for operation, template in (
+                ("hit", "https://github.com/org-{}/repository"),
+                ("miss", "https://github.com/other-{}/repository"),
+            ):
+                durations = [
+                    timed(
+                        lookup,
+                        queryset_for,
+                        template.format(random.randint(1, self.rows)),  # nosec:B311
+                    )
+                    for _ in range(self.samples)
+                ]
+                results.append(
+                    {
+                        "strategy": strategy,
+                        "operation": operation,
+                        **latency(durations),
+                        "plan": self.plan(
+                            queryset_for(template.format(self.rows // 2))
+                        ),
+                    }
+                )
+
+        print_table(f"Purchase.gitops_prefix matching, {self.rows} rows", results)
+        save_results("gitops_prefix", results)
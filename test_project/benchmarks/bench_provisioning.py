@@ -0,0 +1,66 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+"""
+The full provisioning pipeline, including the real Quay.io, Gemfury and
+MailChimp clients, against the local fake servers:
+
+    BENCHMARK_LATENCY=0.05 BENCHMARK_FAILURE_RATE=0.01 \\
+        ./manage.py test -p "bench*.py" test_project.benchmarks.bench_provisioning
+"""
+
+import os
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from test_project.benchmarks import bench_webhooks
+from test_project.fake_servers import FakeGemfury, FakeMailChimp, FakeQuay
+
+
+class ProvisioningBenchmark(bench_webhooks.WebhookIngestionBenchmark):
+    latency = float(os.environ.get("BENCHMARK_LATENCY", "0.05"))
+    jitter = float(os.environ.get("BENCHMARK_JITTER", "0"))
+    failure_rate = float(os.environ.get("BENCHMARK_FAILURE_RATE", "0"))
+
+    scenarios = {
+        name: bench_webhooks.SCENARIOS[name]
+        for name in (
+            "github purchased",
+            "github cancelled",
+            "fastspring activated",
+            "fastspring deactivated",
+        )
+    }
+    title = "Provisioning via fake servers"
+    results_name = "provisioning"
+
+    @classmethod
+    def enter_fakes(cls, stack):
+        options = {
+            "latency": cls.latency,
+            "jitter": cls.jitter,
+            "failure_rate": cls.failure_rate,
+            "seed": 0,
+        }
+        quay = stack.enter_context(FakeQuay(**options))
+        gemfury = stack.enter_context(FakeGemfury(**options))
+        mailchimp = stack.enter_context(FakeMailChimp(**options))
+
+        stack.enter_context(
+            override_settings(
+                QUAY_IO_HOST=quay.url,
+                QUAY_IO_TOKEN="fake",
+                GEMFURY_API_URL=f"{gemfury.url}/1",
+                GEMFURY_API_TOKEN="fake",
+                MAILCHIMP_API_URL=f"{mailchimp.url}/3.0/",
+                MAILCHIMP_SECRET="0" * 32 + "-us1",
+                MAILCHIMP_USERNAME="kiwitcms",
+            )
+        )
+        # email is not an HTTP API
+        stack.enter_context(patch("tcms_github_marketplace.utils.mailto"))
@@ -0,0 +1,226 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+# pylint: disable=too-many-ancestors
+
+"""
+Throughput, latency, query count and memory allocations for webhook
+ingestion. Outbound calls to Quay.io, Gemfury, MailChimp and email are
+replaced by in-process fakes:
+
+    BENCHMARK_EVENTS=500 ./manage.py test -p "bench*.py" \\
+        test_project.benchmarks.bench_webhooks
+"""
+
+import hashlib
+import hmac
+import json
+import statistics
+import tracemalloc
+from base64 import b64encode
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tcms.utils import github
+
+import tcms_tenants
+
+from tcms_github_marketplace import docker, fury, mailchimp
+from tcms_github_marketplace.views import GithubCronProcessor
+
+from test_project.benchmarks import (
+    env_int,
+    latency,
+    print_table,
+    save_results,
+    timed,
+)
+from test_project.benchmarks.payloads import (
+    fastspring_payload,
+    github_event,
+)
+
+# scenario name -> (receiver, payload factory)
+SCENARIOS = {
+    "github purchased": ("github", github_event),
+    "github free plan": (
+        "github",
+        lambda number: github_event(number, monthly_price_in_cents=0),
+    ),
+    "github cancelled": (
+        "github",
+        lambda number: github_event(number, action="cancelled"),
+    ),
+    "github_cron renewal": ("github_cron", github_event),
+    "fastspring activated": (
+        "fastspring",
+        lambda number: fastspring_payload(number, "subscription.activated"),
+    ),
+    "fastspring charge completed": (
+        "fastspring",
+        lambda number: fastspring_payload(number, "subscription.charge.completed"),
+    ),
+    "fastspring deactivated": (
+        "fastspring",
+        lambda number: fastspring_payload(number, "subscription.deactivated"),
+    ),
+}
+
+
+class WebhookIngestionBenchmark(tcms_tenants.tests.LoggedInTestCase):
+    events = env_int("BENCHMARK_EVENTS", 200)
+    allocation_events = env_int("BENCHMARK_ALLOCATION_EVENTS", 20)
+
+    scenarios = SCENARIOS
+    title = "Webhook ingestion"
+    results_name = "webhooks"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.github_url = reverse("github_marketplace_purchase_hook")
+        cls.fastspring_url = reverse("fastspring")
+        cls.factory = RequestFactory()
+
+        cls.exit_stack = ExitStack()
+        cls.enter_fakes(cls.exit_stack)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.exit_stack.close()
+        super().tearDownClass()
+
+    @classmethod
+    def enter_fakes(cls, stack):
+        """
+        Replaces all outbound calls with in-process fakes
+        """
+        stack.enter_context(
+            patch.object(
+                docker.QuayIOAccount,
+                "create",
+                return_value={"name": "kiwitcms+robot", "token": "secret"},
+            )
+        )
+        stack.enter_context(
+            patch.object(
+                docker.QuayIOAccount, "allow_read_access", return_value="success"
+            )
+        )
+        stack.enter_context(
+            patch.object(docker.QuayIOAccount, "delete", return_value="")
+        )
+        stack.enter_context(
+            patch.object(
+                fury.GemfuryAPI,
+                "create_token",
+                return_value={
+                    "token": {"id": "tok_bench", "kind_key": "pull"},
+                    "token_value": "secret",
+                },
+            )
+        )
+        stack.enter_context(
+            patch.object(fury.GemfuryAPI, "delete_token", return_value=None)
+        )
+        stack.enter_context(
+            patch.object(mailchimp, "subscribe", return_value="success")
+        )
+        stack.enter_context(patch("tcms_github_marketplace.utils.mailto"))
+
+    def send(self, receiver, payload):
+        """
+        Returns True on success. Failures are counted, not raised,
+        so that failure injection can be used for soak-testing!
+        """
+        body = json.dumps(payload)
+
+        try:
+            if receiver == "github":
+                response = self.client.post(
+                    self.github_url,
+                    body,
+                    content_type="application/json",
+                    HTTP_X_HUB_SIGNATURE=github.calculate_signature(
+                        settings.KIWI_GITHUB_MARKETPLACE_SECRET, body.encode()
+                    ),
+                )
+            elif receiver == "fastspring":
+                signature = hmac.new(
+                    settings.KIWI_FASTSPRING_SECRET,
+                    msg=body.encode(),
+                    digestmod=hashlib.sha256,
+                ).digest()
+                response = self.client.post(
+                    self.fastspring_url,
+                    body,
+                    content_type="application/json",
+                    HTTP_X_FS_SIGNATURE=b64encode(signature).decode(),
+                )
+            else:
+                # the same way as cron_github_recurring_billing
+                request = self.factory.post(
+                    "/github/cron/", data=body, content_type="application/json"
+                )
+                request.user = AnonymousUser()
+                response = GithubCronProcessor.as_view()(request)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.errors += 1
+            return False
+
+        if response.status_code != 200:
+            self.errors += 1
+            return False
+
+        return True
+
+    def measure(self, receiver, factory):
+        self.errors = 0  # pylint: disable=attribute-defined-outside-init
+        durations = [
+            timed(self.send, receiver, factory(number)) for number in range(self.events)
+        ]
+
+        # query counts & allocations are collected separately b/c
+        # they slow down execution
+        queries = []
+        allocations = []
+        tracemalloc.start()
+        try:
+            for number in range(self.events, self.events + self.allocation_events):
+                payload = factory(number)
+                tracemalloc.reset_peak()
+                before, _peak = tracemalloc.get_traced_memory()
+
+                with CaptureQueriesContext(connection) as context:
+                    self.send(receiver, payload)
+
+                allocations.append(tracemalloc.get_traced_memory()[1] - before)
+                queries.append(len(context.captured_queries))
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "events_per_sec": round(len(durations) / (sum(durations) / 1000), 1),
+            **latency(durations),
+            "queries": round(statistics.fmean(queries), 1),
+            "peak_alloc_kb": round(statistics.fmean(allocations) / 1024, 1),
+            "errors": self.errors,
+        }
+
+    def test_webhook_ingestion(self):
+        results = [
+            {"event": scenario, **self.measure(receiver, factory)}
+            for scenario, (receiver, factory) in self.scenarios.items()
+        ]
+
+        print_table(f"{self.title}, {self.events} events each", results)
+        save_results(self.results_name, results)
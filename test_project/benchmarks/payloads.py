@@ -0,0 +1,153 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Synthetic webhook payloads modeled after the fixtures in
+``tcms_github_marketplace/tests/test_views.py`` and ``test_fastspring_hook.py``.
+The ``number`` argument makes accounts, emails & subscriptions unique!
+"""
+
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+BILLING_CYCLES = ("monthly", "yearly")
+
+
+def github_event(number, action="purchased", monthly_price_in_cents=5000):
+    login = f"org-{number}"
+    now = timezone.now()
+    paid = monthly_price_in_cents > 0
+
+    return {
+        "action": action,
+        "effective_date": now.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "sender": {
+            "login": f"user-{number}",
+            "id": 1_000_000 + number,
+            "avatar_url": f"https://avatars.githubusercontent.com/u/{number}?v=4",
+            "gravatar_id": "",
+            "url": f"https://api.github.com/users/user-{number}",
+            "html_url": f"https://github.com/user-{number}",
+            "type": "User",
+            "site_admin": False,
+            "email": f"user-{number}@example.com",
+        },
+        "marketplace_purchase": {
+            "account": {
+                "type": "Organization",
+                "id": 2_000_000 + number,
+                "login": login,
+                "organization_billing_email": f"billing@{login}.example.com",
+            },
+            "billing_cycle": BILLING_CYCLES[number % len(BILLING_CYCLES)],
+            "unit_count": 1 + number % 10,
+            "on_free_trial": False,
+            "free_trial_ends_on": None,
+            "next_billing_date": (now + timedelta(days=30)).strftime(
+                "%Y-%m-%dT%H:%M:%S+00:00"
+            ),
+            "plan": {
+                "id": 7335 if paid else 435,
+                "name": "Private Tenant" if paid else "Public Tenant",
+                "description": "Unlimited users. Control who can access.",
+                "monthly_price_in_cents": monthly_price_in_cents,
+                "yearly_price_in_cents": monthly_price_in_cents * 12,
+                "price_model": "FLAT_RATE" if paid else "FREE",
+                "has_free_trial": False,
+                "unit_name": None,
+                "bullets": [
+                    "1x SaaS hosting under *.tenant.kiwitcms.org",
+                    "Docker repositories: quay.io/kiwitcms/version",
+                    "Always the latest version",
+                    "09-17 UTC/Mon-Fri support",
+                ],
+            },
+        },
+    }
+
+
+def fastspring_event(number, event_type):
+    now = time.time()
+    subscription_id = f"bench-{number}"
+    account = {
+        "id": f"acc-{number}",
+        "account": f"acc-{number}",
+        "url": "https://example.onfastspring.com/account",
+        "address": {
+            "city": "Sofia",
+            "region": "",
+            "company": "Example",
+            "postal code": "1000",
+            "address line 1": None,
+            "address line 2": None,
+        },
+        "contact": {
+            "first": "Bench",
+            "last": f"User {number}",
+            "email": f"fs-user-{number}@example.com",
+            "phone": "55555",
+            "company": "Example",
+            "subscribed": True,
+        },
+        "country": "BG",
+        "language": "en",
+    }
+    subscription = {
+        "id": subscription_id,
+        "sku": "x-tenant+version",
+        "live": True,
+        "state": "deactivated" if event_type.endswith("deactivated") else "active",
+        "active": not event_type.endswith("deactivated"),
+        "product": "kiwitcms-private-tenant",
+        "display": "Kiwi TCMS Private Tenant",
+        "price": 56,
+        "currency": "EUR",
+        "quantity": 1 + number % 5,
+        "intervalUnit": "month",
+        "intervalLength": 1,
+        "begin": int(now * 1000),
+        "nextChargeDateInSeconds": int(now) + 30 * 24 * 3600,
+        "subtotalInPayoutCurrency": 50.68,
+        "instructions": [
+            {
+                "product": "kiwitcms-private-tenant",
+                "type": "regular",
+                "periodStartDate": None,
+                "intervalUnit": "month",
+                "intervalLength": 1,
+                "price": 56,
+                "priceTotal": 56,
+                "unitPrice": 56,
+            }
+        ],
+    }
+
+    if event_type == "subscription.charge.completed":
+        data = {
+            "order": {"id": f"order-{number}", "reference": f"KIW{number}"},
+            "subscription": subscription,
+            "account": account,
+            "currency": "EUR",
+            "quantity": subscription["quantity"],
+            "subtotalInPayoutCurrency": 50.68,
+            "status": "successful",
+        }
+    else:
+        data = dict(subscription, account=account, subscription=subscription_id)
+
+    return {
+        "id": f"evt-{number}-{event_type}",
+        "type": event_type,
+        "live": True,
+        "processed": False,
+        "created": int(now * 1000),
+        "data": data,
+    }
+
+
+def fastspring_payload(number, event_type):
+    return {"events": [fastspring_event(number, event_type)]}
@@ -0,0 +1,372 @@
+# Copyright (c) 2026 Alexander Todorov <atodorov@otb.bg>
+#
+# Licensed under GNU Affero General Public License v3 or later (AGPLv3+)
+# https://www.gnu.org/licenses/agpl-3.0.html
+
+"""
+Stand-in HTTP servers for Quay.io, Gemfury and MailChimp which implement
+only the endpoints used by this package. They keep state in memory and
+support configurable latency and failure injection so that the entire
+provisioning pipeline can be benchmarked and soak-tested offline.
+
+Start all of them from the command line with::
+
+    python -m test_project.fake_servers --latency 0.05 --failure-rate 0.01
+
+and configure the printed settings or use them from Python::
+
+    with FakeQuay(latency=0.05) as quay:
+        with override_settings(QUAY_IO_HOST=quay.url):
+            ...
+"""
+
+import argparse
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        status, payload, headers = self.server.fake.handle(
+            self.command, url.path, parse_qs(url.query), body
+        )
+
+        content = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class FakeServer:
+    """
+    Base class. Subclasses define ``routes`` as a list of
+    ``(method, regex, handler_name)`` and the handler methods
+    which return ``(status, payload, headers)``.
+    """
+
+    routes = []
+
+    def __init__(
+        self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None, port=0
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.port = port
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = []
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), RequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def handle(self, method, path, query, body):
+        with self.lock:
+            self.requests.append((method, path))
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.failure_rate
+
+        if delay:
+            time.sleep(delay)
+
+        if fail:
+            return (
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "injected failure"},
+                {},
+            )
+
+        for route_method, pattern, handler_name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                data = json.loads(body) if body else {}
+                with self.lock:
+                    return getattr(self, handler_name)(match, query, data)
+
+        return HTTPStatus.NOT_FOUND, {"error": f"{method} {path} not found"}, {}
+
+
+class FakeQuay(FakeServer):
+    """
+    Quay.io robot accounts & repository permissions. Configure with
+    ``QUAY_IO_HOST = fake.url``
+    """
+
+    ROBOT = r"/api/v1/organization/(?P<org>[^/]+)/robots/(?P<name>[^/]+)"
+
+    routes = [
+        ("GET", ROBOT, "get_robot"),
+        ("PUT", ROBOT, "create_robot"),
+        ("DELETE", ROBOT, "delete_robot"),
+        ("POST", ROBOT + "/regenerate", "regenerate_robot"),
+        (
+            "PUT",
+            r"/api/v1/repository/(?P<repository>[^/]+/[^/]+)/permissions/user/(?P<username>[^/]+)",
+            "update_permissions",
+        ),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.robots = {}
+        self.permissions = {}
+
+    @staticmethod
+    def _robot_name(match):
+        return f"{match['org']}+{match['name']}"
+
+    def get_robot(self, match, _query, _data):
+        name = self._robot_name(match)
+        if name not in self.robots:
+            return (
+                HTTPStatus.BAD_REQUEST,
+                {"message": "Could not find robot with specified username"},
+                {},
+            )
+        return HTTPStatus.OK, self.robots[name], {}
+
+    def create_robot(self, match, _query, data):
+        name = self._robot_name(match)
+        if name in self.robots:
+            return (
+                HTTPStatus.BAD_REQUEST,
+                {"message": f"Existing robot with name: {name}"},
+                {},
+            )
+
+        self.robots[name] = {
+            "name": name,
+            "token": secrets.token_hex(16),
+            "description": data.get("description", ""),
+            "unstructured_metadata": data.get("unstructured_metadata", {}),
+        }
+        return HTTPStatus.CREATED, self.robots[name], {}
+
+    def delete_robot(self, match, _query, _data):
+        self.robots.pop(self._robot_name(match), None)
+        return HTTPStatus.NO_CONTENT, None, {}
+
+    def regenerate_robot(self, match, query, data):
+        name = self._robot_name(match)
+        if name not in self.robots:
+            return self.get_robot(match, query, data)
+
+        self.robots[name]["token"] = secrets.token_hex(16)
+        return HTTPStatus.OK, self.robots[name], {}
+
+    def update_permissions(self, match, _query, data):
+        key = (match["repository"], match["username"])
+        self.permissions[key] = data.get("role", "read")
+        return (
+            HTTPStatus.OK,
+            {
+                "role": self.permissions[key],
+                "name": match["username"],
+                "is_robot": True,
+            },
+            {},
+        )
+
+
+class FakeGemfury(FakeServer):
+    """
+    Gemfury pull tokens with ``Link`` header pagination. Configure with
+    ``GEMFURY_API_URL = fake.url + "/1"``
+    """
+
+    routes = [
+        ("GET", r"/1/tokens", "list_tokens"),
+        ("POST", r"/1/tokens", "create_token"),
+        ("DELETE", r"/1/tokens/(?P<token_id>[^/]+)", "delete_token"),
+    ]
+
+    def __init__(self, *args, page_size=20, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_size = page_size
+        self.tokens = {}
+
+    def list_tokens(self, _match, query, _data):
+        kind_key = query.get("kind_key", ["pull"])[0]
+        page = int(query.get("page", ["1"])[0])
+        tokens = [
+            token for token in self.tokens.values() if token["kind_key"] == kind_key
+        ]
+
+        start = (page - 1) * self.page_size
+        headers = {}
+        if start + self.page_size < len(tokens):
+            headers["Link"] = f'<?kind_key={kind_key}&page={page + 1}>; rel="next"'
+
+        return HTTPStatus.OK, tokens[start : start + self.page_size], headers
+
+    def create_token(self, _match, query, _data):
+        token = {
+            "id": f"tok_{secrets.token_hex(4)}",
+            "kind_key": query.get("kind_key", ["pull"])[0],
+            "description": query.get("description", [""])[0],
+        }
+        self.tokens[token["id"]] = token
+        return (
+            HTTPStatus.OK,
+            {"token": token, "token_value": secrets.token_hex(16)},
+            {},
+        )
+
+    def delete_token(self, match, _query, _data):
+        if self.tokens.pop(match["token_id"], None) is None:
+            return HTTPStatus.NOT_FOUND, {"error": "Token not found"}, {}
+        return HTTPStatus.NO_CONTENT, None, {}
+
+
+class FakeMailChimp(FakeServer):
+    """
+    MailChimp list members. Configure with
+    ``MAILCHIMP_API_URL = fake.url + "/3.0/"``
+    """
+
+    LIST = r"/3.0/lists/(?P<list_id>[^/]+)"
+    MEMBERS = LIST + "/members"
+
+    routes = [
+        ("POST", LIST, "batch_subscribe"),
+        ("GET", MEMBERS, "list_members"),
+        ("POST", MEMBERS, "create_member"),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.members = {}
+
+    def list_members(self, match, query, _data):
+        members = list(self.members.get(match["list_id"], {}).values())
+        offset = int(query.get("offset", ["0"])[0])
+        count = int(query.get("count", ["10"])[0])
+        return (
+            HTTPStatus.OK,
+            {
+                "members": members[offset : offset + count],
+                "list_id": match["list_id"],
+                "total_items": len(members),
+            },
+            {},
+        )
+
+    def _add_member(self, list_id, data):
+        email = data.get("email_address", "").lower()
+        self.members.setdefault(list_id, {})[email] = {
+            "id": secrets.token_hex(16),
+            "email_address": email,
+            "status": data.get("status", "pending"),
+            "list_id": list_id,
+        }
+        return self.members[list_id][email]
+
+    def create_member(self, match, _query, data):
+        members = self.members.get(match["list_id"], {})
+        if data.get("email_address", "").lower() in members:
+            return (
+                HTTPStatus.BAD_REQUEST,
+                {"title": "Member Exists", "status": 400},
+                {},
+            )
+
+        return HTTPStatus.OK, self._add_member(match["list_id"], data), {}
+
+    def batch_subscribe(self, match, _query, data):
+        members = self.members.get(match["list_id"], {})
+        result = {"new_members": [], "updated_members": [], "errors": []}
+
+        for member in data.get("members", []):
+            email = member.get("email_address", "").lower()
+            if email in members and not data.get("update_existing"):
+                result["errors"].append(
+                    {
+                        "email_address": email,
+                        "error": f"{email} is already a list member",
+                        "error_code": "ERROR_CONTACT_EXISTS",
+                    }
+                )
+            else:
+                result["new_members"].append(self._add_member(match["list_id"], member))
+
+        result["total_created"] = len(result["new_members"])
+        result["error_count"] = len(result["errors"])
+        return HTTPStatus.OK, result, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.0, help="in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="0.0 - 1.0")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "failure_rate": args.failure_rate,
+        "seed": args.seed,
+    }
+    servers = [
+        FakeQuay(**options).start(),
+        FakeGemfury(**options).start(),
+        FakeMailChimp(**options).start(),
+    ]
+
+    print(f'QUAY_IO_HOST = "{servers[0].url}"')
+    print(f'GEMFURY_API_URL = "{servers[1].url}/1"')
+    print(f'MAILCHIMP_API_URL = "{servers[2].url}/3.0/"')
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()